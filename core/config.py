@@ -15,8 +15,36 @@ class Settings:
     db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
     embedding_model: str = "nomic-ai/modernbert-embed-base"
     embedding_dim: int = 768
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    embedding_precision: str = os.getenv("EMBEDDING_PRECISION", "fp32")
+    embedding_equivalence_min_cosine: float = float(
+        os.getenv("EMBEDDING_EQUIVALENCE_MIN_COSINE", "0.99")
+    )
+    query_max_tokens: int = int(os.getenv("QUERY_MAX_TOKENS", "512"))
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+    embed_batch_token_budget: int = int(os.getenv("EMBED_BATCH_TOKEN_BUDGET", "16384"))
+    embed_document_windows: bool = _get_bool_env("EMBED_DOCUMENT_WINDOWS", False)
+    embed_workers: int = int(os.getenv("EMBED_WORKERS", "0"))
+    embed_threads_per_worker: int = int(os.getenv("EMBED_THREADS_PER_WORKER", "0"))
+    chunk_insert_batch_size: int = int(os.getenv("CHUNK_INSERT_BATCH_SIZE", "512"))
+    enable_embedding_cache: bool = _get_bool_env("ENABLE_EMBEDDING_CACHE", False)
+    embedding_cache_max_mb: int = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "2048"))
     data_dir: str = os.getenv("IDP_DATA_DIR", "data")
+    triage_image_coverage: str = os.getenv("TRIAGE_IMAGE_COVERAGE", "raster")
+    triage_workers: int = int(os.getenv("TRIAGE_WORKERS", "0"))
+    canonicalize_workers: int = int(os.getenv("CANONICALIZE_WORKERS", "0"))
     disable_di: bool = _get_bool_env("DISABLE_DI", False)
+    di_max_in_flight: int = int(os.getenv("DI_MAX_IN_FLIGHT", "4"))
+    di_batch_pages: int = int(os.getenv("DI_BATCH_PAGES", "8"))
+    enable_di_cache: bool = _get_bool_env("ENABLE_DI_CACHE", False)
+    di_cache_max_mb: int = int(os.getenv("DI_CACHE_MAX_MB", "1024"))
+    di_pack_pages: bool = _get_bool_env("DI_PACK_PAGES", False)
+    di_max_retries: int = int(os.getenv("DI_MAX_RETRIES", "3"))
+    di_retry_backoff_seconds: float = float(os.getenv("DI_RETRY_BACKOFF_SECONDS", "2.0"))
+    pipelined_ingest: bool = _get_bool_env("PIPELINED_INGEST", False)
+    pipeline_queue_pages: int = int(os.getenv("PIPELINE_QUEUE_PAGES", "8"))
+    batch_ingest_workers: int = int(os.getenv("BATCH_INGEST_WORKERS", "2"))
+    incremental_reingest: bool = _get_bool_env("INCREMENTAL_REINGEST", False)
     enable_hybrid_retrieval: bool = _get_bool_env("ENABLE_HYBRID_RETRIEVAL", False)
     enable_verifier: bool = _get_bool_env("ENABLE_VERIFIER", False)
     enable_reranker: bool = _get_bool_env("ENABLE_RERANKER", False)
@@ -0,0 +1,143 @@
+"""Size-bounded on-disk store for content-addressed blobs.
+
+Entries live at ``root/<key[:2]>/<key><suffix>`` and are written atomically
+(temp file + rename), so concurrent writers of the same key are harmless.
+Reads refresh an entry's mtime; when the store grows past ``max_bytes`` the
+least recently used entries are deleted first.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def since(self, earlier: "CacheStats") -> "CacheStats":
+        return CacheStats(
+            hits=self.hits - earlier.hits,
+            misses=self.misses - earlier.misses,
+            writes=self.writes - earlier.writes,
+            evictions=self.evictions - earlier.evictions,
+        )
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+def content_key(*parts: Union[str, bytes]) -> str:
+    """sha256 over length-prefixed parts, so part boundaries are unambiguous."""
+    hasher = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        hasher.update(len(data).to_bytes(8, "little"))
+        hasher.update(data)
+    return hasher.hexdigest()
+
+
+class ContentAddressedCache:
+    def __init__(self, root: str, max_bytes: int, suffix: str = "") -> None:
+        self.root = root
+        self.max_bytes = max(max_bytes, 0)
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._size: Optional[int] = None
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}{self.suffix}")
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self._record(misses=1)
+            return None
+        self._record(hits=1)
+        return data
+
+    def write(self, key: str, data: bytes) -> None:
+        if not self.max_bytes or len(data) > self.max_bytes:
+            return
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(handle, "wb") as tmp:
+            tmp.write(data)
+        existed = os.path.exists(path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._stats = _increment(self._stats, writes=1)
+            if self._size is not None and not existed:
+                self._size += len(data)
+        self._evict_if_needed()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return self._stats
+
+    def size_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = self.size_bytes()
+            if self._size <= self.max_bytes:
+                return
+            entries = sorted(self._entries())
+            evicted = 0
+            while entries and self._size > self.max_bytes:
+                _, path, size = entries.pop(0)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                self._size -= size
+                evicted += 1
+            self._stats = _increment(self._stats, evictions=evicted)
+        logger.info("Evicted %d entries from %s", evicted, self.root)
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        """(mtime, path, size) of every entry under root."""
+        entries: List[Tuple[float, str, int]] = []
+        if not os.path.isdir(self.root):
+            return entries
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(self.suffix) or entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def _record(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self._stats = _increment(self._stats, hits=hits, misses=misses)
+
+
+def _increment(stats: CacheStats, **increments: int) -> CacheStats:
+    return CacheStats(
+        **{name: value + increments.get(name, 0) for name, value in asdict(stats).items()}
+    )
@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -8,6 +10,8 @@ class TriageMetrics:
     text_density: float
     image_coverage_ratio: float
     layout_complexity_score: float
+    # "raster" (rendered pixmap) or "metadata" (raster-free estimate).
+    image_coverage_method: str = "raster"
 
 
 @dataclass(frozen=True)
@@ -77,6 +81,8 @@ class PageRecord:
     triage_decision: str
     reason_codes: List[str]
     di_json_path: Optional[str]
+    # Hash of the page's content streams and resources (see page_reuse).
+    content_hash: Optional[str] = None
 
 
 @dataclass(frozen=True)
@@ -94,7 +100,9 @@ class ChunkRecord:
     source_type: str
     embedding_model: str
     embedding_dim: int
-    embedding: List[float]
+    # Late chunking hands over float32 ndarray rows (pgvector adapts them
+    # directly); plain float lists are accepted as well.
+    embedding: Union[List[float], np.ndarray]
     heading_path: str
     section_id: str
 
@@ -110,3 +118,13 @@ class DocumentFact:
     page_numbers: List[int]
     polygons: List[Dict[str, Any]]
     evidence_excerpt: Optional[str]
+
+
+@dataclass(frozen=True)
+class IngestCheckpoint:
+    doc_id: str
+    # "triage", "di", "canonicalize" or "persist".
+    stage: str
+    # Pages 1..pages_done are complete for this stage.
+    pages_done: int
+    state: Dict[str, Any] = field(default_factory=dict)
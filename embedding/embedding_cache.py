@@ -0,0 +1,54 @@
+"""Persistent token-level embedding cache for late chunking.
+
+An entry holds the model's ``[tokens, dim]`` output for one model input as a
+float16 ``.npy``. The key covers the embedding model, the backend, the
+forward-pass precision and the exact input token ids (special tokens and
+truncation included), so any change to the text, tokenizer settings or
+window boundaries is a miss.
+Pooling runs on the cached token outputs, so a re-ingest with a different
+``child_target_tokens`` still hits.
+"""
+
+import io
+import os
+from typing import Optional
+
+import numpy as np
+import torch
+
+from core.config import settings
+from core.content_cache import CacheStats, ContentAddressedCache, content_key
+from embedding.modernbert import TokenizedChunk
+
+
+class EmbeddingCache:
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self._store = ContentAddressedCache(root, max_bytes, suffix=".npy")
+
+    def key(self, embedder, tokenized: TokenizedChunk) -> str:
+        input_ids = tokenized.input_ids.detach().cpu().to(torch.int64).numpy()
+        return content_key(
+            settings.embedding_model,
+            getattr(embedder, "backend", type(embedder).__name__),
+            getattr(embedder, "precision", "fp32"),
+            np.ascontiguousarray(input_ids).tobytes(),
+        )
+
+    def get(self, key: str) -> Optional[torch.Tensor]:
+        data = self._store.read(key)
+        if data is None:
+            return None
+        return torch.from_numpy(np.load(io.BytesIO(data), allow_pickle=False))
+
+    def put(self, key: str, token_embeddings: torch.Tensor) -> None:
+        buffer = io.BytesIO()
+        array = token_embeddings.detach().float().cpu().numpy().astype(np.float16)
+        np.save(buffer, array, allow_pickle=False)
+        self._store.write(key, buffer.getvalue())
+
+    def stats(self) -> CacheStats:
+        return self._store.stats()
+
+
+def default_cache_dir() -> str:
+    return os.path.join(settings.data_dir, "embedding_cache")
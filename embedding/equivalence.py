@@ -0,0 +1,80 @@
+"""Equivalence gate for alternative embedding backends and precisions.
+
+A candidate embedder (ONNX, int8, reduced precision, ...) is only used when
+its embeddings of a fixed corpus stay within a cosine-similarity threshold of
+the reference torch fp32 embedder (SPEC §4.3: same model, same vectors).
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EQUIVALENCE_CORPUS: List[str] = [
+    "Net income for the year was $7.1 billion, up 12% from the prior year.",
+    "The Common Equity Tier 1 (CET1) ratio was 13.3% as at October 31, 2024.",
+    "Items of note included an FDIC special assessment and acquisition-related costs.",
+    "Management's Discussion and Analysis should be read with the consolidated financial statements.",
+    "Note 21 Contingent liabilities: significant legal proceedings are described below.",
+    "| Segment | Revenue | Net income |\n| --- | --- | --- |\n| Canadian Banking | 9,412 | 2,981 |",
+    "Allowance for credit losses increased due to unfavourable changes in the economic outlook.",
+    "All amounts are in millions of Canadian dollars unless otherwise stated.",
+    "The Bank's liquidity coverage ratio averaged 129% during the fourth quarter.",
+    "ANNUAL REPORT 2024",
+    "Basis of presentation: these statements are prepared in accordance with IFRS.",
+    "Forward-looking statements involve inherent risks and uncertainties.",
+]
+
+
+@dataclass(frozen=True)
+class EquivalenceReport:
+    candidate: str
+    min_cosine: float
+    mean_cosine: float
+    threshold: float
+    samples: int
+
+    @property
+    def passed(self) -> bool:
+        return self.min_cosine >= self.threshold
+
+
+def cosine_similarities(
+    reference: Sequence[Sequence[float]], candidate: Sequence[Sequence[float]]
+) -> np.ndarray:
+    ref = np.asarray(reference, dtype=np.float64)
+    cand = np.asarray(candidate, dtype=np.float64)
+    norms = np.linalg.norm(ref, axis=1) * np.linalg.norm(cand, axis=1)
+    return (ref * cand).sum(axis=1) / np.maximum(norms, 1e-12)
+
+
+def check_equivalence(
+    reference,
+    candidate,
+    threshold: float,
+    candidate_name: str,
+    corpus: Sequence[str] = EQUIVALENCE_CORPUS,
+) -> EquivalenceReport:
+    """Embed ``corpus`` with both embedders and compare per-text cosines."""
+    reference_vectors = [reference.embed_text(text) for text in corpus]
+    candidate_vectors = [candidate.embed_text(text) for text in corpus]
+    cosines = cosine_similarities(reference_vectors, candidate_vectors)
+    report = EquivalenceReport(
+        candidate=candidate_name,
+        min_cosine=float(cosines.min()),
+        mean_cosine=float(cosines.mean()),
+        threshold=threshold,
+        samples=len(corpus),
+    )
+    logger.info(
+        "Embedding equivalence %s: min_cosine=%.5f mean_cosine=%.5f threshold=%.4f passed=%s",
+        report.candidate,
+        report.min_cosine,
+        report.mean_cosine,
+        report.threshold,
+        report.passed,
+    )
+    return report
@@ -1,14 +1,88 @@
 from __future__ import annotations
 
+import logging
 import re
 import uuid
-from typing import List, Tuple
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from functools import cached_property
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
+import torch
 
 from core.config import settings
 from core.contracts import CanonicalPage, CanonicalSpan, ChunkRecord
-from embedding.model_registry import get_embedding_model
+from embedding import model_registry
+from embedding.modernbert import TokenizedChunk, TokenizedText
+from embedding.span_index import SpanIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _TextSource:
+    """Text that macro windows are cut from: one page or the whole document.
+
+    ``spans``, ``tokens`` and ``page_starts`` are expressed in the coordinates
+    of ``text``; ``page_starts`` holds the offset at which each joined page
+    begins. ``text`` is tokenized exactly once, into ``tokens``.
+    """
+
+    doc_id: str
+    text: str
+    tokens: TokenizedText
+    spans: List[CanonicalSpan]
+    page_starts: List[int]
+    span_index: SpanIndex
+
+    @cached_property
+    def token_starts(self) -> List[int]:
+        """Start char of every token, for bisecting table spans onto tokens."""
+        return [start for start, _ in self.tokens.offsets]
+
+    @cached_property
+    def token_ends(self) -> List[int]:
+        return [end for _, end in self.tokens.offsets]
+
+    def page_local_offset(self, offset: int) -> int:
+        index = max(bisect_right(self.page_starts, offset) - 1, 0)
+        return offset - self.page_starts[index]
+
+
+@dataclass(frozen=True)
+class _MacroWindow:
+    """One encoder input cut from a token stream, plus the core it owns.
+
+    ``char_*``/``token_*`` bound the model input (core plus overlap context);
+    ``core_*`` are the char offsets children are emitted for. Overlaps are
+    split at their middle token, so cores tile the text without repeats.
+    """
+
+    char_start: int
+    char_end: int
+    token_start: int
+    token_end: int
+    core_start: int
+    core_end: int
+
+
+@dataclass
+class _EncodeItem:
+    """One model input: a macro window or an atomic table span."""
+
+    source: _TextSource
+    kind: str
+    text: str
+    base_offset: int
+    tokenized: TokenizedChunk
+    segments: List[Tuple[int, int, List[int]]]
+    span: Optional[CanonicalSpan] = None
+    pooled: Optional[np.ndarray] = None
+
+    @property
+    def token_count(self) -> int:
+        return int(self.tokenized.input_ids.shape[-1])
 
 
 def late_chunk_embeddings(
@@ -17,144 +91,624 @@ def late_chunk_embeddings(
     macro_overlap_tokens: int = 256,
     child_target_tokens: int = 256,
     progress_cb=None,
+    batch_token_budget: Optional[int] = None,
+    document_windows: Optional[bool] = None,
+    embedding_cache=None,
 ) -> List[ChunkRecord]:
-    embedder = get_embedding_model(max_length=macro_max_tokens)
-    chunks: List[ChunkRecord] = []
-    macro_id = 0
-    total_macros = 0
-    macro_chunks_per_page: List[Tuple[CanonicalPage, List[Tuple[str, int]]]] = []
+    """Embed canonical pages with late chunking.
+
+    By default each page is its own token stream. With ``document_windows``
+    the pages are joined into one stream and macro windows run across page
+    boundaries; chunk offsets stay relative to the page the chunk starts on.
+    Model inputs found in ``embedding_cache`` (default: the registry cache,
+    when enabled) are pooled from cached token outputs instead of re-encoded.
+    """
+    embedder = model_registry.get_embedding_model(max_length=macro_max_tokens)
+    if document_windows is None:
+        document_windows = settings.embed_document_windows
+    plan = _plan_document_items if document_windows else _plan_page_items
+    items = plan(
+        pages, embedder, macro_max_tokens, macro_overlap_tokens, child_target_tokens
+    )
+    budget = batch_token_budget or settings.embed_batch_token_budget
+    if embedding_cache is None:
+        embedding_cache = model_registry.get_embedding_cache()
+    before = embedding_cache.stats() if embedding_cache is not None else None
+    worker_pool = model_registry.get_embedding_pool(max_length=macro_max_tokens)
+    _encode_and_pool(embedder, items, budget, progress_cb, embedding_cache, worker_pool)
+    _report_cache_stats(embedding_cache, before, progress_cb)
+    return _emit_chunks(items)
+
+
+def iter_late_chunk_embeddings(
+    pages: Iterable[CanonicalPage],
+    macro_max_tokens: int = 8192,
+    macro_overlap_tokens: int = 256,
+    child_target_tokens: int = 256,
+    progress_cb=None,
+    batch_token_budget: Optional[int] = None,
+    embedding_cache=None,
+    total_pages: Optional[int] = None,
+    macro_offset: int = 0,
+    reuse_embeddings=None,
+) -> Iterator[ChunkRecord]:
+    """Yield the chunks of late_chunk_embeddings a few pages at a time.
+
+    Pages are consumed lazily and encoded in groups of about one batch token
+    budget per embedding worker, so memory is bounded by the group rather
+    than the document. ``macro_offset`` is the first macro_id, for resuming
+    after the pages whose chunks are already stored. A page for which
+    ``reuse_embeddings(page_number, planned_chunks)`` returns vectors is not
+    encoded. Document windows need every page up front and are not streamed.
+    """
+    embedder = model_registry.get_embedding_model(max_length=macro_max_tokens)
+    budget = batch_token_budget or settings.embed_batch_token_budget
+    if embedding_cache is None:
+        embedding_cache = model_registry.get_embedding_cache()
+    before = embedding_cache.stats() if embedding_cache is not None else None
+    worker_pool = model_registry.get_embedding_pool(max_length=macro_max_tokens)
+    page_items = _iter_page_items(
+        pages, embedder, macro_max_tokens, macro_overlap_tokens, child_target_tokens,
+        reuse_embeddings,
+    )
+    group_budget = budget * (worker_pool.workers if worker_pool is not None else 1)
+    pages_done = 0
+    for page_count, items in _group_page_items(page_items, group_budget):
+        _encode_and_pool(
+            embedder, items, budget, embedding_cache=embedding_cache, worker_pool=worker_pool
+        )
+        yield from _emit_chunks(items, macro_offset)
+        macro_offset += len(items)
+        pages_done += page_count
+        if progress_cb:
+            progress_cb("embed", pages_done, total_pages or pages_done)
+    _report_cache_stats(embedding_cache, before, progress_cb)
+
+
+def _plan_page_items(
+    pages: List[CanonicalPage],
+    embedder,
+    macro_max_tokens: int,
+    macro_overlap_tokens: int,
+    child_target_tokens: int,
+) -> List[_EncodeItem]:
+    """Per page: its table spans, then its own macro windows."""
+    page_items = _iter_page_items(
+        pages, embedder, macro_max_tokens, macro_overlap_tokens, child_target_tokens
+    )
+    return [item for items in page_items for item in items]
+
+
+def _iter_page_items(
+    pages: Iterable[CanonicalPage],
+    embedder,
+    macro_max_tokens: int,
+    macro_overlap_tokens: int,
+    child_target_tokens: int,
+    reuse_embeddings=None,
+) -> Iterator[List[_EncodeItem]]:
+    """Yield the model inputs of each page in order (empty for blank pages).
 
+    Items of a page with reused embeddings come back already pooled.
+    """
     for page in pages:
         if not page.text:
-            macro_chunks_per_page.append((page, []))
+            yield []
             continue
-        macro_chunks = _build_macro_chunks(
-            page.text, embedder, macro_max_tokens, macro_overlap_tokens
+        source = _page_source(page, embedder.tokenize_text(page.text))
+        items = _table_items(source, embedder) + _macro_items(
+            source, embedder, macro_max_tokens, macro_overlap_tokens, child_target_tokens
         )
-        macro_chunks_per_page.append((page, macro_chunks))
-        total_macros += len(macro_chunks)
-
-    processed_macros = 0
-
-    for page, macro_chunks in macro_chunks_per_page:
-        for span in page.spans:
-            if not span.is_table:
-                continue
-            tokenized = embedder.tokenize(span.text)
-            token_embeddings = embedder.encode(tokenized)
-            pooled = token_embeddings.mean(dim=0).cpu().numpy().astype(np.float32)
-            chunks.append(
-                ChunkRecord(
-                    chunk_id=str(uuid.uuid4()),
-                    doc_id=page.doc_id,
-                    page_numbers=[span.page_number],
-                    macro_id=macro_id,
-                    child_id=0,
-                    chunk_type="table",
-                    text_content=span.text,
-                    char_start=span.char_start,
-                    char_end=span.char_end,
-                    polygons=span.polygons,
-                    source_type=span.source_type,
-                    embedding_model=settings.embedding_model,
-                    embedding_dim=settings.embedding_dim,
-                    embedding=pooled.tolist(),
-                    heading_path=span.heading_path,
-                    section_id=span.section_id,
-                )
+        if reuse_embeddings is not None:
+            _apply_reused(items, reuse_embeddings(page.page_number, _planned_chunks(items)))
+        yield items
+
+
+def _planned_chunks(items: List[_EncodeItem]) -> List[Tuple[int, int, str]]:
+    """(page-local char_start, char_end, text) of the chunks _emit_chunks will build."""
+    planned: List[Tuple[int, int, str]] = []
+    for item in items:
+        if item.kind == "table":
+            planned.append((item.span.char_start, item.span.char_end, item.span.text))
+            continue
+        for char_start, char_end, _ in item.segments:
+            local_start = item.source.page_local_offset(item.base_offset + char_start)
+            planned.append(
+                (local_start, local_start + char_end - char_start, item.text[char_start:char_end])
             )
-            macro_id += 1
-        if not macro_chunks:
+    return planned
+
+
+def _apply_reused(items: List[_EncodeItem], vectors: Optional[List[np.ndarray]]) -> None:
+    if not vectors:
+        return
+    dim = len(vectors[0])
+    position = 0
+    for item in items:
+        count = 1 if item.kind == "table" else len(item.segments)
+        rows = vectors[position : position + count]
+        item.pooled = np.asarray(rows, dtype=np.float32).reshape(count, dim)
+        position += count
+
+
+def _group_page_items(
+    page_items: Iterable[List[_EncodeItem]], batch_token_budget: int
+) -> Iterator[Tuple[int, List[_EncodeItem]]]:
+    """Join whole pages until a group holds at least one batch budget of tokens.
+
+    Yields ``(page_count, items)``; items keep their document order.
+    """
+    group: List[_EncodeItem] = []
+    page_count = 0
+    tokens = 0
+    for items in page_items:
+        group.extend(items)
+        page_count += 1
+        tokens += sum(item.token_count for item in items)
+        if tokens >= batch_token_budget:
+            yield page_count, group
+            group, page_count, tokens = [], 0, 0
+    if page_count:
+        yield page_count, group
+
+
+def _plan_document_items(
+    pages: List[CanonicalPage],
+    embedder,
+    macro_max_tokens: int,
+    macro_overlap_tokens: int,
+    child_target_tokens: int,
+) -> List[_EncodeItem]:
+    """All table spans in page order, then windows over the joined document."""
+    items: List[_EncodeItem] = []
+    page_sources: List[_TextSource] = []
+    for page in pages:
+        if not page.text:
             continue
-        for macro_text, base_offset in macro_chunks:
-            if progress_cb:
-                progress_cb(
-                    "embed",
-                    processed_macros,
-                    total_macros,
-                )
-            tokenized = embedder.tokenize(macro_text)
-            token_embeddings = embedder.encode(tokenized)
-            child_spans = _build_child_spans(
-                tokenized.offsets,
+        source = _page_source(page, embedder.tokenize_text(page.text))
+        items.extend(_table_items(source, embedder))
+        page_sources.append(source)
+    if page_sources:
+        separator = embedder.tokenize_text("\n")
+        items.extend(
+            _macro_items(
+                _document_source(page_sources, separator),
+                embedder,
+                macro_max_tokens,
+                macro_overlap_tokens,
                 child_target_tokens,
             )
-            child_id = 0
-            for char_start, char_end, token_indices in child_spans:
-                if char_end <= char_start:
-                    continue
-                span_text = macro_text[char_start:char_end]
-                if not span_text.strip():
-                    continue
-                span_embeddings = token_embeddings[token_indices]
-                pooled = span_embeddings.mean(dim=0).cpu().numpy().astype(np.float32)
-                global_start = base_offset + char_start
-                global_end = base_offset + char_end
-                polygons, page_numbers, source_type, heading_path, section_id = _collect_span_lineage(
-                    page.spans, global_start, global_end
-                )
-                chunks.append(
-                    ChunkRecord(
-                        chunk_id=str(uuid.uuid4()),
-                        doc_id=page.doc_id,
-                        page_numbers=page_numbers,
-                        macro_id=macro_id,
-                        child_id=child_id,
-                        chunk_type=_classify_chunk_type(span_text),
-                        text_content=span_text,
-                        char_start=global_start,
-                        char_end=global_end,
-                        polygons=polygons,
-                        source_type=source_type,
-                        embedding_model=settings.embedding_model,
-                        embedding_dim=settings.embedding_dim,
-                        embedding=pooled.tolist(),
-                        heading_path=heading_path,
-                        section_id=section_id,
-                    )
-                )
-                child_id += 1
-            macro_id += 1
-            processed_macros += 1
-            if progress_cb:
-                progress_cb(
-                    "embed",
-                    processed_macros,
-                    total_macros,
-                )
+        )
+    return items
+
+
+def _page_source(page: CanonicalPage, tokens: TokenizedText) -> _TextSource:
+    return _TextSource(
+        doc_id=page.doc_id,
+        text=page.text,
+        tokens=tokens,
+        spans=page.spans,
+        page_starts=[0],
+        span_index=SpanIndex(page.spans),
+    )
+
+
+def _document_source(
+    page_sources: List[_TextSource], separator: TokenizedText
+) -> _TextSource:
+    """Join page sources with newlines into one document-level source.
+
+    Page token streams are concatenated (with the newline's tokens between
+    pages) and shifted into document offsets instead of re-tokenizing.
+    """
+    spans: List[CanonicalSpan] = []
+    page_starts: List[int] = []
+    id_parts: List[torch.Tensor] = []
+    offsets: List[Tuple[int, int]] = []
+    cursor = 0
+    for index, source in enumerate(page_sources):
+        if index:
+            id_parts.append(separator.input_ids)
+            offsets.extend(_shift_offsets(separator.offsets, cursor - 1))
+        page_starts.append(cursor)
+        spans.extend(_shift_span(span, cursor) for span in source.spans)
+        id_parts.append(source.tokens.input_ids)
+        offsets.extend(_shift_offsets(source.tokens.offsets, cursor))
+        cursor += len(source.text) + 1
+    return _TextSource(
+        doc_id=page_sources[0].doc_id,
+        text="\n".join(source.text for source in page_sources),
+        tokens=TokenizedText(input_ids=torch.cat(id_parts), offsets=offsets),
+        spans=spans,
+        page_starts=page_starts,
+        span_index=SpanIndex(spans),
+    )
+
+
+def _shift_span(span: CanonicalSpan, shift: int) -> CanonicalSpan:
+    return replace(
+        span, char_start=span.char_start + shift, char_end=span.char_end + shift
+    )
+
 
+def _shift_offsets(
+    offsets: List[Tuple[int, int]], shift: int
+) -> List[Tuple[int, int]]:
+    return [(start + shift, end + shift) for start, end in offsets]
+
+
+def _macro_items(
+    source: _TextSource,
+    embedder,
+    macro_max_tokens: int,
+    macro_overlap_tokens: int,
+    child_target_tokens: int,
+) -> List[_EncodeItem]:
+    items: List[_EncodeItem] = []
+    windows = _build_macro_chunks(
+        source.tokens,
+        len(source.text),
+        _window_capacity(embedder, macro_max_tokens),
+        macro_overlap_tokens,
+    )
+    for window in windows:
+        macro_text = source.text[window.char_start:window.char_end]
+        tokenized = embedder.chunk_from_ids(
+            source.tokens.input_ids[window.token_start:window.token_end],
+            _shift_offsets(
+                source.tokens.offsets[window.token_start:window.token_end],
+                -window.char_start,
+            ),
+        )
+        core = (window.core_start - window.char_start, window.core_end - window.char_start)
+        segments = _non_empty_child_spans(
+            macro_text, _build_child_spans(tokenized.offsets, child_target_tokens, core)
+        )
+        items.append(
+            _EncodeItem(
+                source=source,
+                kind="macro",
+                text=macro_text,
+                base_offset=window.char_start,
+                tokenized=tokenized,
+                segments=segments,
+            )
+        )
+    return items
+
+
+def _window_capacity(embedder, macro_max_tokens: int) -> int:
+    """Content tokens per window, leaving room for [CLS]/[SEP] within max_length."""
+    max_length = getattr(embedder, "max_length", None)
+    if max_length is None:
+        return macro_max_tokens
+    return max(min(macro_max_tokens, max_length - 2), 1)
+
+
+def _table_items(source: _TextSource, embedder) -> List[_EncodeItem]:
+    items: List[_EncodeItem] = []
+    for span in source.spans:
+        if not span.is_table:
+            continue
+        tokenized = _table_tokens(span, source, embedder)
+        all_tokens = list(range(len(tokenized.offsets)))
+        items.append(
+            _EncodeItem(
+                source=source,
+                kind="table",
+                text=span.text,
+                base_offset=span.char_start,
+                tokenized=tokenized,
+                segments=[(0, len(span.text), all_tokens)],
+                span=span,
+            )
+        )
+    return items
+
+
+def _table_tokens(
+    span: CanonicalSpan, source: _TextSource, embedder
+) -> TokenizedChunk:
+    """Slice a table span out of the page tokens when token boundaries align.
+
+    Falls back to tokenizing the span text when the page tokenization merges
+    a token across the span boundary.
+    """
+    token_range = _aligned_token_range(source, span.char_start, span.char_end)
+    if token_range is None:
+        return embedder.tokenize(span.text)
+    token_start, token_end = token_range
+    return embedder.chunk_from_ids(
+        source.tokens.input_ids[token_start:token_end],
+        _shift_offsets(source.tokens.offsets[token_start:token_end], -span.char_start),
+    )
+
+
+def _aligned_token_range(
+    source: _TextSource, char_start: int, char_end: int
+) -> Optional[Tuple[int, int]]:
+    offsets = source.tokens.offsets
+    if not offsets:
+        return None
+    token_start = bisect_left(source.token_starts, char_start)
+    token_end = bisect_left(source.token_ends, char_end) + 1
+    if token_start >= len(offsets) or token_end > len(offsets):
+        return None
+    if offsets[token_start][0] != char_start or offsets[token_end - 1][1] != char_end:
+        return None
+    return token_start, token_end
+
+
+def _non_empty_child_spans(
+    macro_text: str, child_spans: List[Tuple[int, int, List[int]]]
+) -> List[Tuple[int, int, List[int]]]:
+    return [
+        (char_start, char_end, token_indices)
+        for char_start, char_end, token_indices in child_spans
+        if char_end > char_start and macro_text[char_start:char_end].strip()
+    ]
+
+
+def _batch_by_token_budget(
+    items: List[_EncodeItem], batch_token_budget: int
+) -> List[List[_EncodeItem]]:
+    """Group items of equal token length into batches within the budget.
+
+    Batches are never padded, because padded rows do not reproduce a
+    batch-size-1 pass bit for bit; a batch costs its length times its size.
+    An item longer than the budget is encoded on its own.
+    """
+    ordered = sorted(items, key=lambda item: item.token_count, reverse=True)
+    batches: List[List[_EncodeItem]] = []
+    current: List[_EncodeItem] = []
+    for item in ordered:
+        if current and (
+            item.token_count != current[0].token_count
+            or item.token_count * (len(current) + 1) > batch_token_budget
+        ):
+            batches.append(current)
+            current = []
+        current.append(item)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _encode_and_pool(
+    embedder,
+    items: List[_EncodeItem],
+    batch_token_budget: int,
+    progress_cb=None,
+    embedding_cache=None,
+    worker_pool=None,
+) -> None:
+    """Run the model over equal-length batches and pool each item's segments.
+
+    Token embeddings are released as soon as a batch has been pooled, so peak
+    memory is bounded by the batch budget rather than the document size.
+    With ``worker_pool`` the batches are encoded in worker processes. Items
+    already pooled (reused embeddings) are skipped.
+    """
+    total_macros = sum(1 for item in items if item.kind == "macro")
+    unpooled = [item for item in items if item.pooled is None]
+    pending, keys = _pool_cached(embedder, unpooled, embedding_cache)
+    processed_macros = total_macros - sum(1 for item in pending if item.kind == "macro")
+    batches = _batch_by_token_budget(pending, batch_token_budget)
+    payloads = (
+        [(item.tokenized, item.segments, keys.get(id(item))) for item in batch]
+        for batch in batches
+    )
+    if worker_pool is not None:
+        results = worker_pool.map_batches(payloads)
+    else:
+        results = (encode_pooled_batch(embedder, p, embedding_cache) for p in payloads)
+    if progress_cb and batches:
+        progress_cb("embed", processed_macros, total_macros)
+    for batch, pooled in zip(batches, results):
+        for item, matrix in zip(batch, pooled):
+            item.pooled = matrix
+        processed_macros += sum(1 for item in batch if item.kind == "macro")
+        if progress_cb:
+            progress_cb("embed", processed_macros, total_macros)
+
+
+def encode_pooled_batch(embedder, payload, embedding_cache=None) -> List[np.ndarray]:
+    """Encode one batch and pool each input's segments.
+
+    ``payload`` is a list of ``(tokenized, segments, cache_key)``; this runs in
+    process or inside an embedding worker. Fresh token outputs are stored in
+    ``embedding_cache`` under their key.
+    """
+    outputs = embedder.encode_batch([tokenized for tokenized, _, _ in payload])
+    pooled: List[np.ndarray] = []
+    for (_, segments, key), embeddings in zip(payload, outputs):
+        pooled.append(_pool_segments(embeddings, segments))
+        if embedding_cache is not None and key is not None:
+            embedding_cache.put(key, embeddings)
+    return pooled
+
+
+def _pool_cached(
+    embedder, items: List[_EncodeItem], embedding_cache
+) -> Tuple[List[_EncodeItem], dict]:
+    """Pool items whose token outputs are cached; return the rest and their keys."""
+    if embedding_cache is None:
+        return items, {}
+    pending: List[_EncodeItem] = []
+    keys = {}
+    for item in items:
+        key = embedding_cache.key(embedder, item.tokenized)
+        cached = embedding_cache.get(key)
+        if cached is None:
+            pending.append(item)
+            keys[id(item)] = key
+        else:
+            item.pooled = _pool_segments(cached, item.segments)
+    return pending, keys
+
+
+def _report_cache_stats(embedding_cache, before, progress_cb=None) -> None:
+    if embedding_cache is None:
+        return
+    delta = embedding_cache.stats().since(before)
+    logger.info(
+        "Embedding cache: %d/%d model inputs cached (hit rate %.2f)",
+        delta.hits, delta.hits + delta.misses, delta.hit_rate,
+    )
+    if progress_cb:
+        progress_cb("embed_cache", delta.hits, delta.hits + delta.misses)
+
+
+def _pool_segments(
+    token_embeddings: torch.Tensor, segments: List[Tuple[int, int, List[int]]]
+) -> np.ndarray:
+    """Mean-pool every segment of one model input in a single scatter-add.
+
+    Returns a contiguous float32 ``[len(segments), dim]`` matrix; sums are
+    accumulated in float32 whatever the dtype of the token embeddings.
+    """
+    dim = int(token_embeddings.shape[-1])
+    token_index = [index for _, _, token_indices in segments for index in token_indices]
+    if not token_index:
+        return np.zeros((len(segments), dim), dtype=np.float32)
+    segment_ids = torch.tensor(
+        [segment for segment, (_, _, token_indices) in enumerate(segments) for _ in token_indices],
+        dtype=torch.long,
+    )
+    gathered = token_embeddings[torch.tensor(token_index, dtype=torch.long)].float()
+    sums = torch.zeros((len(segments), dim), dtype=torch.float32)
+    sums.index_add_(0, segment_ids, gathered.cpu())
+    counts = torch.bincount(segment_ids, minlength=len(segments)).clamp(min=1)
+    return np.ascontiguousarray((sums / counts.unsqueeze(-1)).numpy(), dtype=np.float32)
+
+
+def _emit_chunks(items: List[_EncodeItem], macro_offset: int = 0) -> List[ChunkRecord]:
+    chunks: List[ChunkRecord] = []
+    for macro_id, item in enumerate(items, start=macro_offset):
+        if item.kind == "table":
+            chunks.append(_table_chunk(item, macro_id))
+            continue
+        for child_id, ((char_start, char_end, _), pooled) in enumerate(
+            zip(item.segments, item.pooled)
+        ):
+            chunks.append(
+                _child_chunk(item, macro_id, child_id, char_start, char_end, pooled)
+            )
     return chunks
 
 
+def _table_chunk(item: _EncodeItem, macro_id: int) -> ChunkRecord:
+    span = item.span
+    return ChunkRecord(
+        chunk_id=str(uuid.uuid4()),
+        doc_id=item.source.doc_id,
+        page_numbers=[span.page_number],
+        macro_id=macro_id,
+        child_id=0,
+        chunk_type="table",
+        text_content=span.text,
+        char_start=span.char_start,
+        char_end=span.char_end,
+        polygons=span.polygons,
+        source_type=span.source_type,
+        embedding_model=settings.embedding_model,
+        embedding_dim=settings.embedding_dim,
+        embedding=item.pooled[0],
+        heading_path=span.heading_path,
+        section_id=span.section_id,
+    )
+
+
+def _child_chunk(
+    item: _EncodeItem,
+    macro_id: int,
+    child_id: int,
+    char_start: int,
+    char_end: int,
+    pooled: np.ndarray,
+) -> ChunkRecord:
+    span_text = item.text[char_start:char_end]
+    global_start = item.base_offset + char_start
+    global_end = item.base_offset + char_end
+    polygons, page_numbers, source_type, heading_path, section_id = (
+        item.source.span_index.lineage(global_start, global_end)
+    )
+    local_start = item.source.page_local_offset(global_start)
+    return ChunkRecord(
+        chunk_id=str(uuid.uuid4()),
+        doc_id=item.source.doc_id,
+        page_numbers=page_numbers,
+        macro_id=macro_id,
+        child_id=child_id,
+        chunk_type=_classify_chunk_type(span_text),
+        text_content=span_text,
+        char_start=local_start,
+        char_end=local_start + (global_end - global_start),
+        polygons=polygons,
+        source_type=source_type,
+        embedding_model=settings.embedding_model,
+        embedding_dim=settings.embedding_dim,
+        embedding=pooled,
+        heading_path=heading_path,
+        section_id=section_id,
+    )
+
+
 def _build_macro_chunks(
-    text: str,
-    embedder,  # ModernBERTEmbedder from model_registry
+    tokens: TokenizedText,
+    text_length: int,
     macro_max_tokens: int,
     macro_overlap_tokens: int,
-) -> List[Tuple[str, int]]:
-    offsets = embedder.tokenize_full(text)
+) -> List[_MacroWindow]:
+    """Cut overlapping macro windows from an already tokenized text.
+
+    Token ranges index ``tokens`` and char ranges the tokenized text. Each
+    overlap is split at its middle token between the two windows' cores.
+    """
+    offsets = tokens.offsets
     valid_indices = [i for i, (start, end) in enumerate(offsets) if end > start]
     total_tokens = len(valid_indices)
     if total_tokens <= macro_max_tokens:
-        return [(text, 0)]
+        return [_MacroWindow(0, text_length, 0, len(offsets), 0, text_length)]
 
-    chunks: List[Tuple[str, int]] = []
+    bounds: List[Tuple[int, int]] = []
     step = max(macro_max_tokens - macro_overlap_tokens, 1)
     for start in range(0, total_tokens, step):
         end = min(start + macro_max_tokens, total_tokens)
-        chunk_start = offsets[valid_indices[start]][0]
-        chunk_end = offsets[valid_indices[end - 1]][1]
-        chunks.append((text[chunk_start:chunk_end], chunk_start))
+        bounds.append((start, end))
         if end >= total_tokens:
             break
-    return chunks
+    core_edges = [0]
+    for (_, end), (next_start, _) in zip(bounds, bounds[1:]):
+        core_edges.append((next_start + end) // 2)
+    core_edges.append(total_tokens)
+
+    windows: List[_MacroWindow] = []
+    for index, (start, end) in enumerate(bounds):
+        first, last = valid_indices[start], valid_indices[end - 1]
+        core_first, core_last = core_edges[index], core_edges[index + 1]
+        core_start = offsets[valid_indices[core_first]][0] if core_first < core_last else 0
+        core_end = offsets[valid_indices[core_last - 1]][1] if core_first < core_last else 0
+        windows.append(
+            _MacroWindow(
+                offsets[first][0], offsets[last][1], first, last + 1, core_start, core_end
+            )
+        )
+    return windows
 
 
 def _build_child_spans(
-    offsets: List[Tuple[int, int]], child_target_tokens: int
+    offsets: List[Tuple[int, int]],
+    child_target_tokens: int,
+    core: Optional[Tuple[int, int]] = None,
 ) -> List[Tuple[int, int, List[int]]]:
+    """Group the tokens inside ``core`` (char range; default all) into children."""
     spans: List[Tuple[int, int, List[int]]] = []
-    valid_indices = [i for i, (start, end) in enumerate(offsets) if end > start]
+    valid_indices = [
+        i
+        for i, (start, end) in enumerate(offsets)
+        if end > start and (core is None or (start >= core[0] and end <= core[1]))
+    ]
     if not valid_indices:
         return spans
     stride = max(child_target_tokens, 1)
@@ -170,28 +724,6 @@ def _build_child_spans(
     return spans
 
 
-def _collect_span_lineage(
-    spans: List[CanonicalSpan], char_start: int, char_end: int
-) -> Tuple[List[dict], List[int], str, str, str]:
-    polygons: List[dict] = []
-    page_numbers: List[int] = []
-    source_type = "native"
-    heading_path = ""
-    section_id = ""
-    for span in spans:
-        overlap = not (span.char_end <= char_start or span.char_start >= char_end)
-        if not overlap:
-            continue
-        polygons.extend(span.polygons)
-        if span.page_number not in page_numbers:
-            page_numbers.append(span.page_number)
-        source_type = span.source_type
-        if not heading_path:
-            heading_path = span.heading_path
-            section_id = span.section_id
-    return polygons, sorted(page_numbers), source_type, heading_path, section_id
-
-
 def _classify_chunk_type(text: str) -> str:
     cleaned = text.strip()
     if not cleaned:
@@ -1,21 +1,149 @@
-"""Module-level singleton for embedding model to avoid per-query reloads (SPEC §13, WO-010)."""
+"""Module-level singleton for embedding model to avoid per-query reloads (SPEC §13, WO-010).
 
+The backend is chosen by ``settings.embedding_backend``: ``torch`` (default),
+``onnx`` or ``onnx-int8``. Non-torch backends must pass the equivalence gate
+against the torch reference before they are used; otherwise the torch
+embedder is kept. ``settings.embedding_precision`` (``fp32``, ``bf16`` or
+``fp16``) selects reduced-precision autocast for the torch backend and goes
+through the same gate.
+"""
+
+import logging
 from typing import Optional
 
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDING_PRECISIONS = ("fp32", "bf16", "fp16")
+
 _MODEL: Optional["ModernBERTEmbedder"] = None
+_QUERY_ENCODER: Optional["QueryEncoder"] = None
+_EMBEDDING_CACHE: Optional["EmbeddingCache"] = None
+_EMBEDDING_POOL: Optional["EmbeddingWorkerPool"] = None
 
 
 def get_embedding_model(max_length: int = 8192) -> "ModernBERTEmbedder":
     """Return the shared ModernBERT embedder instance. Loads once per process."""
     global _MODEL
     if _MODEL is None:
-        from embedding.modernbert import ModernBERTEmbedder
-
-        _MODEL = ModernBERTEmbedder(max_length=max_length)
+        _MODEL = _load_backend(
+            settings.embedding_backend, settings.embedding_precision, max_length
+        )
     return _MODEL
 
 
+def get_query_encoder() -> "QueryEncoder":
+    """Return the shared query encoder; the model loads on its first cache miss."""
+    global _QUERY_ENCODER
+    if _QUERY_ENCODER is None:
+        from embedding.query_encoder import QueryEncoder
+
+        _QUERY_ENCODER = QueryEncoder(
+            embedder_factory=get_embedding_model,
+            max_length=settings.query_max_tokens,
+            capacity=settings.query_cache_size,
+        )
+    return _QUERY_ENCODER
+
+
+def get_embedding_cache() -> Optional["EmbeddingCache"]:
+    """Return the shared on-disk embedding cache, or None when it is disabled."""
+    global _EMBEDDING_CACHE
+    if not settings.enable_embedding_cache:
+        return None
+    if _EMBEDDING_CACHE is None:
+        from embedding.embedding_cache import EmbeddingCache, default_cache_dir
+
+        _EMBEDDING_CACHE = EmbeddingCache(
+            default_cache_dir(), settings.embedding_cache_max_mb * 1024 * 1024
+        )
+    return _EMBEDDING_CACHE
+
+
+def get_embedding_pool(max_length: int = 8192) -> Optional["EmbeddingWorkerPool"]:
+    """Return the shared embedding worker pool, or None when EMBED_WORKERS is 0."""
+    global _EMBEDDING_POOL
+    if settings.embed_workers <= 0:
+        return None
+    if _EMBEDDING_POOL is None:
+        from embedding.worker_pool import EmbeddingWorkerPool
+
+        _EMBEDDING_POOL = EmbeddingWorkerPool(
+            workers=settings.embed_workers,
+            threads_per_worker=settings.embed_threads_per_worker,
+            max_length=max_length,
+        )
+    return _EMBEDDING_POOL
+
+
+def _load_backend(
+    backend: str, precision: str, max_length: int
+) -> "ModernBERTEmbedder":
+    if backend not in EMBEDDING_BACKENDS:
+        raise RuntimeError(
+            f"Unknown EMBEDDING_BACKEND={backend!r}; expected one of {EMBEDDING_BACKENDS}."
+        )
+    if precision not in EMBEDDING_PRECISIONS:
+        raise RuntimeError(
+            f"Unknown EMBEDDING_PRECISION={precision!r}; expected one of {EMBEDDING_PRECISIONS}."
+        )
+    reference = _load_torch_embedder(max_length)
+    if backend != "torch":
+        if precision != "fp32":
+            logger.warning("EMBEDDING_PRECISION=%s applies to the torch backend only.", precision)
+        candidate = _load_onnx_embedder(max_length, quantize=backend == "onnx-int8")
+        return _gate_candidate(reference, candidate, backend)
+    if precision == "fp32":
+        return reference
+    from embedding.modernbert import reduced_precision_supported
+
+    if not reduced_precision_supported(precision):
+        logger.warning("CPU lacks native %s kernels; using torch fp32.", precision)
+        return reference
+    return _gate_candidate(reference, reference.with_precision(precision), f"torch-{precision}")
+
+
+def _gate_candidate(reference, candidate, name: str) -> "ModernBERTEmbedder":
+    """Return ``candidate`` if it passes the equivalence gate, else ``reference``."""
+    from embedding.equivalence import check_equivalence
+
+    report = check_equivalence(
+        reference,
+        candidate,
+        threshold=settings.embedding_equivalence_min_cosine,
+        candidate_name=name,
+    )
+    if not report.passed:
+        logger.warning(
+            "Refusing embedding backend %s: min cosine %.5f < %.4f; using torch fp32.",
+            name,
+            report.min_cosine,
+            report.threshold,
+        )
+        return reference
+    return candidate
+
+
+def _load_torch_embedder(max_length: int) -> "ModernBERTEmbedder":
+    from embedding.modernbert import ModernBERTEmbedder
+
+    return ModernBERTEmbedder(max_length=max_length)
+
+
+def _load_onnx_embedder(max_length: int, quantize: bool) -> "ModernBERTEmbedder":
+    from embedding.onnx_backend import OnnxModernBERTEmbedder
+
+    return OnnxModernBERTEmbedder(max_length=max_length, quantize=quantize)
+
+
 def _reset_for_testing() -> None:
-    """Reset the singleton. For testing only."""
-    global _MODEL
+    """Reset the singletons. For testing only."""
+    global _MODEL, _QUERY_ENCODER, _EMBEDDING_CACHE, _EMBEDDING_POOL
     _MODEL = None
+    _QUERY_ENCODER = None
+    _EMBEDDING_CACHE = None
+    if _EMBEDDING_POOL is not None:
+        _EMBEDDING_POOL.shutdown()
+    _EMBEDDING_POOL = None
@@ -1,11 +1,15 @@
+import copy
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import torch
 from transformers import AutoModel, AutoTokenizer
 
 from core.config import settings
 
+# Forward-pass precision -> autocast dtype (None: plain fp32).
+PRECISION_DTYPES = {"fp32": None, "bf16": torch.bfloat16, "fp16": torch.float16}
+
 
 @dataclass
 class TokenizedChunk:
@@ -14,7 +18,25 @@ class TokenizedChunk:
     offsets: List[Tuple[int, int]]
 
 
+@dataclass
+class TokenizedText:
+    """Tokenizer output for a whole page or document, without special tokens.
+
+    Macro windows are sliced from ``input_ids``/``offsets`` directly so that no
+    text goes through the tokenizer twice.
+    """
+
+    input_ids: torch.Tensor
+    offsets: List[Tuple[int, int]]
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+
 class ModernBERTEmbedder:
+    backend = "torch"
+    precision = "fp32"
+
     def __init__(self, max_length: int = 8192) -> None:
         self.device = torch.device("cpu")
         self.max_length = max_length
@@ -45,29 +67,128 @@ class ModernBERTEmbedder:
             offsets=offsets,
         )
 
-    def tokenize_full(self, text: str) -> List[Tuple[int, int]]:
+    def tokenize_text(self, text: str) -> TokenizedText:
+        """Tokenize a full page or document once, untruncated."""
         encoded = self.tokenizer(
             text,
             return_offsets_mapping=True,
+            add_special_tokens=False,
             truncation=False,
         )
-        return [
-            (int(start), int(end))
-            for start, end in encoded["offset_mapping"]
-        ]
+        return TokenizedText(
+            input_ids=torch.tensor(encoded["input_ids"], dtype=torch.long),
+            offsets=[(int(start), int(end)) for start, end in encoded["offset_mapping"]],
+        )
+
+    def chunk_from_ids(
+        self, input_ids: torch.Tensor, offsets: Sequence[Tuple[int, int]]
+    ) -> TokenizedChunk:
+        """Wrap a pre-sliced id window with special tokens, as tokenize() would.
+
+        Offsets are taken as given (relative to the window text); the window is
+        truncated to max_length like a tokenize() call on the same text.
+        """
+        content = max(self.max_length - 2, 0)
+        ids = torch.cat(
+            [
+                torch.tensor([self.tokenizer.cls_token_id], dtype=torch.long),
+                input_ids[:content].to(torch.long),
+                torch.tensor([self.tokenizer.sep_token_id], dtype=torch.long),
+            ]
+        ).unsqueeze(0)
+        return TokenizedChunk(
+            input_ids=ids.to(self.device),
+            attention_mask=torch.ones_like(ids).to(self.device),
+            offsets=[(0, 0), *list(offsets)[:content], (0, 0)],
+        )
 
     def encode(self, tokenized: TokenizedChunk) -> torch.Tensor:
-        with torch.no_grad():
+        hidden = self._forward(tokenized.input_ids, tokenized.attention_mask)
+        return hidden.squeeze(0)
+
+    def encode_batch(self, batch: List[TokenizedChunk]) -> List[torch.Tensor]:
+        """Encode several chunks, stacking equal-length chunks into one forward pass.
+
+        Chunks are never padded: a padded row's outputs differ from encoding
+        the chunk alone in the last bits, and a chunk's embedding must not
+        depend on what it was batched with. Returns one [tokens, dim] tensor
+        per chunk, in order.
+        """
+        if len(batch) == 1:
+            return [self.encode(batch[0])]
+        rows_by_length: Dict[int, List[int]] = {}
+        for row, item in enumerate(batch):
+            rows_by_length.setdefault(int(item.input_ids.shape[-1]), []).append(row)
+        outputs: List[Optional[torch.Tensor]] = [None] * len(batch)
+        for rows in rows_by_length.values():
+            hidden = self._forward(
+                torch.cat([batch[row].input_ids for row in rows]),
+                torch.cat([batch[row].attention_mask for row in rows]),
+            )
+            for row, embeddings in zip(rows, hidden):
+                outputs[row] = embeddings
+        return outputs
+
+    def with_precision(self, precision: str) -> "ModernBERTEmbedder":
+        """Return a copy sharing the weights that runs the forward pass in ``precision``."""
+        if precision not in PRECISION_DTYPES:
+            raise ValueError(f"Unknown precision {precision!r}")
+        embedder = copy.copy(self)
+        embedder.precision = precision
+        return embedder
+
+    def _forward(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        """Return last_hidden_state [batch, tokens, dim] for a [batch, tokens] input.
+
+        In reduced precision the pass runs under CPU autocast and the hidden
+        state is returned in that dtype; pooling upcasts to float32.
+        """
+        dtype: Optional[torch.dtype] = PRECISION_DTYPES[self.precision]
+        with torch.no_grad(), torch.autocast(
+            "cpu", dtype=dtype or torch.bfloat16, enabled=dtype is not None
+        ):
             output = self.model(
-                input_ids=tokenized.input_ids,
-                attention_mask=tokenized.attention_mask,
+                input_ids=input_ids.to(self.device),
+                attention_mask=attention_mask.to(self.device),
             )
-        return output.last_hidden_state.squeeze(0)
+        hidden = output.last_hidden_state
+        return hidden if dtype is None else hidden.to(dtype)
 
     def embed_text(self, text: str) -> List[float]:
         tokenized = self.tokenize(text)
         embeddings = self.encode(tokenized)
-        mask = tokenized.attention_mask.squeeze(0).unsqueeze(-1)
-        masked = embeddings * mask
-        pooled = masked.sum(dim=0) / mask.sum()
-        return pooled.cpu().numpy().astype("float32").tolist()
+        return _mean_pool(embeddings, tokenized.attention_mask)
+
+    def embed_query(self, text: str, max_length: int) -> List[float]:
+        """Query profile: short truncation and no offset mapping."""
+        encoded = self.tokenizer(
+            text,
+            return_tensors="pt",
+            truncation=True,
+            max_length=min(max_length, self.max_length),
+        )
+        hidden = self._forward(encoded["input_ids"], encoded["attention_mask"])
+        return _mean_pool(hidden.squeeze(0), encoded["attention_mask"])
+
+
+def _mean_pool(embeddings: torch.Tensor, attention_mask: torch.Tensor) -> List[float]:
+    mask = attention_mask.squeeze(0).unsqueeze(-1).to(embeddings.device)
+    masked = embeddings.float() * mask
+    pooled = masked.sum(dim=0) / mask.sum()
+    return pooled.cpu().numpy().astype("float32").tolist()
+
+
+def reduced_precision_supported(precision: str) -> bool:
+    """Whether this CPU has native kernels for ``precision`` (AVX512-BF16/AMX, AVX512-FP16)."""
+    checks = {
+        "bf16": "_is_mkldnn_bf16_supported",
+        "fp16": "_is_mkldnn_fp16_supported",
+    }
+    if precision == "fp32":
+        return True
+    try:
+        return bool(getattr(torch.ops.mkldnn, checks[precision])())
+    except (AttributeError, KeyError, RuntimeError):
+        return False
@@ -0,0 +1,115 @@
+"""ONNX Runtime CPU backend for the ModernBERT embedder (optional dependency).
+
+The ONNX graph is exported once from the same nomic-ai/modernbert-embed-base
+weights and cached under ``settings.data_dir/onnx``; with ``quantize`` the
+exported graph is additionally converted with dynamic int8 weight
+quantization. Tokenization, windowing and pooling are inherited unchanged from
+ModernBERTEmbedder; only the forward pass runs in ONNX Runtime.
+"""
+
+import logging
+import os
+
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from core.config import settings
+from embedding.modernbert import ModernBERTEmbedder
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+
+
+class OnnxModernBERTEmbedder(ModernBERTEmbedder):
+    def __init__(self, max_length: int = 8192, quantize: bool = False) -> None:
+        ort = _import_onnxruntime()
+        self.device = torch.device("cpu")
+        self.max_length = max_length
+        self.backend = "onnx-int8" if quantize else "onnx"
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            settings.embedding_model, trust_remote_code=True
+        )
+        model_path = ensure_onnx_model(quantize=quantize)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def _forward(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        (hidden,) = self.session.run(
+            ["last_hidden_state"],
+            {
+                "input_ids": input_ids.cpu().numpy().astype("int64"),
+                "attention_mask": attention_mask.cpu().numpy().astype("int64"),
+            },
+        )
+        return torch.from_numpy(hidden)
+
+
+def onnx_model_path(quantize: bool = False) -> str:
+    model_dir = os.path.join(
+        settings.data_dir, "onnx", settings.embedding_model.replace("/", "__")
+    )
+    return os.path.join(model_dir, "model.int8.onnx" if quantize else "model.onnx")
+
+
+def ensure_onnx_model(quantize: bool = False) -> str:
+    """Export (and optionally quantize) the embedding model once; return its path."""
+    fp32_path = onnx_model_path(quantize=False)
+    if not os.path.exists(fp32_path):
+        export_onnx_model(fp32_path)
+    if not quantize:
+        return fp32_path
+    int8_path = onnx_model_path(quantize=True)
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("Quantizing %s to int8 at %s", fp32_path, int8_path)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def export_onnx_model(path: str, model=None) -> None:
+    """Trace the torch model to ONNX with dynamic batch and sequence axes."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if model is None:
+        model = AutoModel.from_pretrained(
+            settings.embedding_model,
+            trust_remote_code=True,
+            attn_implementation="eager",
+        )
+    model.eval()
+    logger.info("Exporting %s to ONNX at %s", settings.embedding_model, path)
+    dummy_ids = torch.ones((1, 16), dtype=torch.long)
+    dummy_mask = torch.ones((1, 16), dtype=torch.long)
+    dynamic_axes = {0: "batch", 1: "tokens"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy_ids, dummy_mask),
+            path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic_axes,
+                "attention_mask": dynamic_axes,
+                "last_hidden_state": dynamic_axes,
+            },
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as exc:
+        raise RuntimeError(
+            "EMBEDDING_BACKEND=onnx requires onnxruntime. "
+            "Install it with `pip install onnxruntime onnx`."
+        ) from exc
+    return onnxruntime
@@ -0,0 +1,99 @@
+"""Query embedding service: short-query encoding profile plus a bounded LRU.
+
+Retrieval embeds the same query several times per request (anchor search,
+section anchor, semantic fallback). Queries are whitespace-normalized, encoded
+with a short max_length and no offset mapping, and cached per
+(embedding model, normalized text).
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Tuple
+
+from core.config import settings
+
+
+@dataclass(frozen=True)
+class QueryCacheStats:
+    hits: int = 0
+    misses: int = 0
+    encode_seconds: float = 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        """Encoding time avoided by hits, at the average cost of a miss."""
+        if not self.misses:
+            return 0.0
+        return self.hits * self.encode_seconds / self.misses
+
+    def since(self, earlier: "QueryCacheStats") -> "QueryCacheStats":
+        return QueryCacheStats(
+            hits=self.hits - earlier.hits,
+            misses=self.misses - earlier.misses,
+            encode_seconds=self.encode_seconds - earlier.encode_seconds,
+        )
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "saved_seconds": self.saved_seconds}
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class QueryEncoder:
+    """Thread-safe LRU of query embeddings with process-wide hit/miss counters.
+
+    ``embedder_factory`` is called on the first miss, so constructing the
+    encoder (or reading its stats) never loads the model.
+    """
+
+    def __init__(
+        self,
+        embedder_factory: Callable[[], object],
+        max_length: int,
+        capacity: int,
+    ) -> None:
+        self._embedder_factory = embedder_factory
+        self._max_length = max_length
+        self._capacity = max(capacity, 0)
+        self._cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = QueryCacheStats()
+
+    def embed(self, query: str) -> List[float]:
+        key = (settings.embedding_model, normalize_query(query))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._record(hit=True)
+                return cached
+        started = time.perf_counter()
+        embedding = self._embedder_factory().embed_query(key[1], self._max_length)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._record(hit=False, seconds=elapsed)
+            if self._capacity:
+                self._cache[key] = embedding
+                self._cache.move_to_end(key)
+                while len(self._cache) > self._capacity:
+                    self._cache.popitem(last=False)
+        return embedding
+
+    def stats(self) -> QueryCacheStats:
+        with self._lock:
+            return self._stats
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _record(self, hit: bool, seconds: float = 0.0) -> None:
+        self._stats = QueryCacheStats(
+            hits=self._stats.hits + int(hit),
+            misses=self._stats.misses + int(not hit),
+            encode_seconds=self._stats.encode_seconds + seconds,
+        )
@@ -0,0 +1,53 @@
+"""Interval index over canonical spans for chunk lineage lookups."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List, Tuple
+
+from core.contracts import CanonicalSpan
+
+
+class SpanIndex:
+    """Spans sorted by char_start, queried by bisection.
+
+    ``_max_ends[i]`` is the largest char_end among the first ``i + 1`` spans,
+    which keeps it monotonic even if spans overlap. A query therefore costs
+    O(log n + k) for the k spans it returns when spans are disjoint, as
+    canonical page spans are.
+    """
+
+    def __init__(self, spans: List[CanonicalSpan]) -> None:
+        self._spans = sorted(spans, key=lambda span: span.char_start)
+        self._starts = [span.char_start for span in self._spans]
+        self._max_ends = list(accumulate((span.char_end for span in self._spans), max))
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def overlapping(self, char_start: int, char_end: int) -> List[CanonicalSpan]:
+        """Spans with ``span.char_start < char_end`` and ``span.char_end > char_start``."""
+        first = bisect_right(self._max_ends, char_start)
+        last = bisect_left(self._starts, char_end)
+        return [
+            span for span in self._spans[first:last] if span.char_end > char_start
+        ]
+
+    def lineage(
+        self, char_start: int, char_end: int
+    ) -> Tuple[List[dict], List[int], str, str, str]:
+        """Polygons, pages, source type and first heading of overlapping spans."""
+        polygons: List[dict] = []
+        page_numbers = set()
+        source_type = "native"
+        heading_path = ""
+        section_id = ""
+        for span in self.overlapping(char_start, char_end):
+            polygons.extend(span.polygons)
+            page_numbers.add(span.page_number)
+            source_type = span.source_type
+            if not heading_path:
+                heading_path = span.heading_path
+                section_id = span.section_id
+        return polygons, sorted(page_numbers), source_type, heading_path, section_id
@@ -0,0 +1,63 @@
+"""Multi-process embedding executor for ingest.
+
+Each worker process loads its own embedder (and embedding cache) through the
+model registry and pins ``torch.set_num_threads`` so that N workers share the
+cores instead of oversubscribing them. Workers receive token ids and segment
+token indices only and return pooled float32 matrices; batches come back in
+submission order, so chunk order is the same as in-process encoding.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from embedding.modernbert import TokenizedChunk
+
+# (model input, (char_start, char_end, token_indices) per segment, cache key or None)
+PoolPayload = List[
+    Tuple[TokenizedChunk, List[Tuple[int, int, List[int]]], Optional[str]]
+]
+
+_WORKER_MAX_LENGTH = 8192
+
+
+def default_threads_per_worker(workers: int) -> int:
+    return max((os.cpu_count() or 1) // max(workers, 1), 1)
+
+
+class EmbeddingWorkerPool:
+    def __init__(self, workers: int, threads_per_worker: int, max_length: int = 8192) -> None:
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker, max_length),
+        )
+
+    def map_batches(self, payloads: Iterable[PoolPayload]) -> Iterator[List[np.ndarray]]:
+        """Encode and pool payloads in parallel; yield results in input order."""
+        return self._executor.map(_encode_payload, payloads)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def _init_worker(threads: int, max_length: int) -> None:
+    global _WORKER_MAX_LENGTH
+    import torch
+
+    torch.set_num_threads(threads)
+    _WORKER_MAX_LENGTH = max_length
+
+
+def _encode_payload(payload: PoolPayload) -> List[np.ndarray]:
+    from embedding import model_registry
+    from embedding.late_chunking import encode_pooled_batch
+
+    embedder = model_registry.get_embedding_model(max_length=_WORKER_MAX_LENGTH)
+    return encode_pooled_batch(embedder, payload, model_registry.get_embedding_cache())
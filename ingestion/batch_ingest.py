@@ -0,0 +1,355 @@
+"""Batch ingestion of a directory or manifest of PDFs.
+
+Documents are deduplicated by sha256 before any work starts. Worker
+processes run the PyMuPDF-bound steps (triage, DI, canonicalization) for up
+to ``workers`` documents at a time; PyMuPDF is not thread-safe, so these
+cannot share a process. The parent loads the embedder once and embeds and
+persists each prepared document in submission order, so every document
+shares one model (and the embedding worker pool, if configured) while the
+workers prepare the next ones. ``workers=0`` runs everything in-process.
+
+Canonical pages are handed over through a spool file in the document's data
+directory (one gzipped JSON line per page, written as each page is built and
+read back lazily while embedding), so neither process holds a whole document.
+
+Manifests list one PDF per line, relative to the manifest; an optional
+tab-separated second column overrides the stored filename. Blank lines and
+lines starting with ``#`` are ignored.
+"""
+
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import chain
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.config import settings
+from core.contracts import CanonicalPage, CanonicalSpan, ChunkRecord
+from embedding import model_registry
+from ingestion.ingest_pipeline import ChunkJob, _compute_sha256, start_chunk_job
+
+logger = logging.getLogger(__name__)
+
+STATUS_INGESTED = "ingested"
+STATUS_ALREADY_CHUNKED = "already_chunked"
+STATUS_DUPLICATE = "duplicate"
+STATUS_FAILED = "failed"
+
+SPOOL_SUFFIX = ".jsonl.gz"
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    path: str
+    filename: str
+
+
+@dataclass
+class DocumentReport:
+    path: str
+    filename: str
+    status: str
+    sha256: Optional[str] = None
+    doc_id: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    error: Optional[str] = None
+    pages: int = 0
+    di_pages: int = 0
+    chunks: int = 0
+    prepare_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    persist_seconds: float = 0.0
+    # Work taken from an earlier version of the document (INCREMENTAL_REINGEST).
+    reused_triage_pages: int = 0
+    reused_di_pages: int = 0
+    reused_embedding_pages: int = 0
+
+    @property
+    def seconds(self) -> float:
+        return self.prepare_seconds + self.embed_seconds + self.persist_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = asdict(self)
+        report["pages_per_second"] = _rate(self.pages, self.seconds)
+        report["chunks_per_second"] = _rate(self.chunks, self.seconds)
+        return report
+
+
+@dataclass
+class BatchReport:
+    documents: List[DocumentReport] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    model_load_seconds: float = 0.0
+
+    def aggregate(self) -> Dict[str, Any]:
+        """Totals over ingested documents; rates use the batch wall time."""
+        ingested = [doc for doc in self.documents if doc.status == STATUS_INGESTED]
+        totals = {
+            name: sum(getattr(doc, name) for doc in ingested)
+            for name in (
+                "pages", "di_pages", "chunks",
+                "reused_triage_pages", "reused_di_pages", "reused_embedding_pages",
+            )
+        }
+        for name in ("prepare_seconds", "embed_seconds", "persist_seconds"):
+            totals[name] = round(sum(getattr(doc, name) for doc in ingested), 3)
+        counts = {
+            status: sum(doc.status == status for doc in self.documents)
+            for status in (STATUS_INGESTED, STATUS_ALREADY_CHUNKED, STATUS_DUPLICATE, STATUS_FAILED)
+        }
+        return dict(
+            documents=len(self.documents),
+            **counts,
+            **totals,
+            model_load_seconds=round(self.model_load_seconds, 3),
+            wall_seconds=round(self.wall_seconds, 3),
+            pages_per_second=_rate(totals["pages"], self.wall_seconds),
+            chunks_per_second=_rate(totals["chunks"], self.wall_seconds),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "documents": [doc.to_dict() for doc in self.documents],
+            "aggregate": self.aggregate(),
+        }
+
+
+@dataclass
+class _PreparedDocument:
+    doc_id: str
+    job: Optional[ChunkJob]
+    spool_path: Optional[str]
+    di_pages: int
+    prepare_seconds: float
+
+
+def discover_documents(source: str) -> List[BatchItem]:
+    """PDFs under a directory (recursive, sorted) or listed in a manifest file."""
+    if os.path.isdir(source):
+        paths = sorted(
+            os.path.join(root, name)
+            for root, _dirs, names in os.walk(source)
+            for name in names
+            if name.lower().endswith(".pdf")
+        )
+        return [BatchItem(path, os.path.basename(path)) for path in paths]
+    return _read_manifest(source)
+
+
+def _read_manifest(manifest_path: str) -> List[BatchItem]:
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    items = []
+    with open(manifest_path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path, _, filename = (part.strip() for part in line.partition("\t"))
+            path = os.path.join(base_dir, path)
+            items.append(BatchItem(path, filename or os.path.basename(path)))
+    return items
+
+
+def dedupe_documents(
+    items: Iterable[BatchItem],
+) -> Tuple[List[Tuple[BatchItem, str]], List[DocumentReport]]:
+    """Split items into unique (item, sha256) pairs and reports for the rest.
+
+    Repeats of a file already listed are ``duplicate``; unreadable files are
+    ``failed``. Nothing is registered or triaged here.
+    """
+    unique: List[Tuple[BatchItem, str]] = []
+    skipped: List[DocumentReport] = []
+    first_path: Dict[str, str] = {}
+    for item in items:
+        try:
+            sha256 = _compute_sha256(item.path)
+        except OSError as exc:
+            skipped.append(_failed(item, None, exc))
+            continue
+        if sha256 in first_path:
+            skipped.append(
+                DocumentReport(
+                    item.path, item.filename, STATUS_DUPLICATE, sha256,
+                    duplicate_of=first_path[sha256],
+                )
+            )
+            continue
+        first_path[sha256] = item.path
+        unique.append((item, sha256))
+    return unique, skipped
+
+
+def ingest_batch(
+    items: Iterable[BatchItem],
+    workers: Optional[int] = None,
+    chunk_options: Optional[Dict[str, int]] = None,
+    force_reprocess: bool = False,
+    on_document: Optional[Callable[[DocumentReport], None]] = None,
+) -> BatchReport:
+    """Ingest and chunk every unique document; failures do not stop the batch."""
+    started = time.perf_counter()
+    chunk_options = dict(_default_chunk_options(), **(chunk_options or {}))
+    unique, skipped = dedupe_documents(items)
+    report = BatchReport()
+    if unique:
+        load_started = time.perf_counter()
+        model_registry.get_embedding_model(max_length=chunk_options["macro_max_tokens"])
+        report.model_load_seconds = time.perf_counter() - load_started
+    workers = settings.batch_ingest_workers if workers is None else workers
+    ingested = _ingest_unique(unique, workers, chunk_options, force_reprocess)
+    for document in chain(skipped, ingested):
+        report.documents.append(document)
+        if on_document:
+            on_document(document)
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def _ingest_unique(
+    unique: List[Tuple[BatchItem, str]],
+    workers: int,
+    chunk_options: Dict[str, int],
+    force_reprocess: bool,
+) -> Iterator[DocumentReport]:
+    """Prepare up to ``workers`` documents ahead of the one being embedded."""
+    if workers <= 0:
+        for item, sha256 in unique:
+            yield _complete(
+                item, sha256, lambda: _prepare_document(item, chunk_options, force_reprocess)
+            )
+        return
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending: Deque[Tuple[BatchItem, str, Future]] = deque()
+        for item, sha256 in unique:
+            pending.append(
+                (item, sha256, pool.submit(_prepare_document, item, chunk_options, force_reprocess))
+            )
+            if len(pending) > workers:
+                item, sha256, future = pending.popleft()
+                yield _complete(item, sha256, future.result)
+        while pending:
+            item, sha256, future = pending.popleft()
+            yield _complete(item, sha256, future.result)
+
+
+def _prepare_document(
+    item: BatchItem, chunk_options: Dict[str, int], force_reprocess: bool
+) -> _PreparedDocument:
+    """Worker side: register, triage/DI and canonicalize (all PyMuPDF work)."""
+    started = time.perf_counter()
+    doc_id, job = start_chunk_job(item.path, item.filename, None, chunk_options, force_reprocess)
+    if job is None:
+        return _PreparedDocument(doc_id, None, None, 0, time.perf_counter() - started)
+    pages = list(job.ready_pages())
+    spool_path = _spool_pages(doc_id, job.canonicalize(pages))
+    di_pages = sum(page.di_json_path is not None for page in pages)
+    return _PreparedDocument(doc_id, job, spool_path, di_pages, time.perf_counter() - started)
+
+
+def _spool_pages(doc_id: str, pages: Iterable[CanonicalPage]) -> str:
+    """Write each page as one JSON line as soon as it is built; return the spool path."""
+    output_dir = os.path.join(settings.data_dir, doc_id)
+    os.makedirs(output_dir, exist_ok=True)
+    handle, path = tempfile.mkstemp(dir=output_dir, prefix="canonical_", suffix=SPOOL_SUFFIX)
+    try:
+        with os.fdopen(handle, "wb") as raw, gzip.open(
+            raw, "wt", encoding="utf-8", compresslevel=1
+        ) as spool:
+            for page in pages:
+                spool.write(json.dumps(asdict(page), ensure_ascii=False) + "\n")
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _iter_spooled_pages(path: str) -> Iterator[CanonicalPage]:
+    with gzip.open(path, "rt", encoding="utf-8") as spool:
+        for line in spool:
+            page = json.loads(line)
+            spans = [CanonicalSpan(**span) for span in page.pop("spans")]
+            yield CanonicalPage(spans=spans, **page)
+
+
+def _complete(
+    item: BatchItem, sha256: str, prepared: Callable[[], _PreparedDocument]
+) -> DocumentReport:
+    """Parent side: embed and persist a prepared document with the shared model."""
+    document = None
+    try:
+        document = prepared()
+        report = DocumentReport(
+            item.path, item.filename, STATUS_ALREADY_CHUNKED, sha256,
+            doc_id=document.doc_id, prepare_seconds=document.prepare_seconds,
+        )
+        if document.job is not None:
+            _embed_and_store(document, report)
+        return report
+    except Exception as exc:  # reported per document; the batch continues
+        logger.exception("Batch ingest failed for %s", item.path)
+        return _failed(item, sha256, exc)
+    finally:
+        if document is not None and document.spool_path is not None:
+            os.remove(document.spool_path)
+
+
+def _embed_and_store(document: _PreparedDocument, report: DocumentReport) -> None:
+    job = document.job
+    started = time.perf_counter()
+    chunks = _TimedChunks(job.embed(_iter_spooled_pages(document.spool_path)))
+    job.store(chunks)
+    job.finish()
+    report.status = STATUS_INGESTED
+    report.pages = job.page_count
+    report.di_pages = document.di_pages
+    report.chunks = chunks.count
+    report.embed_seconds = chunks.seconds
+    report.persist_seconds = time.perf_counter() - started - chunks.seconds
+    if job.prior is not None:
+        report.reused_triage_pages = job.prior.stats.triage_pages
+        report.reused_di_pages = job.prior.stats.di_pages
+        report.reused_embedding_pages = job.prior.stats.embedded_pages
+
+
+class _TimedChunks:
+    """Counts chunks and the time spent producing them (i.e. embedding)."""
+
+    def __init__(self, chunks: Iterable[ChunkRecord]) -> None:
+        self._chunks = iter(chunks)
+        self.count = 0
+        self.seconds = 0.0
+
+    def __iter__(self) -> Iterator[ChunkRecord]:
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                return
+            finally:
+                self.seconds += time.perf_counter() - started
+            self.count += 1
+            yield chunk
+
+
+def _default_chunk_options() -> Dict[str, int]:
+    return dict(macro_max_tokens=8192, macro_overlap_tokens=256, child_target_tokens=256)
+
+
+def _failed(item: BatchItem, sha256: Optional[str], exc: Exception) -> DocumentReport:
+    return DocumentReport(
+        item.path, item.filename, STATUS_FAILED, sha256, error=f"{type(exc).__name__}: {exc}"
+    )
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 3) if seconds > 0 else 0.0
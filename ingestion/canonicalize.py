@@ -1,12 +1,25 @@
-import json
+import math
 import os
 import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from itertools import chain
+from multiprocessing import get_context
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import fitz
+import numpy as np
 
+from core.config import settings
 from core.contracts import CanonicalPage, CanonicalSpan, PageRecord
+from ingestion.di_store import load_di_page
+from ingestion.page_extraction import (
+    PageExtraction,
+    extract_page,
+    extraction_path,
+    load_extraction,
+)
 
 
 @dataclass(frozen=True)
@@ -16,48 +29,158 @@ class TableBlock:
     bbox: Tuple[float, float, float, float]
 
 
+# (text, polygon, heading level or None) of a non-empty line outside tables.
+LayoutLine = Tuple[str, List[Dict[str, float]], Optional[int]]
+
+
+@dataclass(frozen=True)
+class PageLayout:
+    """A page's lines and tables before heading paths are assigned."""
+
+    page_number: int
+    source_type: str
+    lines: List[LayoutLine]
+    tables: List[TableBlock]
+
+
+# Box of a DI line without a polygon; it never overlaps a table.
+_NO_BBOX = (math.nan,) * 4
+
+# Pages queued per layout worker ahead of the page being yielded.
+_LAYOUTS_PER_WORKER = 4
+
+
 def canonicalize_document(
     doc_id: str,
     pdf_path: str,
     pages: List[PageRecord],
     progress_cb=None,
 ) -> List[CanonicalPage]:
-    pdf = fitz.open(pdf_path)
-    try:
-        canonical_pages: List[CanonicalPage] = []
-        heading_stack: List[str] = []
-        root = _heading_root(pdf_path, doc_id)
+    return list(
+        iter_canonical_pages(
+            doc_id=doc_id, pdf_path=pdf_path, pages=pages, progress_cb=progress_cb
+        )
+    )
+
+
+def iter_canonical_pages(
+    doc_id: str,
+    pdf_path: str,
+    pages: Iterable[PageRecord],
+    progress_cb=None,
+    total_pages: Optional[int] = None,
+    heading_stack: Optional[List[str]] = None,
+) -> Iterator[CanonicalPage]:
+    """Yield canonical pages in ``pages`` order.
+
+    Native pages are built from the extraction artifact written during
+    triage; the PDF is opened only for pages without one. Each page's layout
+    (lines outside tables, their heading levels, tables) is independent of
+    the others and is built by ``iter_page_layouts``, in CANONICALIZE_WORKERS
+    processes when set; headings are then assigned in page order. ``pages``
+    may be a stream, in which case ``total_pages`` sizes the progress
+    reports. ``heading_stack`` seeds the stack when resuming mid-document and
+    is updated in place as pages are yielded.
+    """
+    if heading_stack is None:
+        heading_stack = []
+    root = _heading_root(pdf_path, doc_id)
+    if total_pages is None:
+        pages = list(pages)
         total_pages = len(pages)
-        for index, page_record in enumerate(pages, start=1):
+    layouts = iter_page_layouts(
+        pdf_path,
+        os.path.join(settings.data_dir, doc_id),
+        pages,
+        settings.canonicalize_workers,
+    )
+    try:
+        for index, layout in enumerate(layouts, start=1):
             if progress_cb:
                 progress_cb("canonicalize", index, total_pages)
-            page_index = page_record.page_number - 1
-            if page_record.di_json_path:
-                canonical_pages.append(
-                    _canonicalize_from_di(
-                        doc_id=doc_id,
-                        page_number=page_record.page_number,
-                        di_json_path=page_record.di_json_path,
-                        heading_stack=heading_stack,
-                        heading_root=root,
-                    )
-                )
-            else:
-                page = pdf.load_page(page_index)
-                canonical_pages.append(
-                    _canonicalize_from_native(
-                        doc_id=doc_id,
-                        page_number=page_record.page_number,
-                        page=page,
-                        heading_stack=heading_stack,
-                        heading_root=root,
-                    )
-                )
-        return canonical_pages
+            yield _build_canonical_page(doc_id, layout, heading_stack, root)
+    finally:
+        layouts.close()
+
+
+def iter_page_layouts(
+    pdf_path: str, artifact_dir: str, pages: Iterable[PageRecord], workers: int
+) -> Iterator[PageLayout]:
+    """Yield each page's layout in ``pages`` order.
+
+    With ``workers`` > 1, layouts are built in a spawn-based process pool
+    (PyMuPDF is not thread-safe) with up to ``_LAYOUTS_PER_WORKER`` pages
+    per worker in flight; ``pages`` is consumed lazily either way.
+    """
+    if workers <= 1:
+        yield from _serial_layouts(pdf_path, artifact_dir, pages)
+        return
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_layout_worker,
+        initargs=(pdf_path, artifact_dir),
+    )
+    pending: Deque[Future] = deque()
+    try:
+        for page_record in pages:
+            pending.append(executor.submit(_worker_layout, page_record))
+            if len(pending) >= workers * _LAYOUTS_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _serial_layouts(
+    pdf_path: str, artifact_dir: str, pages: Iterable[PageRecord]
+) -> Iterator[PageLayout]:
+    pdf = _LazyPdf(pdf_path)
+    try:
+        for page_record in pages:
+            yield page_layout(pdf, page_record, artifact_dir)
     finally:
         pdf.close()
 
 
+def _init_layout_worker(pdf_path: str, artifact_dir: str) -> None:
+    global _WORKER_PDF, _WORKER_ARTIFACT_DIR
+    _WORKER_PDF = _LazyPdf(pdf_path)
+    _WORKER_ARTIFACT_DIR = artifact_dir
+
+
+def _worker_layout(page_record: PageRecord) -> PageLayout:
+    return page_layout(_WORKER_PDF, page_record, _WORKER_ARTIFACT_DIR)
+
+
+def page_layout(pdf: "_LazyPdf", page_record: PageRecord, artifact_dir: str) -> PageLayout:
+    if page_record.di_json_path:
+        return _di_layout(page_record.page_number, page_record.di_json_path)
+    extraction = _native_extraction(pdf, page_record.page_number, artifact_dir)
+    return _native_layout(page_record.page_number, extraction)
+
+
+class _LazyPdf:
+    def __init__(self, pdf_path: str) -> None:
+        self._pdf_path = pdf_path
+        self._pdf: Optional[fitz.Document] = None
+
+    def load_page(self, page_index: int) -> fitz.Page:
+        if self._pdf is None:
+            self._pdf = fitz.open(self._pdf_path)
+        return self._pdf.load_page(page_index)
+
+    def close(self) -> None:
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+
+_WORKER_PDF: Optional[_LazyPdf] = None
+_WORKER_ARTIFACT_DIR: Optional[str] = None
+
+
 def _canonicalize_from_di(
     doc_id: str,
     page_number: int,
@@ -65,92 +188,126 @@ def _canonicalize_from_di(
     heading_stack: List[str],
     heading_root: str,
 ) -> CanonicalPage:
-    with open(di_json_path, "r", encoding="utf-8") as handle:
-        payload = json.load(handle)
+    return _build_canonical_page(
+        doc_id, _di_layout(page_number, di_json_path), heading_stack, heading_root
+    )
+
+
+def _di_layout(page_number: int, di_json_path: str) -> PageLayout:
+    payload = load_di_page(di_json_path)
     pages = payload.get("pages", [])
     page = next((p for p in pages if p.get("pageNumber") == page_number), None)
     if not page:
-        return CanonicalPage(doc_id=doc_id, page_number=page_number, text="", spans=[])
-    lines = page.get("lines", [])
+        return PageLayout(page_number=page_number, source_type="di", lines=[], tables=[])
     tables = _extract_tables_from_di(payload, page_number)
-    table_bboxes = [t.bbox for t in tables]
-    return _build_canonical_page(
-        doc_id=doc_id,
+    return PageLayout(
         page_number=page_number,
-        line_entries=[
-            (
-                line.get("content", ""),
-                _polygon_from_di(line.get("polygon", [])),
-            )
-            for line in lines
-            if not _polygon_overlaps_any(_polygon_from_di(line.get("polygon", [])), table_bboxes)
-        ],
         source_type="di",
-        heading_stack=heading_stack,
-        heading_root=heading_root,
-        table_blocks=tables,
+        lines=_layout_lines(_di_line_entries(page.get("lines", []), tables)),
+        tables=tables,
     )
 
 
-def _canonicalize_from_native(
-    doc_id: str,
-    page_number: int,
-    page: fitz.Page,
-    heading_stack: List[str],
-    heading_root: str,
-) -> CanonicalPage:
-    words = page.get_text("words")
-    if not words:
-        return CanonicalPage(doc_id=doc_id, page_number=page_number, text="", spans=[])
-
-    tables = _extract_tables_from_native(page, heading_root, heading_stack)
-    table_bboxes = [t.bbox for t in tables]
-    lines: Dict[Tuple[int, int], List[Tuple[float, float, float, float, str]]] = {}
-    for x0, y0, x1, y1, word, block_no, line_no, _ in words:
-        if _bbox_overlaps_any((x0, y0, x1, y1), table_bboxes):
-            continue
-        lines.setdefault((block_no, line_no), []).append((x0, y0, x1, y1, word))
-
-    line_entries: List[Tuple[str, List[Dict[str, Any]]]] = []
-    for (_, _), line_words in sorted(lines.items(), key=lambda item: item[0]):
-        line_words.sort(key=lambda entry: entry[0])
-        text = " ".join(word for _, _, _, _, word in line_words)
-        polygon = _polygon_from_bbox(
-            min(w[0] for w in line_words),
-            min(w[1] for w in line_words),
-            max(w[2] for w in line_words),
-            max(w[3] for w in line_words),
-        )
-        line_entries.append((text, polygon))
+def _di_line_entries(
+    lines: List[Dict[str, Any]], tables: List[TableBlock]
+) -> List[Tuple[str, List[Dict[str, float]]]]:
+    """DI lines (content, polygon) whose boxes do not touch a table."""
+    entries = [
+        (line.get("content", ""), _polygon_from_di(line.get("polygon", []))) for line in lines
+    ]
+    boxes = np.array(
+        [_bbox_from_polygon(polygon) or _NO_BBOX for _, polygon in entries], dtype=np.float64
+    ).reshape(-1, 4)
+    in_table = _overlaps_any(boxes, [t.bbox for t in tables])
+    return [entry for entry, skip in zip(entries, in_table) if not skip]
 
-    return _build_canonical_page(
-        doc_id=doc_id,
+
+def _native_extraction(pdf: _LazyPdf, page_number: int, artifact_dir: str) -> PageExtraction:
+    extraction = load_extraction(extraction_path(artifact_dir, page_number))
+    if extraction is None or (extraction.tables is None and extraction.words):
+        extraction = extract_page(pdf.load_page(page_number - 1), page_number)
+    return extraction
+
+
+def _native_layout(page_number: int, extraction: PageExtraction) -> PageLayout:
+    if not extraction.words:
+        return PageLayout(page_number=page_number, source_type="native", lines=[], tables=[])
+
+    tables = _extract_tables_from_native(extraction)
+    return PageLayout(
         page_number=page_number,
-        line_entries=line_entries,
         source_type="native",
-        heading_stack=heading_stack,
-        heading_root=heading_root,
-        table_blocks=tables,
+        lines=_layout_lines(_native_line_entries(extraction, tables)),
+        tables=tables,
     )
 
 
+def _native_line_entries(
+    extraction: PageExtraction, tables: List[TableBlock]
+) -> List[Tuple[str, List[Dict[str, float]]]]:
+    """Text and polygon of each line, built from its words outside every table."""
+    words = extraction.words
+    boxes = np.fromiter(
+        chain.from_iterable(word[:4] for word in words),
+        dtype=np.float64,
+        count=4 * len(words),
+    ).reshape(-1, 4)
+    kept = ~_overlaps_any(boxes, [t.bbox for t in tables])
+    order, edges, bounds = _line_boxes(extraction.lines, boxes, kept)
+    texts = [words[index][4] for index in order]
+    return [
+        (" ".join(texts[start:end]), _polygon_from_bbox(*bbox))
+        for start, end, bbox in zip(edges, edges[1:], bounds)
+    ]
+
+
+def _line_boxes(
+    lines: List[List[int]], boxes: np.ndarray, kept: np.ndarray
+) -> Tuple[List[int], List[int], List[List[float]]]:
+    """Words outside tables, grouped by line, with each line's bounding box.
+
+    Returns the kept word indices in line order, the offset at which each
+    line starts in them followed by their length, and one box per line.
+    """
+    flat = np.fromiter(chain.from_iterable(lines), dtype=np.intp)
+    line_ids = np.repeat(np.arange(len(lines)), [len(indices) for indices in lines])
+    mask = kept[flat]
+    flat, line_ids = flat[mask], line_ids[mask]
+    if not len(flat):
+        return [], [], []
+    starts = np.flatnonzero(np.r_[True, line_ids[1:] != line_ids[:-1]])
+    line_boxes = boxes[flat]
+    bounds = np.column_stack(
+        [
+            np.minimum.reduceat(line_boxes[:, 0], starts),
+            np.minimum.reduceat(line_boxes[:, 1], starts),
+            np.maximum.reduceat(line_boxes[:, 2], starts),
+            np.maximum.reduceat(line_boxes[:, 3], starts),
+        ]
+    )
+    return flat.tolist(), [*starts.tolist(), len(flat)], bounds.tolist()
+
+
+def _layout_lines(
+    line_entries: Iterable[Tuple[str, List[Dict[str, Any]]]]
+) -> List[LayoutLine]:
+    return [(text, polygon, _detect_heading_level(text)) for text, polygon in line_entries if text]
+
+
 def _build_canonical_page(
     doc_id: str,
-    page_number: int,
-    line_entries: List[Tuple[str, List[Dict[str, Any]]]],
-    source_type: str,
+    layout: PageLayout,
     heading_stack: List[str],
     heading_root: str,
-    table_blocks: List[TableBlock],
 ) -> CanonicalPage:
+    """Assign heading paths in order; the only step that depends on earlier pages."""
+    page_number = layout.page_number
+    source_type = layout.source_type
     spans: List[CanonicalSpan] = []
     text_parts: List[str] = []
     cursor = 0
 
-    for line_text, polygon in line_entries:
-        if not line_text:
-            continue
-        heading_level = _detect_heading_level(line_text)
+    for line_text, polygon, heading_level in layout.lines:
         if heading_level:
             heading_stack[:] = _update_heading_stack(
                 heading_stack, line_text, heading_level
@@ -174,7 +331,7 @@ def _build_canonical_page(
         )
         text_parts.append(line_text)
         cursor = end + 1
-    for table in table_blocks:
+    for table in layout.tables:
         heading_path = _build_heading_path(heading_root, heading_stack)
         section_id = heading_stack[-1] if heading_stack else heading_root
         table_text = _table_with_breadcrumb(table.markdown, heading_path)
@@ -295,27 +452,15 @@ def _table_matches_page(table: Dict[str, Any], page_number: int) -> bool:
     return False
 
 
-def _extract_tables_from_native(
-    page: fitz.Page,
-    heading_root: str,
-    heading_stack: List[str],
-) -> List[TableBlock]:
-    if not hasattr(page, "find_tables"):
-        return []
-    try:
-        tables = page.find_tables()
-    except Exception:
-        return []
-    blocks: List[TableBlock] = []
-    for table in tables.tables:
-        rows = table.extract()
-        if not rows:
-            continue
-        markdown = _rows_to_markdown(rows)
-        bbox = _table_bbox(table.bbox)
-        polygon = _polygon_from_bbox(*bbox)
-        blocks.append(TableBlock(markdown=markdown, polygon=polygon, bbox=bbox))
-    return blocks
+def _extract_tables_from_native(extraction: PageExtraction) -> List[TableBlock]:
+    return [
+        TableBlock(
+            markdown=_rows_to_markdown(table.rows),
+            polygon=_polygon_from_bbox(*table.bbox),
+            bbox=table.bbox,
+        )
+        for table in extraction.tables or []
+    ]
 
 
 def _rows_to_markdown(rows: List[List[str]]) -> str:
@@ -342,36 +487,20 @@ def _bbox_from_polygon(points: List[Dict[str, float]]) -> Optional[Tuple[float,
     return min(xs), min(ys), max(xs), max(ys)
 
 
-def _table_bbox(bbox) -> Tuple[float, float, float, float]:
-    if hasattr(bbox, "x0"):
-        return float(bbox.x0), float(bbox.y0), float(bbox.x1), float(bbox.y1)
-    return float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3])
-
-
-def _polygon_overlaps_any(
-    polygon: List[Dict[str, float]], bboxes: List[Tuple[float, float, float, float]]
-) -> bool:
-    bbox = _bbox_from_polygon(polygon)
-    if not bbox:
-        return False
-    return _bbox_overlaps_any(bbox, bboxes)
-
-
-def _bbox_overlaps_any(
-    bbox: Tuple[float, float, float, float], bboxes: List[Tuple[float, float, float, float]]
-) -> bool:
-    for candidate in bboxes:
-        if _bboxes_overlap(bbox, candidate):
-            return True
-    return False
-
-
-def _bboxes_overlap(
-    a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]
-) -> bool:
-    ax0, ay0, ax1, ay1 = a
-    bx0, by0, bx1, by1 = b
-    return ax0 <= bx1 and ax1 >= bx0 and ay0 <= by1 and ay1 >= by0
+def _overlaps_any(
+    boxes: np.ndarray, bboxes: List[Tuple[float, float, float, float]]
+) -> np.ndarray:
+    """Mask of ``boxes`` rows (x0, y0, x1, y1) touching any of ``bboxes``.
+
+    Edges count as overlapping; NaN rows (no geometry) never overlap.
+    """
+    if not bboxes or not len(boxes):
+        return np.zeros(len(boxes), dtype=bool)
+    tables = np.asarray(bboxes, dtype=np.float64)
+    x0, y0, x1, y1 = (boxes[:, [column]] for column in range(4))
+    return (
+        (x0 <= tables[:, 2]) & (x1 >= tables[:, 0]) & (y0 <= tables[:, 3]) & (y1 >= tables[:, 1])
+    ).any(axis=1)
 
 
 def _polygon_from_di(points: List[float]) -> List[Dict[str, float]]:
@@ -0,0 +1,136 @@
+"""Per-document, per-stage ingest checkpoints.
+
+Each stage records how many leading pages it has finished:
+
+- ``triage``: page rows committed for pages 1..N;
+- ``di``: DI payloads written (or not needed) for pages 1..N;
+- ``canonicalize``: pages 1..N canonicalized (state: heading stack);
+- ``persist``: every chunk of pages 1..N committed (state: heading stack
+  after page N, the first macro id of page N+1, the chunking options and
+  how the embeddings were produced).
+
+Canonical pages and embeddings are not stored, so chunking resumes at the
+persist checkpoint: canonicalization restarts after page N with the saved
+heading stack and macro ids continue from the saved one, which reproduces
+the uninterrupted run exactly. The persist checkpoint is written in the same
+transaction as the chunk batch it describes.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.config import settings
+from core.contracts import ChunkRecord, IngestCheckpoint
+
+STAGE_TRIAGE = "triage"
+STAGE_DI = "di"
+STAGE_CANONICALIZE = "canonicalize"
+STAGE_PERSIST = "persist"
+
+CANONICALIZE_CHECKPOINT_PAGES = 50
+
+
+@dataclass(frozen=True)
+class ResumePoint:
+    pages_done: int = 0
+    heading_stack: Tuple[str, ...] = ()
+    next_macro_id: int = 0
+
+
+def pages_done(checkpoints: Dict[str, IngestCheckpoint], stage: str) -> int:
+    checkpoint = checkpoints.get(stage)
+    return checkpoint.pages_done if checkpoint is not None else 0
+
+
+def resume_point(
+    checkpoints: Dict[str, IngestCheckpoint], chunk_options: Dict[str, Any]
+) -> ResumePoint:
+    """Where chunking restarts; from scratch if chunking options changed."""
+    checkpoint = checkpoints.get(STAGE_PERSIST)
+    if checkpoint is None or checkpoint.state.get("chunk_options") != chunk_options:
+        return ResumePoint()
+    return ResumePoint(
+        pages_done=checkpoint.pages_done,
+        heading_stack=tuple(checkpoint.state.get("heading_stack", [])),
+        next_macro_id=int(checkpoint.state.get("next_macro_id", 0)),
+    )
+
+
+def embedding_signature(per_page: bool) -> Dict[str, Any]:
+    """What stored chunk embeddings depend on besides the chunking options."""
+    return {
+        "model": settings.embedding_model,
+        "backend": settings.embedding_backend,
+        "precision": settings.embedding_precision,
+        "document_windows": not per_page,
+    }
+
+
+class ChunkCheckpointer:
+    """Turns canonicalized pages and committed chunk batches into checkpoints.
+
+    With ``per_page`` False (document windows, where macro windows cross
+    pages) only completion is recorded.
+    """
+
+    def __init__(
+        self,
+        doc_id: str,
+        page_count: int,
+        resume: ResumePoint,
+        chunk_options: Dict[str, Any],
+        per_page: bool = True,
+    ) -> None:
+        self._doc_id = doc_id
+        self._page_count = page_count
+        self._chunk_options = chunk_options
+        self._per_page = per_page
+        self._stacks: Dict[int, Tuple[str, ...]] = {resume.pages_done: resume.heading_stack}
+        self._first_macro: Dict[int, int] = {}
+        self._canonicalized = resume.pages_done
+        self._persisted = resume.pages_done
+
+    def canonicalized(
+        self, page_number: int, heading_stack: Iterable[str]
+    ) -> Optional[IngestCheckpoint]:
+        """Record the heading stack after ``page_number``; returns a checkpoint to save."""
+        self._stacks[page_number] = tuple(heading_stack)
+        due = page_number - self._canonicalized >= CANONICALIZE_CHECKPOINT_PAGES
+        if not due and page_number < self._page_count:
+            return None
+        self._canonicalized = page_number
+        return self._checkpoint(
+            STAGE_CANONICALIZE, page_number, heading_stack=list(self._stacks[page_number])
+        )
+
+    def committed(self, batch: Iterable[ChunkRecord]) -> Optional[IngestCheckpoint]:
+        """Checkpoint for the pages whose chunks are all in ``batch`` or earlier.
+
+        Chunks arrive in page order, so every page before the last chunk's
+        page is complete; that page may continue in the next batch.
+        """
+        last_page = None
+        for chunk in batch:
+            last_page = chunk.page_numbers[0]
+            self._first_macro.setdefault(last_page, chunk.macro_id)
+        if not self._per_page or last_page is None or last_page - 1 <= self._persisted:
+            return None
+        self._persisted = last_page - 1
+        heading_stack = self._stacks[self._persisted]
+        for page_number in [n for n in self._stacks if n < self._persisted]:
+            del self._stacks[page_number]
+        return self._checkpoint(
+            STAGE_PERSIST,
+            self._persisted,
+            heading_stack=list(heading_stack),
+            next_macro_id=self._first_macro[last_page],
+        )
+
+    def finished(self) -> IngestCheckpoint:
+        return self._checkpoint(STAGE_PERSIST, self._page_count)
+
+    def _checkpoint(self, stage: str, pages: int, **state: Any) -> IngestCheckpoint:
+        if stage == STAGE_PERSIST:
+            state["chunk_options"] = self._chunk_options
+            state["embedding"] = embedding_signature(self._per_page)
+        return IngestCheckpoint(doc_id=self._doc_id, stage=stage, pages_done=pages, state=state)
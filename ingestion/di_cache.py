@@ -0,0 +1,38 @@
+"""Content-addressed Azure DI result cache shared across documents.
+
+An entry holds the DI payload of one page as JSON, keyed by the DI model id
+and the bytes of the page extracted as a standalone PDF (written without a
+new file ID, so the same page yields the same bytes whichever document it
+came from). A hit is renumbered to the requesting document's page number.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+from core.config import settings
+from core.content_cache import CacheStats, ContentAddressedCache, content_key
+
+
+class DICache:
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self._store = ContentAddressedCache(root, max_bytes, suffix=".json")
+
+    def key(self, page_pdf_bytes: bytes, model_id: str) -> str:
+        return content_key("azure-di", model_id, page_pdf_bytes)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = self._store.read(key)
+        if data is None:
+            return None
+        return json.loads(data.decode("utf-8"))
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        self._store.write(key, json.dumps(payload, ensure_ascii=True).encode("utf-8"))
+
+    def stats(self) -> CacheStats:
+        return self._store.stats()
+
+
+def default_cache_dir() -> str:
+    return os.path.join(settings.data_dir, "di_cache")
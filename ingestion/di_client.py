@@ -6,6 +6,8 @@ from azure.core.credentials import AzureKeyCredential
 
 from core.contracts import DIResult
 
+DEFAULT_MODEL_ID = "prebuilt-layout"
+
 
 class DIClient:
     def __init__(self) -> None:
@@ -23,7 +25,7 @@ class DIClient:
     def analyze_page_bytes(
         self,
         pdf_bytes: bytes,
-        model_id: str = "prebuilt-layout",
+        model_id: str = DEFAULT_MODEL_ID,
         content_type: Optional[str] = "application/pdf",
     ) -> DIResult:
         poller = self._client.begin_analyze_document(
@@ -35,7 +37,7 @@ class DIClient:
         return DIResult(result=_to_dict(result))
 
     def analyze_page_image_bytes(
-        self, image_bytes: bytes, model_id: str = "prebuilt-layout"
+        self, image_bytes: bytes, model_id: str = DEFAULT_MODEL_ID
     ) -> DIResult:
         return self.analyze_page_bytes(
             pdf_bytes=image_bytes,
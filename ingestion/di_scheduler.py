@@ -0,0 +1,276 @@
+"""Concurrent Azure DI page analysis with a bounded number of in-flight requests.
+
+Contiguous submitted pages are coalesced into requests of up to
+``batch_pages`` pages. A thread pool uploads each request and polls its
+long-running operation; ``submit`` blocks while ``max_in_flight`` requests
+are pending. Each result is split back into per-page payloads numbered like
+the document (``di_split``) and written in compact form (``di_store``) as
+soon as the request completes; ``is_done``/``wait_for`` let a caller hand a
+page on without waiting for the rest of the document. Transient failures (throttling, 5xx, failed
+operations, connection errors) are retried with exponential backoff. A
+multi-page request rejected for size is re-sent page by page, and a single
+page rejected for size is re-sent as progressively smaller PNG renders;
+these re-sends are queued and started under the same ``max_in_flight``
+bound, so at most that many request payloads exist at once.
+PyMuPDF is not thread-safe, so request bytes and renders are produced on the
+submitting thread only; workers do nothing but HTTP and file writes. With a
+``DICache``, each page is looked up before it joins a request, and every
+analyzed page is stored in it.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import fitz
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+
+from core.contracts import DIResult
+from ingestion.di_cache import DICache
+from ingestion.di_client import DEFAULT_MODEL_ID, DIClient
+from ingestion.di_split import page_payload, split_di_result
+from ingestion.di_store import compact_di_payload, write_di_page
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FALLBACK_ZOOMS = (1.0, 0.7, 0.5, 0.3)
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_ERROR_CODES = {"InternalServerError", "ServiceUnavailable", "Timeout", "TooManyRequests"}
+
+
+@dataclass(frozen=True)
+class _PageJob:
+    page_indices: Tuple[int, ...]
+    output_paths: Tuple[str, ...]
+    cache_keys: Tuple[Optional[str], ...]
+    # -1 sends the pages as a PDF; otherwise an index into IMAGE_FALLBACK_ZOOMS
+    # (single-page jobs only).
+    fallback_step: int = -1
+
+
+class DIScheduler:
+    def __init__(
+        self,
+        pdf: fitz.Document,
+        max_in_flight: int,
+        batch_pages: int = 1,
+        max_retries: int = 3,
+        backoff_seconds: float = 2.0,
+        client_factory: Callable[[], DIClient] = DIClient,
+        cache: Optional[DICache] = None,
+        progress_cb=None,
+    ) -> None:
+        self._pdf = pdf
+        self._max_in_flight = max(1, max_in_flight)
+        self._batch_pages = max(1, batch_pages)
+        self._max_retries = max(0, max_retries)
+        self._backoff_seconds = backoff_seconds
+        self._client_factory = client_factory
+        self._client: Optional[DIClient] = None
+        self._cache = cache
+        self._cache_start = cache.stats() if cache is not None else None
+        self._progress_cb = progress_cb
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_in_flight, thread_name_prefix="di"
+        )
+        self._pending: Dict[Future, _PageJob] = {}
+        self._retries: Deque[_PageJob] = deque()
+        self._run: List[Tuple[int, str, Optional[str]]] = []
+        self._outstanding: Set[int] = set()
+        self.submitted = 0
+        self.completed = 0
+
+    def __enter__(self) -> "DIScheduler":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def submit(self, page_index: int, output_path: str) -> None:
+        """Queue one page; it joins the current run if it directly follows it."""
+        self.submitted += 1
+        cache_key = self._cache_key(page_index)
+        if cache_key is not None and self._write_cached(cache_key, page_index, output_path):
+            self._pages_done(1)
+            return
+        if self._run and (
+            page_index != self._run[-1][0] + 1 or len(self._run) >= self._batch_pages
+        ):
+            self._flush()
+        self._run.append((page_index, output_path, cache_key))
+        self._outstanding.add(page_index)
+
+    def is_done(self, page_index: int) -> bool:
+        """True once the page's payload is written (or it was never submitted)."""
+        return page_index not in self._outstanding
+
+    def poll(self) -> None:
+        """Collect finished requests without blocking."""
+        if self._pending:
+            self._collect(timeout=0)
+
+    def wait_for(self, page_index: int) -> None:
+        """Block until one page is written, starting its request if still queued."""
+        if any(index == page_index for index, _, _ in self._run):
+            self._flush()
+        while page_index in self._outstanding:
+            self._collect()
+
+    def wait(self) -> None:
+        """Block until every submitted page is written; re-raise the first failure."""
+        self._flush()
+        while self._pending:
+            self._collect()
+        self._report_cache_stats()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _flush(self) -> None:
+        """Start the current run as one request; blocks while max_in_flight are pending."""
+        if not self._run:
+            return
+        while len(self._pending) >= self._max_in_flight:
+            self._collect()
+        if self._client is None:
+            self._client = self._client_factory()
+        indices, paths, keys = zip(*self._run)
+        self._run = []
+        self._start(_PageJob(page_indices=indices, output_paths=paths, cache_keys=keys))
+
+    def _start(self, job: _PageJob) -> None:
+        if job.fallback_step < 0:
+            payload = _extract_page_range_pdf(
+                self._pdf, job.page_indices[0], job.page_indices[-1]
+            )
+            content_type = "application/pdf"
+        else:
+            zoom = IMAGE_FALLBACK_ZOOMS[job.fallback_step]
+            payload = _render_page_png(self._pdf.load_page(job.page_indices[0]), zoom)
+            content_type = "image/png"
+        future = self._executor.submit(self._analyze, payload, content_type, job)
+        self._pending[future] = job
+
+    def _collect(self, timeout: Optional[float] = None) -> None:
+        done, _ = wait(list(self._pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            job = self._pending.pop(future)
+            try:
+                future.result()
+            except HttpResponseError as exc:
+                if not _is_invalid_content_length(exc):
+                    raise
+                self._retry_smaller(job, exc)
+                continue
+            self._outstanding.difference_update(job.page_indices)
+            self._pages_done(len(job.page_indices))
+        self._start_retries()
+
+    def _pages_done(self, count: int) -> None:
+        self.completed += count
+        if self._progress_cb:
+            self._progress_cb("di_done", self.completed, self.submitted)
+
+    def _retry_smaller(self, job: _PageJob, exc: HttpResponseError) -> None:
+        """Queue the smaller re-sends; ``_start_retries`` renders them as slots free up."""
+        if len(job.page_indices) > 1:
+            for page_index, path, key in zip(job.page_indices, job.output_paths, job.cache_keys):
+                self._retries.append(
+                    _PageJob(page_indices=(page_index,), output_paths=(path,), cache_keys=(key,))
+                )
+            return
+        if job.fallback_step + 1 >= len(IMAGE_FALLBACK_ZOOMS):
+            raise RuntimeError("Azure DI rejected all fallback image sizes.") from exc
+        self._retries.append(replace(job, fallback_step=job.fallback_step + 1))
+
+    def _start_retries(self) -> None:
+        """Start queued re-sends ahead of new runs, up to max_in_flight pending requests.
+
+        Called after every collect, so a queued re-send waits only while all
+        slots are busy, and ``_pending`` is never empty while re-sends wait.
+        """
+        while self._retries and len(self._pending) < self._max_in_flight:
+            self._start(self._retries.popleft())
+
+    def _analyze(self, payload: bytes, content_type: str, job: _PageJob) -> None:
+        result = self._with_retries(
+            lambda: self._client.analyze_page_bytes(payload, content_type=content_type)
+        )
+        per_page = split_di_result(result.result, [index + 1 for index in job.page_indices])
+        for page_index, path, key in zip(job.page_indices, job.output_paths, job.cache_keys):
+            page_result = per_page[page_index + 1]
+            write_di_page(path, page_result)
+            if key is not None:
+                self._cache.put(
+                    key, compact_di_payload(page_payload(page_result, page_index + 1, 1))
+                )
+
+    def _cache_key(self, page_index: int) -> Optional[str]:
+        if self._cache is None:
+            return None
+        page_bytes = _extract_page_range_pdf(self._pdf, page_index, page_index)
+        return self._cache.key(page_bytes, DEFAULT_MODEL_ID)
+
+    def _write_cached(self, cache_key: str, page_index: int, output_path: str) -> bool:
+        """Cached payloads are stored as page 1; renumber to the document page."""
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            return False
+        write_di_page(output_path, page_payload(cached, 1, page_index + 1))
+        return True
+
+    def _report_cache_stats(self) -> None:
+        if self._cache is None:
+            return
+        stats = self._cache.stats().since(self._cache_start)
+        lookups = stats.hits + stats.misses
+        logger.info(
+            "DI cache: %d/%d pages cached (hit rate %.2f)", stats.hits, lookups, stats.hit_rate
+        )
+        if self._progress_cb:
+            self._progress_cb("di_cache", stats.hits, lookups)
+
+    def _with_retries(self, call: Callable[[], DIResult]) -> DIResult:
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except (HttpResponseError, ServiceRequestError, ServiceResponseError) as exc:
+                if attempt >= self._max_retries or not _is_transient(exc):
+                    raise
+                delay = self._backoff_seconds * (2**attempt) * (0.5 + random.random())
+                logger.warning("DI request failed (%s); retrying in %.1fs", exc, delay)
+                time.sleep(delay)
+                attempt += 1
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, (ServiceRequestError, ServiceResponseError)):
+        return True
+    if getattr(exc, "status_code", None) in TRANSIENT_STATUS_CODES:
+        return True
+    return getattr(getattr(exc, "error", None), "code", None) in TRANSIENT_ERROR_CODES
+
+
+def _is_invalid_content_length(exc: HttpResponseError) -> bool:
+    message = str(exc).lower()
+    return "invalidcontentlength" in message or "input image is too large" in message
+
+
+def _extract_page_range_pdf(pdf: fitz.Document, first_index: int, last_index: int) -> bytes:
+    new_pdf = fitz.open()
+    new_pdf.insert_pdf(pdf, from_page=first_index, to_page=last_index)
+    # no_new_id keeps the bytes (and so the DI cache key) deterministic.
+    page_bytes = new_pdf.tobytes(no_new_id=True)
+    new_pdf.close()
+    return page_bytes
+
+
+def _render_page_png(page: fitz.Page, zoom: float) -> bytes:
+    matrix = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csRGB)
+    return pix.tobytes("png")
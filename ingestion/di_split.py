@@ -0,0 +1,106 @@
+"""Split a multi-page Azure DI result into per-page payloads.
+
+DI numbers the pages of the submitted PDF from 1. Each per-page payload keeps
+the result's other top-level fields, the one page, and every item with a
+bounding region on that page (tables, paragraphs, figures, ...), with page
+numbers rewritten to the document's. Tables that continue across pages are
+cut by cell, as a single-page request would have returned them.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+DIPayload = Dict[str, Any]
+
+
+def split_di_result(result: DIPayload, page_numbers: Sequence[int]) -> Dict[int, DIPayload]:
+    """Map each document page number to its payload.
+
+    ``page_numbers[i]`` is the document page number of submitted page ``i + 1``.
+    """
+    return {
+        page_number: page_payload(result, local, page_number)
+        for local, page_number in enumerate(page_numbers, start=1)
+    }
+
+
+def page_payload(result: DIPayload, source_page: int, page_number: int) -> DIPayload:
+    """Payload of ``source_page`` in ``result``, renumbered to ``page_number``."""
+    payload = dict(result)
+    payload["pages"] = [
+        {**page, "pageNumber": page_number}
+        for page in result.get("pages", [])
+        if page.get("pageNumber") == source_page
+    ]
+    for key, value in result.items():
+        if key == "pages" or not _is_regioned_list(value):
+            continue
+        if key == "tables":
+            payload[key] = _split_tables(value, source_page, page_number)
+        else:
+            payload[key] = [
+                _on_page(item, source_page, page_number)
+                for item in value
+                if _has_region_on(item, source_page)
+            ]
+    return payload
+
+
+def _is_regioned_list(value: Any) -> bool:
+    return isinstance(value, list) and any(
+        isinstance(item, dict) and "boundingRegions" in item for item in value
+    )
+
+
+def _has_region_on(item: Dict[str, Any], local: int) -> bool:
+    return any(region.get("pageNumber") == local for region in item.get("boundingRegions") or [])
+
+
+def _on_page(item: Dict[str, Any], local: int, page_number: int) -> Dict[str, Any]:
+    regions = [
+        {**region, "pageNumber": page_number}
+        for region in item.get("boundingRegions") or []
+        if region.get("pageNumber") == local
+    ]
+    return {**item, "boundingRegions": regions}
+
+
+def _split_tables(
+    tables: List[Dict[str, Any]], local: int, page_number: int
+) -> List[Dict[str, Any]]:
+    """Keep each table's cells on ``local``, with rows re-based to start at 0."""
+    split: List[Dict[str, Any]] = []
+    for table in tables:
+        if not _has_region_on(table, local):
+            continue
+        cells = table.get("cells", [])
+        row_pages = _row_pages(cells)
+        first_page = (table.get("boundingRegions") or [{}])[0].get("pageNumber")
+        kept = [
+            cell
+            for cell in cells
+            if row_pages.get(cell.get("rowIndex", 0), first_page) == local
+        ]
+        if not kept:
+            continue
+        first_row = min(cell.get("rowIndex", 0) for cell in kept)
+        table_on_page = _on_page(table, local, page_number)
+        table_on_page["cells"] = [
+            {
+                **_on_page(cell, local, page_number),
+                "rowIndex": cell.get("rowIndex", 0) - first_row,
+            }
+            for cell in kept
+        ]
+        table_on_page["rowCount"] = max(cell["rowIndex"] for cell in table_on_page["cells"]) + 1
+        split.append(table_on_page)
+    return split
+
+
+def _row_pages(cells: List[Dict[str, Any]]) -> Dict[int, int]:
+    """Page of each row, taken from the first cell in it that has a region."""
+    pages: Dict[int, int] = {}
+    for cell in cells:
+        regions = cell.get("boundingRegions") or []
+        if regions:
+            pages.setdefault(cell.get("rowIndex", 0), regions[0].get("pageNumber"))
+    return pages
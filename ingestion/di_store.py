@@ -0,0 +1,210 @@
+"""Compact on-disk storage for per-page Azure DI payloads.
+
+``pages.di_json_path`` stays the logical ``page_NNNN_di.json`` path; this
+module resolves it to whichever physical form exists:
+
+- ``di_pages.<generation>.pack``: per-document pack of gzip members with a
+  JSON offset index (``di_pages.index.json``), so one page is read without
+  parsing the rest;
+- ``page_NNNN_di.json.gz``: one compact gzip member per page;
+- ``page_NNNN_di.json``: legacy full payload, compacted in memory on read.
+  Reads never modify it; ``convert_legacy_pages`` writes the ``.json.gz``
+  form alongside it as an explicit migration step.
+
+Compact payloads keep only what canonicalization reads: page lines
+(content, polygon) and tables (bounding regions, cell row/column/content).
+"""
+
+import functools
+import gzip
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+PACK_PREFIX = "di_pages"
+PACK_INDEX_NAME = "di_pages.index.json"
+COMPACT_SUFFIX = ".gz"
+
+
+def compact_di_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "pages": [
+            {
+                "pageNumber": page.get("pageNumber"),
+                "lines": [
+                    {"content": line.get("content", ""), "polygon": line.get("polygon", [])}
+                    for line in page.get("lines", [])
+                ],
+            }
+            for page in payload.get("pages", [])
+        ],
+        "tables": [
+            {
+                "boundingRegions": [
+                    {
+                        "pageNumber": region.get("pageNumber"),
+                        "polygon": region.get("polygon", []),
+                    }
+                    for region in table.get("boundingRegions") or []
+                ],
+                "cells": [
+                    {
+                        "rowIndex": cell.get("rowIndex", 0),
+                        "columnIndex": cell.get("columnIndex", 0),
+                        "content": cell.get("content", ""),
+                    }
+                    for cell in table.get("cells", [])
+                ],
+            }
+            for table in payload.get("tables", [])
+        ],
+    }
+
+
+def write_di_page(di_json_path: str, payload: Dict[str, Any]) -> None:
+    """Write the compact gzip form atomically (temp file + os.replace)."""
+    _write_atomic(di_json_path + COMPACT_SUFFIX, _encode(compact_di_payload(payload)))
+
+
+def has_di_page(di_json_path: str) -> bool:
+    if os.path.exists(di_json_path + COMPACT_SUFFIX) or os.path.exists(di_json_path):
+        return True
+    _, pages = _read_pack_index(os.path.dirname(di_json_path))
+    return os.path.basename(di_json_path) in pages
+
+
+def load_di_page(di_json_path: str) -> Dict[str, Any]:
+    """Loose per-page file first (it may be newer than the pack), then the pack."""
+    compact_path = di_json_path + COMPACT_SUFFIX
+    if os.path.exists(compact_path):
+        with open(compact_path, "rb") as handle:
+            return _decode(handle.read())
+    directory, name = os.path.split(di_json_path)
+    pack_name, pages = _read_pack_index(directory)
+    if name in pages:
+        offset, length = pages[name]
+        with open(os.path.join(directory, pack_name), "rb") as handle:
+            handle.seek(offset)
+            return _decode(handle.read(length))
+    with open(di_json_path, "r", encoding="utf-8") as handle:
+        return compact_di_payload(json.load(handle))
+
+
+def convert_legacy_pages(output_dir: str) -> int:
+    """Write the compact form of legacy ``page_NNNN_di.json`` files.
+
+    Pages already stored compact (loose or packed) are skipped. The legacy
+    files are kept, since they hold the full DI output; returns the number
+    of pages converted.
+    """
+    _, packed = _read_pack_index(output_dir)
+    converted = 0
+    for name in sorted(os.listdir(output_dir)):
+        path = os.path.join(output_dir, name)
+        if not name.endswith("_di.json") or name in packed:
+            continue
+        if os.path.exists(path + COMPACT_SUFFIX):
+            continue
+        with open(path, "r", encoding="utf-8") as handle:
+            write_di_page(path, json.load(handle))
+        converted += 1
+    return converted
+
+
+def pack_document(output_dir: str) -> int:
+    """Fold per-page ``.json.gz`` files into the document pack; returns pages packed.
+
+    A per-page file replaces the packed copy of the same page.
+    """
+    loose = sorted(
+        name for name in os.listdir(output_dir) if name.endswith("_di.json" + COMPACT_SUFFIX)
+    )
+    if not loose:
+        return 0
+    old_pack, members = _read_pack_members(output_dir)
+    for name in loose:
+        with open(os.path.join(output_dir, name), "rb") as handle:
+            members[name[: -len(COMPACT_SUFFIX)]] = handle.read()
+    _write_pack(output_dir, members, generation=_pack_generation(old_pack) + 1)
+    for name in loose:
+        os.remove(os.path.join(output_dir, name))
+    if old_pack:
+        os.remove(os.path.join(output_dir, old_pack))
+    return len(loose)
+
+
+def _read_pack_members(output_dir: str) -> Tuple[Optional[str], Dict[str, bytes]]:
+    pack_name, pages = _read_pack_index(output_dir)
+    if not pages:
+        return None, {}
+    with open(os.path.join(output_dir, pack_name), "rb") as handle:
+        data = handle.read()
+    return pack_name, {
+        name: data[offset : offset + length] for name, (offset, length) in pages.items()
+    }
+
+
+def _write_pack(output_dir: str, members: Dict[str, bytes], generation: int) -> None:
+    """Write a new pack generation, then swap the index to it.
+
+    The previous pack stays valid until the index points at the new one, so
+    an interrupted pack never loses pages.
+    """
+    pages: Dict[str, Tuple[int, int]] = {}
+    chunks: List[bytes] = []
+    offset = 0
+    for name in sorted(members):
+        pages[name] = (offset, len(members[name]))
+        chunks.append(members[name])
+        offset += len(members[name])
+    pack_name = f"{PACK_PREFIX}.{generation}.pack"
+    index = {"pack": pack_name, "pages": pages}
+    for name, data in (
+        (pack_name, b"".join(chunks)),
+        (PACK_INDEX_NAME, json.dumps(index).encode("utf-8")),
+    ):
+        _write_atomic(os.path.join(output_dir, name), data)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Unique temp file in the same directory, then os.replace."""
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(handle, "wb") as tmp:
+        tmp.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_pack_index(output_dir: str) -> Tuple[Optional[str], Dict[str, Tuple[int, int]]]:
+    index_path = os.path.join(output_dir, PACK_INDEX_NAME)
+    try:
+        stat = os.stat(index_path)
+    except OSError:
+        return None, {}
+    return _parse_pack_index(index_path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_pack_index(
+    index_path: str, _inode: int, _mtime_ns: int, _size: int
+) -> Tuple[Optional[str], Dict[str, Tuple[int, int]]]:
+    """Parsed once per index version (the stat fields are part of the cache key)."""
+    try:
+        with open(index_path, "r", encoding="utf-8") as handle:
+            index = json.load(handle)
+    except (OSError, ValueError):
+        return None, {}
+    return index["pack"], {name: tuple(entry) for name, entry in index["pages"].items()}
+
+
+def _pack_generation(pack_name: Optional[str]) -> int:
+    return int(pack_name.split(".")[1]) if pack_name else 0
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    return json.loads(gzip.decompress(data).decode("utf-8"))
@@ -1,25 +1,55 @@
 import hashlib
-import json
+import logging
 import os
 import uuid
-from typing import List, Optional, Set
+from collections import deque
+from dataclasses import dataclass, replace
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 import fitz
 
-from azure.core.exceptions import HttpResponseError
-
 from core.config import settings
-from core.contracts import DocumentRecord, PageRecord, TriageDecision
-from embedding.late_chunking import late_chunk_embeddings
-from ingestion.canonicalize import canonicalize_document
+from core.contracts import (
+    CanonicalPage,
+    ChunkRecord,
+    DocumentRecord,
+    IngestCheckpoint,
+    PageRecord,
+    TriageDecision,
+)
+from embedding.late_chunking import iter_late_chunk_embeddings, late_chunk_embeddings
+from ingestion.canonicalize import iter_canonical_pages
+from ingestion.checkpoints import (
+    STAGE_DI,
+    STAGE_PERSIST,
+    STAGE_TRIAGE,
+    ChunkCheckpointer,
+    ResumePoint,
+    pages_done,
+    resume_point,
+)
 from core.logging import configure_logging
-from ingestion.di_client import DIClient
+from ingestion.di_cache import DICache, default_cache_dir as di_cache_dir
+from ingestion.di_scheduler import DIScheduler
+from ingestion.di_store import has_di_page, pack_document
 from ingestion.document_facts import extract_document_facts
-from ingestion.pdf_analysis import analyze_page
+from ingestion.page_reuse import (
+    EmbeddingReuse,
+    PriorVersion,
+    choose_prior_version,
+    page_content_hashes,
+)
+from ingestion.pipeline_stages import StagedPipeline
+from ingestion.triage_pool import iter_page_triage
 from storage.db import get_connection
 from storage import repo
 from storage.schema_contract import check_schema_contract
 
+logger = logging.getLogger(__name__)
+
+PAGE_INSERT_BATCH_SIZE = 50
+
 
 def ingest_pdf(
     pdf_path: str,
@@ -27,162 +57,605 @@ def ingest_pdf(
     force_di_pages: Optional[List[int]] = None,
     progress_cb=None,
 ) -> str:
+    doc_id, page_count = _register_document(pdf_path, filename)
+    triaged = pages_done(_load_checkpoints(doc_id), STAGE_TRIAGE)
+    content_hashes = _read_content_hashes(pdf_path)
+    prior = _find_prior_version(doc_id, content_hashes)
+    deque(
+        _iter_ready_pages(
+            pdf_path, doc_id, page_count, content_hashes, force_di_pages, progress_cb,
+            triaged, prior,
+        ),
+        maxlen=0,
+    )
+    _report_reuse(doc_id, prior, page_count, progress_cb)
+    _pack_di_pages(doc_id)
+    return doc_id
+
+
+def ingest_and_chunk(
+    pdf_path: str,
+    filename: Optional[str] = None,
+    force_di_pages: Optional[List[int]] = None,
+    macro_max_tokens: int = 8192,
+    macro_overlap_tokens: int = 256,
+    child_target_tokens: int = 256,
+    progress_cb=None,
+    force_reprocess: bool = False,
+) -> str:
+    """Ingest and chunk a PDF, resuming from its stage checkpoints."""
+    chunk_options = dict(
+        macro_max_tokens=macro_max_tokens,
+        macro_overlap_tokens=macro_overlap_tokens,
+        child_target_tokens=child_target_tokens,
+    )
+    doc_id, job = start_chunk_job(
+        pdf_path, filename, force_di_pages, chunk_options, force_reprocess
+    )
+    if job is None:
+        return doc_id
+    if settings.pipelined_ingest:
+        _run_pipelined(job, progress_cb)
+    else:
+        pages = list(job.ready_pages(progress_cb))
+        canonical_pages = job.canonicalize(pages, progress_cb)
+        if progress_cb:
+            progress_cb("embed", 0, job.remaining_pages)
+        job.store(job.embed(canonical_pages, progress_cb))
+    job.finish(progress_cb)
+    return doc_id
+
+
+def start_chunk_job(
+    pdf_path: str,
+    filename: Optional[str],
+    force_di_pages: Optional[List[int]],
+    chunk_options: Dict[str, int],
+    force_reprocess: bool = False,
+) -> Tuple[str, Optional["ChunkJob"]]:
+    """Register the document and plan its chunking; no job if it is already chunked."""
+    doc_id, page_count = _register_document(pdf_path, filename)
+    checkpoints = _load_checkpoints(doc_id, reset=force_reprocess)
+    if not force_reprocess and _chunking_complete(doc_id, checkpoints, page_count):
+        return doc_id, None
+    _cache_source_pdf(doc_id, pdf_path)
+    content_hashes = _read_content_hashes(pdf_path)
+    prior = _find_prior_version(doc_id, content_hashes)
+    return doc_id, ChunkJob.resuming(
+        doc_id, pdf_path, page_count, chunk_options, checkpoints, content_hashes,
+        force_di_pages, prior,
+    )
+
+
+@dataclass(frozen=True)
+class ChunkJob:
+    """Triage/DI, canonicalize, embed and store one document after its resume point.
+
+    The steps can run in different processes: a job (and its checkpointer
+    and reuse state) pickles, so a worker can canonicalize and hand it back.
+    """
+
+    doc_id: str
+    pdf_path: str
+    page_count: int
+    chunk_options: Dict[str, int]
+    resume: ResumePoint
+    checkpointer: ChunkCheckpointer
+    content_hashes: Tuple[str, ...]
+    force_di_pages: Tuple[int, ...] = ()
+    triaged: int = 0
+    prior: Optional[PriorVersion] = None
+
+    @classmethod
+    def resuming(
+        cls,
+        doc_id: str,
+        pdf_path: str,
+        page_count: int,
+        chunk_options: Dict[str, int],
+        checkpoints: Dict[str, IngestCheckpoint],
+        content_hashes: List[str],
+        force_di_pages: Optional[List[int]] = None,
+        prior: Optional[PriorVersion] = None,
+    ) -> "ChunkJob":
+        # Document windows cross pages, so they only resume from scratch.
+        per_page = not settings.embed_document_windows
+        resume = resume_point(checkpoints, chunk_options) if per_page else ResumePoint()
+        checkpointer = ChunkCheckpointer(doc_id, page_count, resume, chunk_options, per_page)
+        return cls(
+            doc_id,
+            pdf_path,
+            page_count,
+            chunk_options,
+            resume,
+            checkpointer,
+            tuple(content_hashes),
+            force_di_pages=tuple(force_di_pages or ()),
+            triaged=pages_done(checkpoints, STAGE_TRIAGE),
+            prior=prior,
+        )
+
+    @property
+    def remaining_pages(self) -> int:
+        return self.page_count - self.resume.pages_done
+
+    def ready_pages(self, progress_cb=None) -> Iterator[PageRecord]:
+        return _iter_ready_pages(
+            self.pdf_path,
+            self.doc_id,
+            self.page_count,
+            self.content_hashes,
+            list(self.force_di_pages),
+            progress_cb,
+            self.triaged,
+            self.prior,
+        )
+
+    def canonicalize(
+        self, pages: Iterable[PageRecord], progress_cb=None
+    ) -> Iterator[CanonicalPage]:
+        heading_stack = list(self.resume.heading_stack)
+        canonical_pages = iter_canonical_pages(
+            self.doc_id,
+            self.pdf_path,
+            (page for page in pages if page.page_number > self.resume.pages_done),
+            progress_cb=progress_cb,
+            total_pages=self.remaining_pages,
+            heading_stack=heading_stack,
+        )
+        for page in canonical_pages:
+            _save_checkpoint(self.checkpointer.canonicalized(page.page_number, heading_stack))
+            yield page
+
+    def embed(
+        self, canonical_pages: Iterable[CanonicalPage], progress_cb=None
+    ) -> Iterable[ChunkRecord]:
+        return _embed_chunks(
+            canonical_pages,
+            total_pages=self.remaining_pages,
+            progress_cb=progress_cb,
+            macro_offset=self.resume.next_macro_id,
+            reuse_embeddings=_embedding_reuse(self.prior, self.chunk_options),
+            **self.chunk_options,
+        )
+
+    def store(self, chunks: Iterable[ChunkRecord]) -> None:
+        _store_chunks(self.doc_id, chunks, self.checkpointer, self.resume)
+
+    def finish(self, progress_cb=None) -> None:
+        _report_reuse(self.doc_id, self.prior, self.page_count, progress_cb)
+        _pack_di_pages(self.doc_id)
+
+
+def _run_pipelined(job: ChunkJob, progress_cb) -> None:
+    """Triage/DI, canonicalize, embed and persist as concurrent stages.
+
+    Each stage is one thread consuming the previous one in page order, so the
+    heading stack and macro ids evolve exactly as in the sequential path.
+    """
+    with StagedPipeline(settings.pipeline_queue_pages, progress_cb) as pipeline:
+        relay = pipeline.progress_cb
+        pages = pipeline.stage("triage_di", lambda: job.ready_pages(relay))
+        canonical_pages = pipeline.stage(
+            "canonicalize", lambda stream: job.canonicalize(stream, relay), pages
+        )
+        chunks = pipeline.stage("embed", lambda stream: job.embed(stream, relay), canonical_pages)
+        pipeline.sink("persist", job.store, chunks)
+    _report_stage_utilization(pipeline, progress_cb)
+
+
+def _register_document(pdf_path: str, filename: Optional[str]) -> Tuple[str, int]:
+    """Return (doc_id, page_count), inserting the document row on first ingest."""
     configure_logging()
     check_schema_contract()
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(pdf_path)
 
     sha256 = _compute_sha256(pdf_path)
-    doc_id = str(uuid.uuid5(uuid.NAMESPACE_URL, sha256))
-
     pdf = fitz.open(pdf_path)
     page_count = pdf.page_count
+    pdf.close()
+    with get_connection() as conn:
+        existing = repo.fetch_document_by_sha(conn, sha256)
+        if existing:
+            return existing.doc_id, page_count
+        doc_record = DocumentRecord(
+            doc_id=str(uuid.uuid5(uuid.NAMESPACE_URL, sha256)),
+            filename=filename or os.path.basename(pdf_path),
+            sha256=sha256,
+            page_count=page_count,
+        )
+        repo.insert_document(conn, doc_record)
+        conn.commit()
+    return doc_record.doc_id, page_count
+
+
+def _read_content_hashes(pdf_path: str) -> List[str]:
+    """Per-page content hashes, read once per ingest and shared by reuse and page rows."""
+    pdf = fitz.open(pdf_path)
+    try:
+        return page_content_hashes(pdf)
+    finally:
+        pdf.close()
 
-    di_client: Optional[DIClient] = None
-    force_set: Set[int] = set(force_di_pages or [])
-    page_buffer: List[PageRecord] = []
 
+def _find_prior_version(doc_id: str, page_hashes: Sequence[str]) -> Optional[PriorVersion]:
+    """The stored document sharing the most pages with this one (INCREMENTAL_REINGEST)."""
+    if not settings.incremental_reingest:
+        return None
+    with get_connection() as conn:
+        candidates = repo.fetch_pages_by_content_hash(conn, page_hashes, exclude_doc_id=doc_id)
+        prior = choose_prior_version(page_hashes, candidates)
+        if prior is not None:
+            prior.persist = repo.fetch_ingest_checkpoints(conn, prior.doc_id).get(STAGE_PERSIST)
+    if prior is not None:
+        logger.info(
+            "Document %s: %d of %d pages unchanged from %s",
+            doc_id, len(prior.matches), len(page_hashes), prior.doc_id,
+        )
+    return prior
+
+
+def _load_checkpoints(doc_id: str, reset: bool = False) -> Dict[str, IngestCheckpoint]:
+    with get_connection() as conn:
+        if not reset:
+            return repo.fetch_ingest_checkpoints(conn, doc_id)
+        repo.delete_ingest_checkpoints(conn, doc_id)
+        conn.commit()
+    return {}
+
+
+def _chunking_complete(
+    doc_id: str, checkpoints: Dict[str, IngestCheckpoint], page_count: int
+) -> bool:
+    if STAGE_PERSIST in checkpoints:
+        return checkpoints[STAGE_PERSIST].pages_done >= page_count
+    if checkpoints:
+        return False
+    # Documents chunked before checkpoints existed have chunks but no rows.
+    with get_connection() as conn:
+        return repo.count_chunks(conn, doc_id) > 0
+
+
+def _save_checkpoint(checkpoint: Optional[IngestCheckpoint], conn=None) -> None:
+    """Upsert on ``conn`` (committed by the caller) or on a connection of its own."""
+    if checkpoint is None:
+        return
+    if conn is not None:
+        repo.upsert_ingest_checkpoint(conn, checkpoint)
+        return
+    with get_connection() as own_conn:
+        repo.upsert_ingest_checkpoint(own_conn, checkpoint)
+        own_conn.commit()
+
+
+def _iter_ready_pages(
+    pdf_path: str,
+    doc_id: str,
+    page_count: int,
+    content_hashes: Sequence[str],
+    force_di_pages: Optional[List[int]],
+    progress_cb=None,
+    triaged: int = 0,
+    prior: Optional[PriorVersion] = None,
+) -> Iterator[PageRecord]:
+    """Triage every page, submit DI pages and commit page rows in batches.
+
+    Records are yielded in page order, each as soon as its DI payload (if
+    any) is written, so later stages can work on page N while page N+k is
+    still in DI. The first ``triaged`` pages are read back from the pages
+    table instead of being triaged again; pages unchanged from a ``prior``
+    version take its triage and DI output. ``content_hashes`` (one per page)
+    are stored on the page rows. Returns only after every submitted page is
+    written.
+    """
+    os.makedirs(os.path.join(settings.data_dir, doc_id), exist_ok=True)
+    force_set: Set[int] = set(force_di_pages or [])
+    pdf = fitz.open(pdf_path)
     try:
-        with get_connection() as conn:
-            existing = repo.fetch_document_by_sha(conn, sha256)
-            if existing:
-                doc_id = existing.doc_id
-            else:
-                doc_record = DocumentRecord(
-                    doc_id=doc_id,
-                    filename=filename or os.path.basename(pdf_path),
-                    sha256=sha256,
-                    page_count=page_count,
-                )
-                repo.insert_document(conn, doc_record)
-                conn.commit()
-
-            output_dir = os.path.join(settings.data_dir, doc_id)
-            os.makedirs(output_dir, exist_ok=True)
-
-            for page_index in range(page_count):
-                if progress_cb:
-                    progress_cb(
-                        "triage",
-                        page_index + 1,
-                        page_count,
-                    )
-                page = pdf.load_page(page_index)
-                triage = analyze_page(page)
-                triage = _apply_force_di(triage, page_index + 1, force_set)
-                di_json_path = None
-                if triage.decision == "di_required":
-                    if progress_cb:
-                        progress_cb(
-                            "di",
-                            page_index + 1,
-                            page_count,
-                        )
-                    if settings.disable_di:
-                        triage = _apply_disable_di(triage)
-                        if progress_cb:
-                            progress_cb(
-                                "di_skipped",
-                                page_index + 1,
-                                page_count,
-                            )
-                    else:
-                        di_json_path = os.path.join(
-                            output_dir, f"page_{page_index + 1:04d}_di.json"
-                        )
-                        if not os.path.exists(di_json_path):
-                            if di_client is None:
-                                di_client = DIClient()
-                            page_bytes = _extract_single_page_pdf(pdf, page_index)
-                            try:
-                                di_result = di_client.analyze_page_bytes(page_bytes)
-                            except HttpResponseError as exc:
-                                if _is_invalid_content_length(exc):
-                                    di_result = _analyze_with_image_fallback(
-                                        di_client=di_client, page=page
-                                    )
-                                else:
-                                    raise
-                            _write_json(di_json_path, di_result.result)
-
-                page_record = _build_page_record(
-                    doc_id=doc_id,
-                    page_number=page_index + 1,
-                    triage=triage,
-                    di_json_path=di_json_path,
+        with get_connection() as conn, _di_scheduler(pdf, progress_cb) as di_scheduler:
+            page_writer = _PageWriter(conn, doc_id, page_count, progress_cb)
+            ready: Deque[PageRecord] = deque()
+            for page_index, triage in _triage_stream(
+                conn, pdf_path, doc_id, page_count, triaged, progress_cb, prior
+            ):
+                page_record = _route_page(
+                    doc_id, page_index, _apply_force_di(triage, page_index + 1, force_set),
+                    content_hashes[page_index], page_count, di_scheduler, progress_cb, prior,
                 )
-                page_buffer.append(page_record)
-                if len(page_buffer) >= 50:
-                    repo.insert_pages(conn, page_buffer)
-                    conn.commit()
-                    page_buffer.clear()
-                    if progress_cb:
-                        progress_cb(
-                            "pages_committed",
-                            page_index + 1,
-                            page_count,
-                        )
-
-            if page_buffer:
-                repo.insert_pages(conn, page_buffer)
-                conn.commit()
-                if progress_cb:
-                    progress_cb(
-                        "pages_committed",
-                        page_count,
-                        page_count,
-                    )
+                page_writer.add(page_record)
+                ready.append(page_record)
+                di_scheduler.poll()
+                while ready and di_scheduler.is_done(ready[0].page_number - 1):
+                    yield page_writer.ready(ready.popleft())
+            page_writer.flush()
+            while ready:
+                di_scheduler.wait_for(ready[0].page_number - 1)
+                yield page_writer.ready(ready.popleft())
+            di_scheduler.wait()
+            page_writer.finish()
     finally:
         pdf.close()
 
-    return doc_id
 
+def _triage_stream(
+    conn, pdf_path: str, doc_id: str, page_count: int, triaged: int, progress_cb=None,
+    prior: Optional[PriorVersion] = None,
+) -> Iterator[Tuple[int, TriageDecision]]:
+    """Stored decisions for the first ``triaged`` pages, then the rest in order.
+
+    Pages unchanged from ``prior`` take its decision; the others are triaged.
+    """
+    if triaged:
+        for page in repo.fetch_pages(conn, doc_id):
+            if page.page_number <= triaged:
+                yield page.page_number - 1, TriageDecision(
+                    metrics=page.triage_metrics,
+                    decision=page.triage_decision,
+                    reason_codes=page.reason_codes,
+                )
+    artifact_dir = os.path.join(settings.data_dir, doc_id)
+    reused = {number - 1 for number in prior.triage_pages()} if prior else set()
+    reused = {index for index in reused if index >= triaged}
+    fresh = iter_page_triage(
+        pdf_path,
+        page_count,
+        settings.triage_workers,
+        progress_cb,
+        artifact_dir=artifact_dir,
+        first_index=triaged,
+        skip=reused,
+    )
+    try:
+        for page_index in range(triaged, page_count):
+            if page_index in reused:
+                yield page_index, prior.triage(page_index + 1, artifact_dir)
+            else:
+                yield next(fresh)
+    finally:
+        fresh.close()
 
-def ingest_and_chunk(
-    pdf_path: str,
-    filename: Optional[str] = None,
-    force_di_pages: Optional[List[int]] = None,
-    macro_max_tokens: int = 8192,
-    macro_overlap_tokens: int = 256,
-    child_target_tokens: int = 256,
+
+def _route_page(
+    doc_id: str,
+    page_index: int,
+    triage: TriageDecision,
+    content_hash: str,
+    page_count: int,
+    di_scheduler: DIScheduler,
     progress_cb=None,
-    force_reprocess: bool = False,
-) -> str:
-    doc_id = ingest_pdf(
-        pdf_path,
-        filename=filename,
-        force_di_pages=force_di_pages,
+    prior: Optional[PriorVersion] = None,
+) -> PageRecord:
+    """Submit a DI page and build its row.
+
+    Nothing is submitted when DI is disabled, the payload exists, or an
+    unchanged page of the ``prior`` version has one to copy.
+    """
+    di_json_path = None
+    if triage.decision == "di_required":
+        if progress_cb:
+            progress_cb("di", page_index + 1, page_count)
+        if settings.disable_di:
+            triage = _apply_disable_di(triage)
+            if progress_cb:
+                progress_cb("di_skipped", page_index + 1, page_count)
+        else:
+            di_json_path = os.path.join(
+                settings.data_dir, doc_id, f"page_{page_index + 1:04d}_di.json"
+            )
+            written = has_di_page(di_json_path) or (
+                prior is not None and prior.copy_di(page_index + 1, di_json_path)
+            )
+            if not written:
+                di_scheduler.submit(page_index, di_json_path)
+    return _build_page_record(
+        doc_id=doc_id,
+        page_number=page_index + 1,
+        triage=triage,
+        di_json_path=di_json_path,
+        content_hash=content_hash,
+    )
+
+
+class _PageWriter:
+    """Insert page rows in batches of PAGE_INSERT_BATCH_SIZE.
+
+    Each batch is committed together with the triage and DI checkpoints.
+    """
+
+    def __init__(self, conn, doc_id: str, page_count: int, progress_cb=None) -> None:
+        self._conn = conn
+        self._doc_id = doc_id
+        self._page_count = page_count
+        self._progress_cb = progress_cb
+        self._buffer: List[PageRecord] = []
+        self._triaged = 0
+        self._di_done = 0
+
+    def add(self, page_record: PageRecord) -> None:
+        self._buffer.append(page_record)
+        if len(self._buffer) >= PAGE_INSERT_BATCH_SIZE:
+            self._commit(page_record.page_number)
+
+    def ready(self, page_record: PageRecord) -> PageRecord:
+        """Note that the page's DI payload (if any) is written."""
+        self._di_done = page_record.page_number
+        return page_record
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._commit(self._page_count)
+
+    def finish(self) -> None:
+        self._save(STAGE_DI, self._page_count)
+        self._conn.commit()
+
+    def _commit(self, reported_page: int) -> None:
+        repo.insert_pages(self._conn, self._buffer)
+        self._triaged = self._buffer[-1].page_number
+        self._save(STAGE_TRIAGE, self._triaged)
+        self._save(STAGE_DI, min(self._di_done, self._triaged))
+        self._conn.commit()
+        self._buffer = []
+        if self._progress_cb:
+            self._progress_cb("pages_committed", reported_page, self._page_count)
+
+    def _save(self, stage: str, pages: int) -> None:
+        repo.upsert_ingest_checkpoint(
+            self._conn, IngestCheckpoint(doc_id=self._doc_id, stage=stage, pages_done=pages)
+        )
+
+
+def _di_scheduler(pdf: fitz.Document, progress_cb=None) -> DIScheduler:
+    return DIScheduler(
+        pdf,
+        max_in_flight=settings.di_max_in_flight,
+        batch_pages=settings.di_batch_pages,
+        cache=_di_cache(),
+        max_retries=settings.di_max_retries,
+        backoff_seconds=settings.di_retry_backoff_seconds,
         progress_cb=progress_cb,
     )
+
+
+def _pack_di_pages(doc_id: str) -> None:
+    """Runs after chunking so no reader sees loose files disappear mid-read."""
+    if settings.di_pack_pages:
+        pack_document(os.path.join(settings.data_dir, doc_id))
+
+
+def _report_stage_utilization(pipeline: StagedPipeline, progress_cb=None) -> None:
+    wall_seconds = pipeline.wall_seconds
+    for stats in pipeline.stats:
+        utilization = stats.utilization(wall_seconds)
+        logger.info(
+            "Ingest stage %s: %d items, busy %.1fs (%.0f%%), waiting on input %.1fs, "
+            "on output %.1fs",
+            stats.name,
+            stats.items,
+            stats.busy_seconds,
+            utilization * 100,
+            stats.input_wait_seconds,
+            stats.output_wait_seconds,
+        )
+        if progress_cb:
+            progress_cb(f"utilization_{stats.name}", round(utilization * 100), 100)
+
+
+def _embedding_reuse(
+    prior: Optional[PriorVersion], chunk_options: Dict[str, int]
+) -> Optional[EmbeddingReuse]:
+    """Stored embeddings of unchanged pages, when they were chunked the same way."""
+    if prior is None or settings.embed_document_windows:
+        return None
+    pages = prior.chunk_pages(chunk_options)
+    if not pages:
+        return None
     with get_connection() as conn:
-        if not force_reprocess and repo.count_chunks(conn, doc_id) > 0:
-            return doc_id
-    _cache_source_pdf(doc_id, pdf_path)
-    with get_connection() as conn:
-        pages = repo.fetch_pages(conn, doc_id)
-    canonical_pages = canonicalize_document(
-        doc_id=doc_id,
-        pdf_path=pdf_path,
-        pages=pages,
-        progress_cb=progress_cb,
+        prior_chunks = repo.fetch_page_chunks(conn, prior.doc_id, sorted(set(pages.values())))
+    return EmbeddingReuse(pages, prior_chunks, prior.stats)
+
+
+def _report_reuse(
+    doc_id: str, prior: Optional[PriorVersion], page_count: int, progress_cb=None
+) -> None:
+    if prior is None:
+        return
+    stats = prior.stats
+    logger.info(
+        "Document %s reused from %s: triage %d/%d pages, DI %d pages, "
+        "embeddings %d pages (%d chunks)",
+        doc_id, prior.doc_id, stats.triage_pages, page_count, stats.di_pages,
+        stats.embedded_pages, stats.embedded_chunks,
     )
     if progress_cb:
-        progress_cb("embed", 0, len(canonical_pages))
-    chunks = late_chunk_embeddings(
+        for name, pages in (
+            ("reused_triage", stats.triage_pages),
+            ("reused_di", stats.di_pages),
+            ("reused_embeddings", stats.embedded_pages),
+        ):
+            progress_cb(name, pages, page_count)
+
+
+def _embed_chunks(
+    canonical_pages: Iterable[CanonicalPage],
+    total_pages: int,
+    macro_max_tokens: int,
+    macro_overlap_tokens: int,
+    child_target_tokens: int,
+    progress_cb=None,
+    macro_offset: int = 0,
+    reuse_embeddings: Optional[EmbeddingReuse] = None,
+) -> Iterable[ChunkRecord]:
+    """Stream chunks page group by page group; document windows need all pages."""
+    if settings.embed_document_windows:
+        return late_chunk_embeddings(
+            list(canonical_pages),
+            macro_max_tokens=macro_max_tokens,
+            macro_overlap_tokens=macro_overlap_tokens,
+            child_target_tokens=child_target_tokens,
+            progress_cb=progress_cb,
+            document_windows=True,
+        )
+    return iter_late_chunk_embeddings(
         canonical_pages,
         macro_max_tokens=macro_max_tokens,
         macro_overlap_tokens=macro_overlap_tokens,
         child_target_tokens=child_target_tokens,
         progress_cb=progress_cb,
+        total_pages=total_pages,
+        macro_offset=macro_offset,
+        reuse_embeddings=reuse_embeddings,
     )
-    if chunks:
+
+
+def _store_chunks(
+    doc_id: str,
+    chunks: Iterable[ChunkRecord],
+    checkpointer: Optional[ChunkCheckpointer] = None,
+    resume: ResumePoint = ResumePoint(),
+) -> None:
+    """Insert chunks in batches of CHUNK_INSERT_BATCH_SIZE, committing each batch.
+
+    With a checkpointer, each batch commits with the persist checkpoint it
+    completes, and the final checkpoint commits after document facts.
+    Document facts only need text and lineage, so embeddings are dropped from
+    the copies kept for them; chunks stored before the resume point are read
+    back for them.
+    """
+    fact_chunks = _stored_fact_chunks(doc_id, resume)
+    for batch in _batched(chunks, max(settings.chunk_insert_batch_size, 1)):
         with get_connection() as conn:
-            repo.insert_chunks(conn, chunks)
-            if settings.enable_document_facts:
-                facts = extract_document_facts(doc_id, chunks)
-                repo.upsert_document_facts(conn, facts)
+            repo.insert_chunks(conn, batch)
+            if checkpointer is not None:
+                _save_checkpoint(checkpointer.committed(batch), conn)
             conn.commit()
-    return doc_id
+        if settings.enable_document_facts:
+            fact_chunks.extend(replace(chunk, embedding=[]) for chunk in batch)
+    if not fact_chunks and checkpointer is None:
+        return
+    facts = extract_document_facts(doc_id, fact_chunks) if fact_chunks else []
+    with get_connection() as conn:
+        repo.upsert_document_facts(conn, facts)
+        if checkpointer is not None:
+            _save_checkpoint(checkpointer.finished(), conn)
+        conn.commit()
+
+
+def _stored_fact_chunks(doc_id: str, resume: ResumePoint) -> List[ChunkRecord]:
+    if not settings.enable_document_facts or resume.next_macro_id == 0:
+        return []
+    with get_connection() as conn:
+        return repo.fetch_chunks_before(conn, doc_id, resume.next_macro_id)
+
+
+def _batched(items: Iterable[ChunkRecord], size: int) -> Iterator[List[ChunkRecord]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
 
 
 def _cache_source_pdf(doc_id: str, pdf_path: str) -> None:
@@ -195,8 +668,18 @@ def _cache_source_pdf(doc_id: str, pdf_path: str) -> None:
         dst.write(src.read())
 
 
+def _di_cache() -> Optional[DICache]:
+    if not settings.enable_di_cache:
+        return None
+    return DICache(di_cache_dir(), settings.di_cache_max_mb * 1024 * 1024)
+
+
 def _build_page_record(
-    doc_id: str, page_number: int, triage: TriageDecision, di_json_path: Optional[str]
+    doc_id: str,
+    page_number: int,
+    triage: TriageDecision,
+    di_json_path: Optional[str],
+    content_hash: Optional[str] = None,
 ) -> PageRecord:
     return PageRecord(
         doc_id=doc_id,
@@ -205,6 +688,7 @@ def _build_page_record(
         triage_decision=triage.decision,
         reason_codes=triage.reason_codes,
         di_json_path=di_json_path,
+        content_hash=content_hash,
     )
 
 
@@ -240,39 +724,3 @@ def _compute_sha256(path: str) -> str:
         for chunk in iter(lambda: handle.read(1024 * 1024), b""):
             hasher.update(chunk)
     return hasher.hexdigest()
-
-
-def _extract_single_page_pdf(pdf: fitz.Document, page_index: int) -> bytes:
-    new_pdf = fitz.open()
-    new_pdf.insert_pdf(pdf, from_page=page_index, to_page=page_index)
-    page_bytes = new_pdf.tobytes()
-    new_pdf.close()
-    return page_bytes
-
-
-def _is_invalid_content_length(exc: HttpResponseError) -> bool:
-    message = str(exc).lower()
-    return "invalidcontentlength" in message or "input image is too large" in message
-
-
-def _analyze_with_image_fallback(di_client: DIClient, page: fitz.Page):
-    for zoom in (1.0, 0.7, 0.5, 0.3):
-        image_bytes = _render_page_png(page, zoom=zoom)
-        try:
-            return di_client.analyze_page_image_bytes(image_bytes)
-        except HttpResponseError as exc:
-            if _is_invalid_content_length(exc):
-                continue
-            raise
-    raise RuntimeError("Azure DI rejected all fallback image sizes.")
-
-
-def _render_page_png(page: fitz.Page, zoom: float) -> bytes:
-    matrix = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csRGB)
-    return pix.tobytes("png")
-
-
-def _write_json(path: str, payload: dict) -> None:
-    with open(path, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=True, indent=2)
@@ -0,0 +1,152 @@
+"""Per-page extraction artifact shared by triage and canonicalization.
+
+Triage parses each page once through a single TextPage. The words it pulls
+for the triage metrics are kept together with their line groupings and, for
+pages that will be canonicalized natively, the ``find_tables`` detections.
+The artifact is persisted as ``page_NNNN_extract.json`` next to the DI JSON
+so canonicalization does not re-parse the page.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from itertools import chain
+from typing import List, Optional, Tuple
+
+import fitz
+import numpy as np
+
+from core.config import settings
+from core.contracts import TriageDecision
+from ingestion.pdf_analysis import analyze_extracted_page
+
+EXTRACTION_VERSION = 1
+
+Word = Tuple[float, float, float, float, str, int, int, int]
+
+
+@dataclass(frozen=True)
+class NativeTable:
+    rows: List[List[Optional[str]]]
+    bbox: Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class PageExtraction:
+    page_number: int
+    # PyMuPDF "words" tuples: (x0, y0, x1, y1, text, block_no, line_no, word_no).
+    words: List[Word]
+    # Word indices per (block_no, line_no), lines in key order, words by x0.
+    lines: List[List[int]]
+    # None when table detection was skipped (page expected to go to DI).
+    tables: Optional[List[NativeTable]]
+
+
+def triage_and_extract(
+    page: fitz.Page, page_number: int
+) -> Tuple[TriageDecision, PageExtraction]:
+    """Triage the page and build its extraction artifact from one TextPage."""
+    textpage = page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+    text = page.get_text("text", textpage=textpage) or ""
+    words = page.get_text("words", textpage=textpage)
+    triage = analyze_extracted_page(page, text, words)
+    detect_tables = triage.decision == "native_only" or settings.disable_di
+    return triage, extract_page(page, page_number, words, detect_tables)
+
+
+def extract_page(
+    page: fitz.Page,
+    page_number: int,
+    words: Optional[list] = None,
+    detect_tables: bool = True,
+) -> PageExtraction:
+    if words is None:
+        words = page.get_text("words")
+    words = [
+        (float(x0), float(y0), float(x1), float(y1), str(text), int(block), int(line), int(num))
+        for x0, y0, x1, y1, text, block, line, num in words
+    ]
+    return PageExtraction(
+        page_number=page_number,
+        words=words,
+        lines=group_lines(words),
+        tables=detect_native_tables(page) if detect_tables and words else None,
+    )
+
+
+def group_lines(words: List[Word]) -> List[List[int]]:
+    if not words:
+        return []
+    columns = np.fromiter(
+        chain.from_iterable((word[5], word[6], word[0]) for word in words),
+        dtype=np.float64,
+        count=3 * len(words),
+    ).reshape(-1, 3)
+    # Stable: words with equal x0 keep their extraction order.
+    order = np.lexsort((columns[:, 2], columns[:, 1], columns[:, 0]))
+    keys = columns[order, :2]
+    edges = [0, *(np.flatnonzero((keys[1:] != keys[:-1]).any(axis=1)) + 1).tolist(), len(order)]
+    order = order.tolist()
+    return [order[start:end] for start, end in zip(edges, edges[1:])]
+
+
+def detect_native_tables(page: fitz.Page) -> List[NativeTable]:
+    if not hasattr(page, "find_tables"):
+        return []
+    try:
+        tables = page.find_tables()
+    except Exception:
+        return []
+    detected: List[NativeTable] = []
+    for table in tables.tables:
+        rows = table.extract()
+        if not rows:
+            continue
+        detected.append(NativeTable(rows=rows, bbox=_table_bbox(table.bbox)))
+    return detected
+
+
+def extraction_path(output_dir: str, page_number: int) -> str:
+    return os.path.join(output_dir, f"page_{page_number:04d}_extract.json")
+
+
+def write_extraction(path: str, extraction: PageExtraction) -> None:
+    payload = {
+        "version": EXTRACTION_VERSION,
+        "page_number": extraction.page_number,
+        "words": extraction.words,
+        "lines": extraction.lines,
+        "tables": None
+        if extraction.tables is None
+        else [{"rows": table.rows, "bbox": table.bbox} for table in extraction.tables],
+    }
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, ensure_ascii=True)
+    os.replace(tmp_path, path)
+
+
+def load_extraction(path: str) -> Optional[PageExtraction]:
+    """Read an artifact; None when it is missing, unreadable or outdated."""
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if payload.get("version") != EXTRACTION_VERSION:
+        return None
+    tables = payload.get("tables")
+    return PageExtraction(
+        page_number=int(payload["page_number"]),
+        words=[tuple(word) for word in payload["words"]],
+        lines=payload["lines"],
+        tables=None
+        if tables is None
+        else [NativeTable(rows=table["rows"], bbox=tuple(table["bbox"])) for table in tables],
+    )
+
+
+def _table_bbox(bbox) -> Tuple[float, float, float, float]:
+    if hasattr(bbox, "x0"):
+        return float(bbox.x0), float(bbox.y0), float(bbox.x1), float(bbox.y1)
+    return float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3])
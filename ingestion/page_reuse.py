@@ -0,0 +1,206 @@
+"""Reuse of a prior version's per-page work when a revised filing is ingested.
+
+A restated filing has a new sha256 and so a new doc_id. Every page gets a
+``content_hash`` over its geometry, content streams, image and form XObject
+streams, and each font's identity: base name without the subset tag, type,
+encoding and ToUnicode map. Embedded font programs are left out because they
+are re-subset whenever a PDF is regenerated. The prior version is the stored
+document sharing the most page hashes; for each page with a match:
+
+- triage: the decision and the extraction artifact are copied;
+- DI: the payload is copied, renumbered, instead of requested again;
+- embeddings: the stored vectors are used when the page's planned chunks
+  (offsets and text) equal the prior page's chunks, under the same chunking
+  options and embedding signature with page-local windows.
+
+Canonicalization always reruns: headings carry over from earlier pages.
+"""
+
+import hashlib
+import os
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import fitz
+import numpy as np
+
+from core.config import settings
+from core.contracts import ChunkRecord, IngestCheckpoint, PageRecord, TriageDecision
+from ingestion.checkpoints import embedding_signature
+from ingestion.di_split import page_payload
+from ingestion.di_store import has_di_page, load_di_page, write_di_page
+from ingestion.page_extraction import extraction_path, load_extraction, write_extraction
+
+# Planned chunk of a page: (page-local char_start, char_end, text).
+PlannedChunk = Tuple[int, int, str]
+
+
+def page_content_hashes(pdf: fitz.Document) -> List[str]:
+    font_digests: Dict[int, bytes] = {}
+    return [
+        _page_hash(pdf, pdf.load_page(index), font_digests) for index in range(pdf.page_count)
+    ]
+
+
+def _page_hash(pdf: fitz.Document, page: fitz.Page, font_digests: Dict[int, bytes]) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(repr((tuple(page.rect), page.rotation)).encode("utf-8"))
+    hasher.update(page.read_contents())
+    for image in page.get_images(full=True):
+        hasher.update(image[7].encode("utf-8"))
+        for xref in (image[0], image[1]):
+            if xref > 0:
+                hasher.update(pdf.xref_stream_raw(xref) or b"")
+    for xobject in page.get_xobjects():
+        hasher.update(xobject[1].encode("utf-8"))
+        hasher.update(pdf.xref_stream_raw(xobject[0]) or b"")
+    for font in page.get_fonts(full=True):
+        if font[0] not in font_digests:
+            font_digests[font[0]] = _font_digest(pdf, font)
+        hasher.update(font[4].encode("utf-8"))
+        hasher.update(font_digests[font[0]])
+    return hasher.hexdigest()
+
+
+def _font_digest(pdf: fitz.Document, font: Tuple[Any, ...]) -> bytes:
+    xref, _ext, font_type, basefont, _name, encoding = font[:6]
+    identity = f"{basefont.split('+', 1)[-1]}|{font_type}|{encoding}"
+    hasher = hashlib.sha256(identity.encode("utf-8"))
+    if xref <= 0:
+        return hasher.digest()
+    kind, value = pdf.xref_get_key(xref, "ToUnicode")
+    if kind == "xref":
+        hasher.update(pdf.xref_stream(int(value.split()[0])) or b"")
+    kind, value = pdf.xref_get_key(xref, "Encoding")
+    if kind == "xref":
+        hasher.update(pdf.xref_object(int(value.split()[0]), compressed=True).encode("utf-8"))
+    elif kind == "dict":
+        hasher.update(value.encode("utf-8"))
+    return hasher.digest()
+
+
+@dataclass
+class ReuseStats:
+    triage_pages: int = 0
+    di_pages: int = 0
+    embedded_pages: int = 0
+    embedded_chunks: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class PriorVersion:
+    """The stored version of a document and its pages matching the new one."""
+
+    doc_id: str
+    # Page number in the new version -> identical page of the prior version.
+    matches: Dict[int, PageRecord]
+    persist: Optional[IngestCheckpoint] = None
+    stats: ReuseStats = field(default_factory=ReuseStats)
+
+    def triage_pages(self) -> List[int]:
+        """Pages whose stored triage decision is the one triage would make.
+
+        A decision forced to DI hides the triaged one, so it is not reused.
+        """
+        return [
+            page_number
+            for page_number, prior in sorted(self.matches.items())
+            if "force_di" not in prior.reason_codes
+        ]
+
+    def triage(self, page_number: int, artifact_dir: str) -> TriageDecision:
+        prior = self.matches[page_number]
+        prior_dir = os.path.join(settings.data_dir, self.doc_id)
+        extraction = load_extraction(extraction_path(prior_dir, prior.page_number))
+        if extraction is not None:
+            write_extraction(
+                extraction_path(artifact_dir, page_number),
+                replace(extraction, page_number=page_number),
+            )
+        self.stats.triage_pages += 1
+        return TriageDecision(
+            metrics=prior.triage_metrics,
+            decision=prior.triage_decision,
+            reason_codes=[code for code in prior.reason_codes if code != "di_disabled"],
+        )
+
+    def copy_di(self, page_number: int, di_json_path: str) -> bool:
+        """Write the prior page's DI payload for ``page_number``; False if it has none."""
+        prior = self.matches.get(page_number)
+        if prior is None or not prior.di_json_path or not has_di_page(prior.di_json_path):
+            return False
+        payload = load_di_page(prior.di_json_path)
+        write_di_page(di_json_path, page_payload(payload, prior.page_number, page_number))
+        self.stats.di_pages += 1
+        return True
+
+    def chunk_pages(self, chunk_options: Dict[str, Any]) -> Dict[int, int]:
+        """New page -> prior page whose stored chunk embeddings may be reused."""
+        if self.persist is None:
+            return {}
+        state = self.persist.state
+        if state.get("chunk_options") != chunk_options:
+            return {}
+        if state.get("embedding") != embedding_signature(per_page=True):
+            return {}
+        return {
+            page_number: prior.page_number
+            for page_number, prior in self.matches.items()
+            if prior.page_number <= self.persist.pages_done
+        }
+
+
+def choose_prior_version(
+    page_hashes: Sequence[str], candidates: Sequence[PageRecord]
+) -> Optional[PriorVersion]:
+    """The document sharing the most page hashes; ``candidates`` newest first."""
+    by_doc: Dict[str, Dict[str, PageRecord]] = {}
+    for page in candidates:
+        by_doc.setdefault(page.doc_id, {}).setdefault(page.content_hash, page)
+    if not by_doc:
+        return None
+    doc_id = max(by_doc, key=lambda candidate: len(by_doc[candidate]))
+    pages = by_doc[doc_id]
+    matches = {
+        page_number: pages[content_hash]
+        for page_number, content_hash in enumerate(page_hashes, start=1)
+        if content_hash in pages
+    }
+    return PriorVersion(doc_id=doc_id, matches=matches)
+
+
+class EmbeddingReuse:
+    """Stored vectors for pages whose planned chunks are exactly the stored ones.
+
+    Called by late chunking with a page number and the page's planned chunks
+    in emit order; returns one vector per planned chunk, or None to encode.
+    """
+
+    def __init__(
+        self, pages: Dict[int, int], prior_chunks: List[ChunkRecord], stats: ReuseStats
+    ) -> None:
+        by_prior_page: Dict[int, List[ChunkRecord]] = {}
+        for chunk in prior_chunks:
+            by_prior_page.setdefault(chunk.page_numbers[0], []).append(chunk)
+        self._chunks = {
+            page_number: by_prior_page.get(prior_page, [])
+            for page_number, prior_page in pages.items()
+        }
+        self._stats = stats
+
+    def __call__(
+        self, page_number: int, planned: List[PlannedChunk]
+    ) -> Optional[List[np.ndarray]]:
+        prior = self._chunks.get(page_number)
+        if prior is None or not planned:
+            return None
+        ordered = sorted(prior, key=lambda chunk: (chunk.macro_id, chunk.child_id))
+        stored = [(chunk.char_start, chunk.char_end, chunk.text_content) for chunk in ordered]
+        if stored != planned:
+            return None
+        self._stats.embedded_pages += 1
+        self._stats.embedded_chunks += len(planned)
+        return [np.asarray(chunk.embedding, dtype=np.float32) for chunk in ordered]
@@ -1,31 +1,54 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import fitz
 import numpy as np
 
+from core.config import settings
 from core.contracts import TriageDecision, TriageMetrics
 
 LOW_TEXT_THRESHOLD = 50
 HIGH_IMAGE_COVERAGE_THRESHOLD = 0.35
 HIGH_LAYOUT_COMPLEXITY_THRESHOLD = 0.6
+RASTER_ZOOM = 0.4
+# Non-white pixel fraction of rendered text relative to its word-box area,
+# measured on text-only pages at RASTER_ZOOM (range ~0.4-0.9).
+TEXT_INK_RATIO = 0.6
 
 
-def analyze_page(page: fitz.Page) -> TriageDecision:
+def analyze_page(page: fitz.Page, coverage_mode: Optional[str] = None) -> TriageDecision:
     text = page.get_text("text") or ""
+    words = page.get_text("words")
+    return analyze_extracted_page(page, text, words, coverage_mode)
+
+
+def analyze_extracted_page(
+    page: fitz.Page,
+    text: str,
+    words: list,
+    coverage_mode: Optional[str] = None,
+) -> TriageDecision:
+    """Triage a page whose text and words were already extracted."""
     text_length = len(text.strip())
     page_area = float(page.rect.width * page.rect.height)
     text_density = (text_length / page_area) if page_area else 0.0
 
-    image_coverage_ratio = _estimate_image_coverage(page)
-    layout_complexity_score = _estimate_layout_complexity(page)
+    coverage_mode = coverage_mode or settings.triage_image_coverage
+    image_coverage_ratio, coverage_method = None, "raster"
+    if coverage_mode == "metadata":
+        image_coverage_ratio = _estimate_image_coverage_metadata(page, words)
+        coverage_method = "metadata"
+    if image_coverage_ratio is None:
+        image_coverage_ratio, coverage_method = _estimate_image_coverage(page), "raster"
+    layout_complexity_score = _estimate_layout_complexity(page, words)
 
     metrics = TriageMetrics(
         text_length=text_length,
         text_density=text_density,
         image_coverage_ratio=image_coverage_ratio,
         layout_complexity_score=layout_complexity_score,
+        image_coverage_method=coverage_method,
     )
 
     reason_codes: List[str] = []
@@ -40,7 +63,7 @@ def analyze_page(page: fitz.Page) -> TriageDecision:
     return TriageDecision(metrics=metrics, decision=decision, reason_codes=reason_codes)
 
 
-def _estimate_image_coverage(page: fitz.Page, zoom: float = 0.4) -> float:
+def _estimate_image_coverage(page: fitz.Page, zoom: float = RASTER_ZOOM) -> float:
     matrix = fitz.Matrix(zoom, zoom)
     pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csRGB)
     img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
@@ -48,8 +71,112 @@ def _estimate_image_coverage(page: fitz.Page, zoom: float = 0.4) -> float:
     return float(non_white.mean())
 
 
-def _estimate_layout_complexity(page: fitz.Page) -> float:
-    words = page.get_text("words")
+def _estimate_image_coverage_metadata(
+    page: fitz.Page, words: Optional[list] = None
+) -> Optional[float]:
+    """Estimate the raster coverage ratio without rendering, or None if unsure.
+
+    Only answers when the page has no images, shadings or patterns and an
+    upper bound on its ink stays below HIGH_IMAGE_COVERAGE_THRESHOLD, so the
+    triage decision cannot differ from the raster path. The bound counts the
+    raster pixels touched by any word or filled path box grown by one pixel
+    (a glyph grazing a pixel darkens all of it), plus padded stroke outlines.
+    The returned value is the calibrated estimate, not the bound.
+    """
+    page_area = float(page.rect.width * page.rect.height)
+    if not page_area or _may_paint_images(page):
+        return None
+    if words is None:
+        words = page.get_text("words")
+    word_boxes = [word[:4] for word in words]
+    filled, stroke_area = _drawing_ink(page)
+    pixel_bound = _touched_pixel_fraction(page.rect, word_boxes + filled, 1.0 / RASTER_ZOOM)
+    if pixel_bound + stroke_area >= HIGH_IMAGE_COVERAGE_THRESHOLD:
+        return None
+    word_area = _clipped_box_area(page.rect, word_boxes) / page_area
+    fill_area = _clipped_box_area(page.rect, filled) / page_area
+    return min(1.0, TEXT_INK_RATIO * word_area + fill_area + stroke_area)
+
+
+def _drawing_ink(page: fitz.Page) -> Tuple[List[Tuple[float, float, float, float]], float]:
+    """Filled path boxes and an upper bound (as a page fraction) on stroked ink."""
+    page_rect = page.rect
+    pad = 2.0 / RASTER_ZOOM
+    filled: List[Tuple[float, float, float, float]] = []
+    stroke_area = 0.0
+    for drawing in page.get_cdrawings():
+        x0, y0, x1, y1 = drawing["rect"]
+        if drawing.get("fill") is not None:
+            filled.append((x0, y0, x1, y1))
+        if drawing.get("color") is not None:
+            width = drawing.get("width") or 1.0
+            stroke_area += 2 * (abs(x1 - x0) + abs(y1 - y0)) * (width + pad)
+    page_area = float(page_rect.width * page_rect.height)
+    return filled, stroke_area / page_area
+
+
+def _touched_pixel_fraction(
+    page_rect: fitz.Rect, boxes: List[Tuple[float, float, float, float]], pad: float
+) -> float:
+    """Fraction of RASTER_ZOOM pixmap pixels touched by any box grown by ``pad``.
+
+    Overlapping boxes count once: corner marks in a 2-D difference array are
+    summed back into per-pixel box counts.
+    """
+    if not boxes:
+        return 0.0
+    irect = (page_rect * fitz.Matrix(RASTER_ZOOM, RASTER_ZOOM)).irect
+    width, height = irect.width, irect.height
+    array = np.asarray(boxes, dtype=np.float64)
+    array -= (page_rect.x0, page_rect.y0, page_rect.x0, page_rect.y0)
+    array *= RASTER_ZOOM
+    pad *= RASTER_ZOOM
+    cols0 = np.clip(np.floor(array[:, 0] - pad), 0, width).astype(np.intp)
+    rows0 = np.clip(np.floor(array[:, 1] - pad), 0, height).astype(np.intp)
+    cols1 = np.clip(np.ceil(array[:, 2] + pad), 0, width).astype(np.intp)
+    rows1 = np.clip(np.ceil(array[:, 3] + pad), 0, height).astype(np.intp)
+    marks = np.zeros((height + 1, width + 1), dtype=np.int32)
+    np.add.at(marks, (rows0, cols0), 1)
+    np.add.at(marks, (rows0, cols1), -1)
+    np.add.at(marks, (rows1, cols0), -1)
+    np.add.at(marks, (rows1, cols1), 1)
+    covered = marks.cumsum(axis=0).cumsum(axis=1)[:height, :width] > 0
+    return float(covered.mean())
+
+
+def _clipped_box_area(
+    page_rect: fitz.Rect, boxes: List[Tuple[float, float, float, float]]
+) -> float:
+    """Summed area of ``(x0, y0, x1, y1)`` boxes clipped to the page."""
+    if not boxes:
+        return 0.0
+    array = np.asarray(boxes, dtype=np.float64)
+    x0 = np.clip(array[:, 0], page_rect.x0, page_rect.x1)
+    x1 = np.clip(array[:, 2], page_rect.x0, page_rect.x1)
+    y0 = np.clip(array[:, 1], page_rect.y0, page_rect.y1)
+    y1 = np.clip(array[:, 3], page_rect.y0, page_rect.y1)
+    return float((np.maximum(x1 - x0, 0.0) * np.maximum(y1 - y0, 0.0)).sum())
+
+
+def _may_paint_images(page: fitz.Page) -> bool:
+    """Ink that get_drawings does not report, so the metadata bound is unsure.
+
+    Images, shadings or patterns in the page resources, any Form XObject
+    (it may hold its own images, shadings or patterns) and any annotation
+    except links (appearance streams are drawn by the raster path).
+    """
+    if page.get_images(full=True) or page.get_xobjects():
+        return True
+    for key in ("Resources/Shading", "Resources/Pattern"):
+        kind, _ = page.parent.xref_get_key(page.xref, key)
+        if kind != "null":
+            return True
+    return any(kind != fitz.PDF_ANNOT_LINK for _, kind, _ in page.annot_xrefs())
+
+
+def _estimate_layout_complexity(page: fitz.Page, words: Optional[list] = None) -> float:
+    if words is None:
+        words = page.get_text("words")
     if not words:
         return 0.0
     line_keys = [(w[5], w[6]) for w in words]
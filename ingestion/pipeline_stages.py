@@ -0,0 +1,204 @@
+"""Ingestion stages running concurrently over bounded queues.
+
+Each stage is a single thread that pulls items from the previous stage and
+hands its outputs on through a queue of at most ``queue_size`` items, so a
+slow stage back-pressures the ones before it instead of letting memory grow.
+Items leave a stage in the order it yields them; order-dependent state (the
+canonicalization heading stack, macro ids) therefore stays correct as long
+as every stage is one generator on one thread. The last stage (``sink``)
+runs on the calling thread.
+
+Progress callbacks (e.g. Streamlit's) may only be safe on the calling
+thread: ``progress_cb`` queues calls made on stage threads and the sink
+delivers them while it waits for items. A failure in any stage is re-raised
+by the sink; leaving the ``with`` block stops and joins the stage threads.
+``StageStats`` separates time spent working from time waiting on the
+previous stage and on a full queue.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+_POLL_SECONDS = 0.1
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+    input_wait_seconds: float = 0.0
+    output_wait_seconds: float = 0.0
+
+    def utilization(self, wall_seconds: float) -> float:
+        """Share of the pipeline's wall time this stage spent working."""
+        if wall_seconds <= 0:
+            return 0.0
+        return min(self.busy_seconds / wall_seconds, 1.0)
+
+
+@dataclass(frozen=True)
+class _Failure:
+    error: BaseException
+
+
+class StagedPipeline:
+    def __init__(self, queue_size: int, progress_cb=None) -> None:
+        self._queue_size = max(1, queue_size)
+        self._owner = threading.get_ident()
+        self._target_cb = progress_cb
+        self._events: "queue.SimpleQueue[Tuple[Any, ...]]" = queue.SimpleQueue()
+        self.progress_cb = self._relay_progress if progress_cb else None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self.stats: List[StageStats] = []
+
+    def __enter__(self) -> "StagedPipeline":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    @property
+    def wall_seconds(self) -> float:
+        return (self._finished or time.perf_counter()) - self._started
+
+    def stage(
+        self,
+        name: str,
+        func: Callable[..., Iterable[Any]],
+        upstream: Optional[Iterable[Any]] = None,
+    ) -> Iterator[Any]:
+        """Run ``func(upstream)`` (or ``func()`` for a source) on its own thread."""
+        stats = StageStats(name)
+        self.stats.append(stats)
+        outbox: "queue.Queue[Any]" = queue.Queue(maxsize=self._queue_size)
+        thread = threading.Thread(
+            target=self._run,
+            args=(func, upstream, stats, outbox),
+            name=f"ingest-{name}",
+            daemon=True,
+        )
+        thread.start()
+        self._threads.append(thread)
+        return self._drain(outbox)
+
+    def sink(self, name: str, func: Callable[[Iterable[Any]], Any], upstream: Iterable[Any]) -> Any:
+        """Run the final stage on the calling thread and return its result."""
+        stats = StageStats(name)
+        self.stats.append(stats)
+        started = time.perf_counter()
+        try:
+            return func(self._timed(upstream, stats))
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.busy_seconds = elapsed - stats.input_wait_seconds
+            self._finished = time.perf_counter()
+
+    def close(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        if self._finished is None:
+            self._finished = time.perf_counter()
+        self._deliver_progress()
+
+    def _relay_progress(self, *event: Any) -> None:
+        self._events.put(event)
+        if threading.get_ident() == self._owner:
+            self._deliver_progress()
+
+    def _deliver_progress(self) -> None:
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                return
+            self._target_cb(*event)
+
+    def _run(
+        self,
+        func: Callable[..., Iterable[Any]],
+        upstream: Optional[Iterable[Any]],
+        stats: StageStats,
+        outbox: "queue.Queue[Any]",
+    ) -> None:
+        outputs = None
+        try:
+            if upstream is None:
+                outputs = iter(func())
+            else:
+                outputs = iter(func(self._timed(upstream, stats)))
+            while self._produce(outputs, stats, outbox):
+                pass
+            self._put(outbox, _DONE, stats)
+        except BaseException as exc:  # forwarded to the sink
+            self._put(outbox, _Failure(exc), stats)
+        finally:
+            close = getattr(outputs, "close", None)
+            if close is not None:
+                close()
+
+    def _produce(self, outputs: Iterator[Any], stats: StageStats, outbox: "queue.Queue[Any]") -> bool:
+        """Pull one item and pass it on; False when the stage is exhausted or stopped."""
+        started = time.perf_counter()
+        waited = stats.input_wait_seconds
+        try:
+            item = next(outputs)
+        except StopIteration:
+            return False
+        finally:
+            stats.busy_seconds += (
+                time.perf_counter() - started - (stats.input_wait_seconds - waited)
+            )
+        stats.items += 1
+        return self._put(outbox, item, stats)
+
+    def _put(self, outbox: "queue.Queue[Any]", item: Any, stats: StageStats) -> bool:
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    outbox.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.output_wait_seconds += time.perf_counter() - started
+
+    def _drain(self, outbox: "queue.Queue[Any]") -> Iterator[Any]:
+        on_owner = threading.get_ident() == self._owner
+        while True:
+            if on_owner:
+                self._deliver_progress()
+            try:
+                item = outbox.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    @staticmethod
+    def _timed(upstream: Iterable[Any], stats: StageStats) -> Iterator[Any]:
+        iterator = iter(upstream)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                stats.input_wait_seconds += time.perf_counter() - started
+            yield item
@@ -0,0 +1,125 @@
+"""Page triage across a process pool.
+
+Each worker opens the PDF once and triages contiguous page ranges with
+``pdf_analysis.analyze_page``. Results are yielded in page order while
+progress is reported as pages complete in any order. With an
+``artifact_dir``, each page is triaged from one TextPage and its extraction
+artifact is written there by whichever process triaged it.
+"""
+
+import math
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from typing import AbstractSet, Dict, Iterator, List, Optional, Tuple
+
+import fitz
+
+from core.contracts import TriageDecision
+from ingestion.page_extraction import extraction_path, triage_and_extract, write_extraction
+from ingestion.pdf_analysis import analyze_page
+
+_WORKER_PDF: Optional[fitz.Document] = None
+_WORKER_ARTIFACT_DIR: Optional[str] = None
+
+
+def iter_page_triage(
+    pdf_path: str,
+    page_count: int,
+    workers: int,
+    progress_cb=None,
+    artifact_dir: Optional[str] = None,
+    first_index: int = 0,
+    skip: AbstractSet[int] = frozenset(),
+) -> Iterator[Tuple[int, TriageDecision]]:
+    """Yield ``(page_index, triage)`` for pages ``first_index``.. not in ``skip``, in order."""
+    indices = [index for index in range(first_index, page_count) if index not in skip]
+    if not indices:
+        return
+    if workers <= 1 or len(indices) <= 1:
+        yield from _serial_triage(pdf_path, page_count, progress_cb, artifact_dir, indices)
+        return
+    ranges = _page_ranges(page_count, workers, first_index, skip)
+    done: Dict[int, TriageDecision] = {}
+    pending_indices = iter(indices)
+    next_index = next(pending_indices)
+    completed = page_count - len(indices)
+    executor = ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)),
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(pdf_path, artifact_dir),
+    )
+    try:
+        pending = {executor.submit(_triage_range, start, end) for start, end in ranges}
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results = future.result()
+                done.update(results)
+                completed += len(results)
+            if progress_cb:
+                progress_cb("triage", completed, page_count)
+            while next_index in done:
+                yield next_index, done.pop(next_index)
+                next_index = next(pending_indices, None)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _serial_triage(
+    pdf_path: str,
+    page_count: int,
+    progress_cb=None,
+    artifact_dir: Optional[str] = None,
+    indices: Optional[List[int]] = None,
+) -> Iterator[Tuple[int, TriageDecision]]:
+    pdf = fitz.open(pdf_path)
+    try:
+        for page_index in range(page_count) if indices is None else indices:
+            if progress_cb:
+                progress_cb("triage", page_index + 1, page_count)
+            yield page_index, _triage_page(pdf, page_index, artifact_dir)
+    finally:
+        pdf.close()
+
+
+def _page_ranges(
+    page_count: int, workers: int, first_index: int = 0, skip: AbstractSet[int] = frozenset()
+) -> List[Tuple[int, int]]:
+    """Split the pages to triage into ~4 ranges per worker (at most 16 pages each).
+
+    Ranges are contiguous, so a skipped page ends the range before it.
+    """
+    indices = [index for index in range(first_index, page_count) if index not in skip]
+    size = max(1, min(16, math.ceil(len(indices) / (workers * 4))))
+    ranges: List[Tuple[int, int]] = []
+    for index in indices:
+        if ranges and ranges[-1][1] == index and index - ranges[-1][0] < size:
+            ranges[-1] = (ranges[-1][0], index + 1)
+        else:
+            ranges.append((index, index + 1))
+    return ranges
+
+
+def _init_worker(pdf_path: str, artifact_dir: Optional[str]) -> None:
+    global _WORKER_PDF, _WORKER_ARTIFACT_DIR
+    _WORKER_PDF = fitz.open(pdf_path)
+    _WORKER_ARTIFACT_DIR = artifact_dir
+
+
+def _triage_range(start: int, end: int) -> Dict[int, TriageDecision]:
+    return {
+        page_index: _triage_page(_WORKER_PDF, page_index, _WORKER_ARTIFACT_DIR)
+        for page_index in range(start, end)
+    }
+
+
+def _triage_page(
+    pdf: fitz.Document, page_index: int, artifact_dir: Optional[str]
+) -> TriageDecision:
+    page = pdf.load_page(page_index)
+    if artifact_dir is None:
+        return analyze_page(page)
+    triage, extraction = triage_and_extract(page, page_index + 1)
+    write_extraction(extraction_path(artifact_dir, page_index + 1), extraction)
+    return triage
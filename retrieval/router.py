@@ -215,7 +215,9 @@ def search_with_intent_debug(
         "expansion": None,
         "top_chunks": [],
         "section_targeting": None,
+        "query_embedding_cache": None,
     }
+    cache_before = vector_search.query_embedding_stats()
     intent = classify_query(query)
     debug["query_type"] = intent.intent
     debug["coverage_type"] = intent.coverage_type
@@ -227,6 +229,9 @@ def search_with_intent_debug(
     debug["top_chunks"] = _format_top_chunks(selected)
     if not debug["expansion"]:
         debug["expansion"] = _summarize_expansion_from_chunks(selected)
+    debug["query_embedding_cache"] = (
+        vector_search.query_embedding_stats().since(cache_before).as_dict()
+    )
     _log_debug(debug)
     return selected, debug
 
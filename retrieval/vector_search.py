@@ -3,17 +3,22 @@ from typing import List, Optional
 from pgvector.psycopg2 import register_vector
 
 from core.contracts import RetrievedChunk
-from embedding.model_registry import get_embedding_model
+from embedding.model_registry import get_query_encoder
+from embedding.query_encoder import QueryCacheStats
 from storage.db import get_connection
 
 
+def query_embedding_stats() -> QueryCacheStats:
+    """Process-wide query embedding cache counters (see embedding/query_encoder.py)."""
+    return get_query_encoder().stats()
+
+
 def search(
     doc_id: str,
     query: str,
     top_k: int = 3,
 ) -> List[RetrievedChunk]:
-    embedder = get_embedding_model()
-    query_embedding = embedder.embed_text(query)
+    query_embedding = get_query_encoder().embed(query)
     with get_connection() as conn:
         register_vector(conn)
         with conn.cursor() as cursor:
@@ -72,8 +77,7 @@ def search_on_pages(
 ) -> List[RetrievedChunk]:
     if not page_numbers:
         return []
-    embedder = get_embedding_model()
-    query_embedding = embedder.embed_text(query)
+    query_embedding = get_query_encoder().embed(query)
     with get_connection() as conn:
         register_vector(conn)
         with conn.cursor() as cursor:
@@ -0,0 +1,167 @@
+"""Disk size and per-page load time of legacy vs compact DI page storage.
+
+Uses the ``page_*_di.json`` files in ``--di-dir`` when given, otherwise
+synthetic prebuilt-layout payloads (words, lines, spans, paragraphs and a
+table per page). Each page is stored three ways in a scratch directory:
+legacy JSON (indent=2, ensure_ascii), compact per-page gzip and the packed
+document. Load time is the time to get one page's payload the way
+``_canonicalize_from_di`` does. Prints a table and writes a JSON report.
+
+Usage: python scripts/bench_di_storage.py [--di-dir data/<doc_id>] [--pages 200]
+           [--output bench_di_storage.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from ingestion.di_store import load_di_page, pack_document, write_di_page
+
+
+def synthetic_payload(page_number: int, rng: random.Random) -> dict:
+    words, lines, offset = [], [], 0
+    for line_index in range(45):
+        texts = [f"word{rng.randint(0, 9999)}" for _ in range(rng.randint(4, 12))]
+        y = 0.5 + line_index * 0.22
+        for word_index, text in enumerate(texts):
+            x = 0.5 + word_index * 0.6
+            words.append(
+                {
+                    "content": text,
+                    "polygon": [x, y, x + 0.5, y, x + 0.5, y + 0.15, x, y + 0.15],
+                    "confidence": round(rng.uniform(0.9, 1.0), 3),
+                    "span": {"offset": offset, "length": len(text)},
+                }
+            )
+            offset += len(text) + 1
+        lines.append(
+            {
+                "content": " ".join(texts),
+                "polygon": [0.5, y, 7.5, y, 7.5, y + 0.15, 0.5, y + 0.15],
+                "spans": [{"offset": offset - len(" ".join(texts)) - 1, "length": len(texts)}],
+            }
+        )
+    region = {"pageNumber": page_number, "polygon": [0.5, 8.0, 7.5, 8.0, 7.5, 10.0, 0.5, 10.0]}
+    cells = [
+        {
+            "kind": "content",
+            "rowIndex": row,
+            "columnIndex": col,
+            "content": f"{rng.randint(0, 99999):,}",
+            "boundingRegions": [region],
+            "spans": [{"offset": 0, "length": 5}],
+        }
+        for row in range(10)
+        for col in range(5)
+    ]
+    return {
+        "apiVersion": "2024-11-30",
+        "modelId": "prebuilt-layout",
+        "content": "\n".join(line["content"] for line in lines),
+        "pages": [
+            {
+                "pageNumber": page_number,
+                "angle": 0,
+                "width": 8.5,
+                "height": 11,
+                "unit": "inch",
+                "words": words,
+                "lines": lines,
+                "spans": [{"offset": 0, "length": offset}],
+            }
+        ],
+        "paragraphs": [
+            {"content": line["content"], "boundingRegions": [region], "spans": line["spans"]}
+            for line in lines
+        ],
+        "tables": [
+            {"rowCount": 10, "columnCount": 5, "cells": cells, "boundingRegions": [region]}
+        ],
+    }
+
+
+def load_payloads(di_dir: str, pages: int) -> Dict[str, dict]:
+    if di_dir:
+        payloads = {}
+        for path in sorted(glob.glob(os.path.join(di_dir, "page_*_di.json"))):
+            with open(path, "r", encoding="utf-8") as handle:
+                payloads[os.path.basename(path)] = json.load(handle)
+        return payloads
+    rng = random.Random(0)
+    return {
+        f"page_{number:04d}_di.json": synthetic_payload(number, rng)
+        for number in range(1, pages + 1)
+    }
+
+
+def directory_bytes(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def time_loads(paths: List[str], loader) -> float:
+    started = time.perf_counter()
+    for path in paths:
+        loader(path)
+    return (time.perf_counter() - started) / max(len(paths), 1) * 1000
+
+
+def legacy_load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--di-dir", default="")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--output", default="bench_di_storage.json")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.di_dir, args.pages)
+    scratch = tempfile.mkdtemp(prefix="bench_di_storage_")
+    try:
+        dirs = {mode: os.path.join(scratch, mode) for mode in ("legacy", "gzip", "pack")}
+        for directory in dirs.values():
+            os.makedirs(directory)
+        for name, payload in payloads.items():
+            with open(os.path.join(dirs["legacy"], name), "w", encoding="utf-8") as handle:
+                json.dump(payload, handle, ensure_ascii=True, indent=2)
+            write_di_page(os.path.join(dirs["gzip"], name), payload)
+            write_di_page(os.path.join(dirs["pack"], name), payload)
+        pack_document(dirs["pack"])
+        report = {"pages": len(payloads), "modes": {}}
+        for mode, directory in dirs.items():
+            paths = [os.path.join(directory, name) for name in payloads]
+            loader = legacy_load if mode == "legacy" else load_di_page
+            report["modes"][mode] = {
+                "disk_bytes": directory_bytes(directory),
+                "load_ms_per_page": time_loads(paths, loader),
+            }
+        legacy = report["modes"]["legacy"]
+        for mode, entry in report["modes"].items():
+            entry["size_ratio"] = entry["disk_bytes"] / legacy["disk_bytes"]
+            entry["load_speedup"] = legacy["load_ms_per_page"] / entry["load_ms_per_page"]
+            print(
+                f"{mode:>6}: {entry['disk_bytes'] / 1024:10.1f} KiB "
+                f"({entry['size_ratio']:.3f}x) load={entry['load_ms_per_page']:.3f} ms/page "
+                f"({entry['load_speedup']:.1f}x)"
+            )
+    finally:
+        shutil.rmtree(scratch)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Throughput comparison of embedding backends (torch vs ONNX vs ONNX int8).
+
+Runs the equivalence gate for each backend against torch fp32 and times the
+forward pass over synthetic macro chunks of several lengths. Prints a table
+and writes a JSON report.
+
+Usage: python scripts/bench_embedding_backends.py [--backends torch onnx onnx-int8]
+           [--lengths 512 2048 8192] [--repeats 3] [--output bench_backends.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core.config import settings
+from embedding.equivalence import EQUIVALENCE_CORPUS, check_equivalence
+from embedding.model_registry import _load_onnx_embedder, _load_torch_embedder
+
+
+def build_macro_text(embedder, target_tokens: int) -> str:
+    """Repeat the equivalence corpus until it tokenizes to ~target_tokens."""
+    paragraph = "\n".join(EQUIVALENCE_CORPUS)
+    text = paragraph
+    while len(embedder.tokenize_text(text)) < target_tokens:
+        text = f"{text}\n{paragraph}"
+    tokens = embedder.tokenize_text(text)
+    return text[: tokens.offsets[min(target_tokens, len(tokens)) - 1][1]]
+
+
+def time_backend(embedder, texts: List[str], repeats: int) -> Dict[str, float]:
+    tokenized = [embedder.tokenize(text) for text in texts]
+    embedder.encode(tokenized[0])
+    total_tokens = sum(int(t.input_ids.shape[-1]) for t in tokenized) * repeats
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for item in tokenized:
+            embedder.encode(item)
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "tokens": total_tokens, "tokens_per_s": total_tokens / seconds}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[512, 2048, 8192])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="bench_backends.json")
+    args = parser.parse_args()
+
+    reference = _load_torch_embedder(max(args.lengths))
+    texts = [build_macro_text(reference, length) for length in args.lengths]
+    report = {"model": settings.embedding_model, "lengths": args.lengths, "backends": {}}
+    for backend in args.backends:
+        embedder = reference
+        if backend != "torch":
+            embedder = _load_onnx_embedder(max(args.lengths), quantize=backend == "onnx-int8")
+        equivalence = check_equivalence(
+            reference, embedder, settings.embedding_equivalence_min_cosine, backend
+        )
+        timing = time_backend(embedder, texts, args.repeats)
+        report["backends"][backend] = {
+            **timing,
+            "min_cosine": equivalence.min_cosine,
+            "mean_cosine": equivalence.mean_cosine,
+            "passed": equivalence.passed,
+        }
+    baseline = report["backends"].get("torch", {}).get("tokens_per_s")
+    for backend, entry in report["backends"].items():
+        entry["speedup_vs_torch"] = entry["tokens_per_s"] / baseline if baseline else None
+        print(
+            f"{backend:>10}: {entry['tokens_per_s']:10.1f} tok/s "
+            f"speedup={entry['speedup_vs_torch'] or 0:5.2f}x "
+            f"min_cos={entry['min_cosine']:.5f} passed={entry['passed']}"
+        )
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Peak memory and throughput of fp32 vs reduced-precision (bf16/fp16) encoding.
+
+Each precision runs in a fresh process so that peak RSS is not polluted by the
+other modes. Child-span embeddings (256-token segment means, as in ingest)
+are compared against fp32 with the equivalence threshold. Prints a table and
+writes a JSON report.
+
+Usage: python scripts/bench_embedding_precision.py [--precisions fp32 bf16 fp16]
+           [--macro-tokens 8192] [--repeats 3] [--output bench_precision.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core.config import settings
+from embedding.equivalence import cosine_similarities
+
+
+def run_precision(precision: str, macro_tokens: int, repeats: int) -> Dict[str, object]:
+    """Load the model, encode one macro ``repeats`` times, pool child spans."""
+    from embedding.late_chunking import _build_child_spans, _pool_segments
+    from embedding.model_registry import _load_torch_embedder
+    from scripts.bench_embedding_backends import build_macro_text
+
+    embedder = _load_torch_embedder(macro_tokens + 2).with_precision(precision)
+    tokenized = embedder.tokenize(build_macro_text(embedder, macro_tokens))
+    segments = _build_child_spans(tokenized.offsets, 256)
+    rss_loaded_mb = _max_rss_mb()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        hidden = embedder.encode(tokenized)
+        pooled = _pool_segments(hidden, segments)
+    seconds = time.perf_counter() - started
+    tokens = int(tokenized.input_ids.shape[-1]) * repeats
+    return {
+        "tokens_per_s": tokens / seconds,
+        "peak_rss_mb": _max_rss_mb(),
+        "encode_peak_delta_mb": _max_rss_mb() - rss_loaded_mb,
+        "hidden_state_mb": hidden.numel() * hidden.element_size() / 2**20,
+        "child_embeddings": pooled.tolist(),
+    }
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "bf16", "fp16"])
+    parser.add_argument("--macro-tokens", type=int, default=8192)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="bench_precision.json")
+    args = parser.parse_args()
+
+    results = {}
+    for precision in ["fp32", *[p for p in args.precisions if p != "fp32"]]:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results[precision] = executor.submit(
+                run_precision, precision, args.macro_tokens, args.repeats
+            ).result()
+    reference = results["fp32"]["child_embeddings"]
+    report = {"model": settings.embedding_model, "macro_tokens": args.macro_tokens, "modes": {}}
+    for precision, entry in results.items():
+        cosines = cosine_similarities(reference, entry.pop("child_embeddings"))
+        entry["min_cosine"] = float(cosines.min())
+        entry["passed"] = entry["min_cosine"] >= settings.embedding_equivalence_min_cosine
+        entry["speedup_vs_fp32"] = entry["tokens_per_s"] / results["fp32"]["tokens_per_s"]
+        report["modes"][precision] = entry
+        print(
+            f"{precision:>5}: {entry['tokens_per_s']:9.1f} tok/s "
+            f"speedup={entry['speedup_vs_fp32']:5.2f}x "
+            f"peak_rss={entry['peak_rss_mb']:8.1f}MB "
+            f"encode_delta={entry['encode_peak_delta_mb']:7.1f}MB "
+            f"hidden={entry['hidden_state_mb']:6.1f}MB "
+            f"min_cos={entry['min_cosine']:.5f} passed={entry['passed']}"
+        )
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Scaling benchmark for the multi-process embedding worker pool.
+
+Encodes the same synthetic macro chunks with every (workers, threads per
+worker) combination and reports throughput against in-process encoding with
+all cores. Prints a table, the best configuration, and writes a JSON report.
+
+Usage: python scripts/bench_embedding_workers.py [--workers 1 2 4 8]
+           [--threads 0 1 2 4] [--macros 32] [--macro-tokens 2048]
+           [--output bench_workers.json]
+
+``--threads 0`` means cpu_count // workers.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import torch
+
+from core.config import settings
+from embedding.late_chunking import encode_pooled_batch
+from embedding.model_registry import _load_torch_embedder
+from embedding.worker_pool import EmbeddingWorkerPool, default_threads_per_worker
+from scripts.bench_embedding_backends import build_macro_text
+
+
+def build_payloads(embedder, macros: int, macro_tokens: int) -> List[list]:
+    text = build_macro_text(embedder, macro_tokens)
+    tokenized = embedder.tokenize(text)
+    segments = [(0, len(text), list(range(1, int(tokenized.input_ids.shape[-1]) - 1)))]
+    return [[(tokenized, segments, None)] for _ in range(macros)]
+
+
+def time_in_process(embedder, payloads: List[list]) -> float:
+    torch.set_num_threads(os.cpu_count() or 1)
+    encode_pooled_batch(embedder, payloads[0])
+    started = time.perf_counter()
+    for payload in payloads:
+        encode_pooled_batch(embedder, payload)
+    return time.perf_counter() - started
+
+
+def time_pool(workers: int, threads: int, payloads: List[list], max_length: int) -> float:
+    pool = EmbeddingWorkerPool(workers, threads, max_length=max_length)
+    try:
+        list(pool.map_batches(payloads[:workers]))
+        started = time.perf_counter()
+        list(pool.map_batches(payloads))
+        return time.perf_counter() - started
+    finally:
+        pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--macros", type=int, default=32)
+    parser.add_argument("--macro-tokens", type=int, default=2048)
+    parser.add_argument("--output", default="bench_workers.json")
+    args = parser.parse_args()
+
+    embedder = _load_torch_embedder(args.macro_tokens + 2)
+    payloads = build_payloads(embedder, args.macros, args.macro_tokens)
+    tokens = args.macros * int(payloads[0][0][0].input_ids.shape[-1])
+    baseline = tokens / time_in_process(embedder, payloads)
+    report: Dict[str, object] = {
+        "model": settings.embedding_model,
+        "cpu_count": os.cpu_count(),
+        "tokens": tokens,
+        "in_process_tokens_per_s": baseline,
+        "configs": [],
+    }
+    print(f"in-process: {baseline:10.1f} tok/s")
+    for workers in args.workers:
+        for threads in sorted({t or default_threads_per_worker(workers) for t in args.threads}):
+            tokens_per_s = tokens / time_pool(workers, threads, payloads, args.macro_tokens + 2)
+            report["configs"].append(
+                {
+                    "workers": workers,
+                    "threads_per_worker": threads,
+                    "tokens_per_s": tokens_per_s,
+                    "speedup": tokens_per_s / baseline,
+                }
+            )
+            print(
+                f"workers={workers:2d} threads={threads:2d}: "
+                f"{tokens_per_s:10.1f} tok/s speedup={tokens_per_s / baseline:5.2f}x"
+            )
+    best = max(report["configs"], key=lambda entry: entry["tokens_per_s"])
+    report["best"] = best
+    print(
+        f"best: EMBED_WORKERS={best['workers']} "
+        f"EMBED_THREADS_PER_WORKER={best['threads_per_worker']}"
+    )
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
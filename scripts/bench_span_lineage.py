@@ -0,0 +1,93 @@
+"""Micro-benchmark: chunk lineage lookup, linear span scan vs SpanIndex.
+
+Builds synthetic DI-dense pages with thousands of line spans and queries the
+lineage of ~256-token child windows the way late chunking does.
+
+Usage: python scripts/bench_span_lineage.py [--spans 1000 5000 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core.contracts import CanonicalSpan
+from embedding.span_index import SpanIndex
+
+LINE_CHARS = 48
+CHILD_CHARS = 1100
+
+
+def build_spans(count: int) -> List[CanonicalSpan]:
+    spans = []
+    for index in range(count):
+        start = index * (LINE_CHARS + 1)
+        spans.append(
+            CanonicalSpan(
+                text="x" * LINE_CHARS,
+                char_start=start,
+                char_end=start + LINE_CHARS,
+                polygons=[{"page_number": 1, "polygon": []}],
+                source_type="di",
+                page_number=1,
+                heading_path="doc/S",
+                section_id="S",
+                is_table=False,
+            )
+        )
+    return spans
+
+
+def linear_lineage(spans: List[CanonicalSpan], char_start: int, char_end: int) -> Tuple:
+    """The pre-index implementation: scan every span for every child."""
+    polygons, page_numbers = [], []
+    for span in spans:
+        if span.char_end <= char_start or span.char_start >= char_end:
+            continue
+        polygons.extend(span.polygons)
+        if span.page_number not in page_numbers:
+            page_numbers.append(span.page_number)
+    return polygons, sorted(page_numbers)
+
+
+def child_windows(spans: List[CanonicalSpan]) -> List[Tuple[int, int]]:
+    total = spans[-1].char_end
+    return [(start, min(start + CHILD_CHARS, total)) for start in range(0, total, CHILD_CHARS)]
+
+
+def run(count: int) -> None:
+    spans = build_spans(count)
+    windows = child_windows(spans)
+
+    started = time.perf_counter()
+    linear = [linear_lineage(spans, start, end) for start, end in windows]
+    linear_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = SpanIndex(spans)
+    indexed = [index.lineage(start, end)[:2] for start, end in windows]
+    indexed_s = time.perf_counter() - started
+
+    assert indexed == linear
+    print(
+        f"spans={count:>6} children={len(windows):>5} "
+        f"linear={linear_s * 1000:9.2f}ms index={indexed_s * 1000:8.2f}ms "
+        f"speedup={linear_s / max(indexed_s, 1e-9):7.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spans", type=int, nargs="+", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+    for count in args.spans:
+        run(count)
+
+
+if __name__ == "__main__":
+    main()
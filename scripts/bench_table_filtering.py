@@ -0,0 +1,170 @@
+"""Micro-benchmark: table-region word/line filtering on dense statement pages.
+
+Builds a synthetic native page (words in tight rows, most of them under a
+grid of table boxes) and the DI lines of the same layout, then compares the
+pre-vectorization filtering (dict-based line grouping, every word checked
+against every table box in Python, DI polygons converted twice per line)
+with the NumPy path canonicalization uses. Both must produce the same line
+entries; table extraction and heading detection are common to both and are
+left out.
+
+Usage: python scripts/bench_table_filtering.py [--words 1000 4000 12000]
+           [--tables 4 16 64] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from ingestion import canonicalize
+from ingestion.canonicalize import TableBlock
+from ingestion.page_extraction import PageExtraction, group_lines
+
+WORDS_PER_LINE = 12
+LINE_HEIGHT = 4.0
+WORD_WIDTH = 40.0
+
+LineEntry = Tuple[str, List[Dict[str, float]]]
+
+
+def build_words(count: int) -> List[Tuple]:
+    words = []
+    for index in range(count):
+        line, column = divmod(index, WORDS_PER_LINE)
+        x0 = 20.0 + column * (WORD_WIDTH + 5.0)
+        y0 = 20.0 + line * LINE_HEIGHT
+        block, block_line = divmod(line, 40)
+        words.append((x0, y0, x0 + WORD_WIDTH, y0 + 3.0, f"w{index}", block, block_line, column))
+    return words
+
+
+def build_tables(words: List[Tuple], count: int) -> List[TableBlock]:
+    """``count`` bands covering about three quarters of the page height."""
+    top, bottom = words[0][1], words[-1][3]
+    band = (bottom - top) / count
+    tables = []
+    for index in range(count):
+        bbox = (100.0, top + band * index, 520.0, top + band * (index + 0.75))
+        tables.append(
+            TableBlock(markdown="", polygon=canonicalize._polygon_from_bbox(*bbox), bbox=bbox)
+        )
+    return tables
+
+
+def build_di_lines(words: List[Tuple]) -> List[Dict[str, Any]]:
+    lines: Dict[Tuple[int, int], List[Tuple]] = {}
+    for word in words:
+        lines.setdefault((word[5], word[6]), []).append(word)
+    return [
+        {
+            "content": " ".join(word[4] for word in line),
+            "polygon": [
+                line[0][0], line[0][1], line[-1][2], line[0][1],
+                line[-1][2], line[-1][3], line[0][0], line[-1][3],
+            ],
+        }
+        for _, line in sorted(lines.items())
+    ]
+
+
+def reference_native(words: List[Tuple], tables: List[TableBlock]) -> List[LineEntry]:
+    """The pre-vectorization path: group lines in a dict, scan every table per word."""
+    bboxes = [table.bbox for table in tables]
+    lines: Dict[Tuple[int, int], List[int]] = {}
+    for index, word in enumerate(words):
+        lines.setdefault((word[5], word[6]), []).append(index)
+    entries = []
+    for _, indices in sorted(lines.items()):
+        indices = sorted(indices, key=lambda index: words[index][0])
+        kept = [words[index] for index in indices if not _overlaps(words[index][:4], bboxes)]
+        if not kept:
+            continue
+        polygon = canonicalize._polygon_from_bbox(
+            min(w[0] for w in kept), min(w[1] for w in kept),
+            max(w[2] for w in kept), max(w[3] for w in kept),
+        )
+        entries.append((" ".join(word[4] for word in kept), polygon))
+    return entries
+
+
+def reference_di(lines: List[Dict[str, Any]], tables: List[TableBlock]) -> List[LineEntry]:
+    bboxes = [table.bbox for table in tables]
+    return [
+        (line.get("content", ""), canonicalize._polygon_from_di(line.get("polygon", [])))
+        for line in lines
+        if not _polygon_overlaps(canonicalize._polygon_from_di(line.get("polygon", [])), bboxes)
+    ]
+
+
+def _polygon_overlaps(polygon: List[Dict[str, float]], bboxes: List[Tuple]) -> bool:
+    bbox = canonicalize._bbox_from_polygon(polygon)
+    return bool(bbox) and _overlaps(bbox, bboxes)
+
+
+def _overlaps(bbox: Tuple, bboxes: List[Tuple]) -> bool:
+    ax0, ay0, ax1, ay1 = bbox
+    return any(
+        ax0 <= bx1 and ax1 >= bx0 and ay0 <= by1 and ay1 >= by0
+        for bx0, by0, bx1, by1 in bboxes
+    )
+
+
+def vectorized_native(words: List[Tuple], tables: List[TableBlock]) -> List[LineEntry]:
+    extraction = PageExtraction(1, words, group_lines(words), [])
+    return canonicalize._native_line_entries(extraction, tables)
+
+
+def best_of(repeat: int, run: Callable[[], Any]) -> Tuple[float, Any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(count: int, table_count: int, repeat: int) -> None:
+    words = build_words(count)
+    tables = build_tables(words, table_count)
+    di_lines = build_di_lines(words)
+    cases = {
+        "native": (
+            lambda: reference_native(words, tables),
+            lambda: vectorized_native(words, tables),
+        ),
+        "di": (
+            lambda: reference_di(di_lines, tables),
+            lambda: canonicalize._di_line_entries(di_lines, tables),
+        ),
+    }
+    for source, (reference, vectorized) in cases.items():
+        reference_s, expected = best_of(repeat, reference)
+        vectorized_s, actual = best_of(repeat, vectorized)
+        assert actual == expected, f"{source} line entries differ"
+        print(
+            f"{source:<6} words={count:>6} tables={table_count:>3} "
+            f"lines_kept={len(actual):>5} reference={reference_s * 1000:8.2f}ms "
+            f"vectorized={vectorized_s * 1000:8.2f}ms "
+            f"speedup={reference_s / max(vectorized_s, 1e-9):5.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 4000, 12000])
+    parser.add_argument("--tables", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for count in args.words:
+        for table_count in args.tables:
+            run(count, table_count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Agreement and speed of raster-free image coverage triage vs the raster path.
+
+For every page of the given PDFs, computes image_coverage_ratio with the
+raster path and with the metadata-first path (sharing the word list that
+triage extracts anyway for layout complexity), then reports how often the
+metadata path answered without rendering, whether the high_image_coverage
+decision agrees, the value error, and the per-page time saved.
+
+Usage: python scripts/bench_triage_coverage.py file1.pdf [file2.pdf ...]
+           [--output bench_triage_coverage.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import fitz
+
+from ingestion.pdf_analysis import (
+    HIGH_IMAGE_COVERAGE_THRESHOLD,
+    _estimate_image_coverage,
+    _estimate_image_coverage_metadata,
+)
+
+
+def compare_page(page: fitz.Page) -> Dict[str, object]:
+    started = time.perf_counter()
+    raster = _estimate_image_coverage(page)
+    raster_seconds = time.perf_counter() - started
+    words = page.get_text("words")
+    started = time.perf_counter()
+    estimate = _estimate_image_coverage_metadata(page, words)
+    if estimate is None:
+        estimate = _estimate_image_coverage(page)
+        fast_path = False
+    else:
+        fast_path = True
+    metadata_seconds = time.perf_counter() - started
+    return {
+        "raster": raster,
+        "metadata": estimate,
+        "fast_path": fast_path,
+        "agree": (raster > HIGH_IMAGE_COVERAGE_THRESHOLD)
+        == (estimate > HIGH_IMAGE_COVERAGE_THRESHOLD),
+        "abs_error": abs(raster - estimate),
+        "raster_ms": raster_seconds * 1000,
+        "metadata_ms": metadata_seconds * 1000,
+    }
+
+
+def summarize(rows: List[Dict[str, object]]) -> Dict[str, float]:
+    count = max(len(rows), 1)
+    return {
+        "pages": len(rows),
+        "fast_path_rate": sum(row["fast_path"] for row in rows) / count,
+        "decision_agreement": sum(row["agree"] for row in rows) / count,
+        "max_abs_error": max((row["abs_error"] for row in rows), default=0.0),
+        "mean_raster_ms": sum(row["raster_ms"] for row in rows) / count,
+        "mean_metadata_ms": sum(row["metadata_ms"] for row in rows) / count,
+        "mean_saved_ms": sum(row["raster_ms"] - row["metadata_ms"] for row in rows) / count,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--output", default="bench_triage_coverage.json")
+    args = parser.parse_args()
+
+    report: Dict[str, object] = {"documents": {}}
+    all_rows: List[Dict[str, object]] = []
+    for path in args.pdfs:
+        pdf = fitz.open(path)
+        try:
+            rows = [compare_page(pdf.load_page(index)) for index in range(pdf.page_count)]
+        finally:
+            pdf.close()
+        all_rows.extend(rows)
+        report["documents"][os.path.basename(path)] = summarize(rows)
+    report["overall"] = summarize(all_rows)
+    for name, summary in [*report["documents"].items(), ("overall", report["overall"])]:
+        print(
+            f"{name:>32}: pages={summary['pages']:4d} "
+            f"fast_path={summary['fast_path_rate']:.2f} "
+            f"agreement={summary['decision_agreement']:.3f} "
+            f"max_err={summary['max_abs_error']:.3f} "
+            f"saved={summary['mean_saved_ms']:.2f}ms/page"
+        )
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
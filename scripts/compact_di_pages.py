@@ -0,0 +1,44 @@
+"""Write the compact ``.json.gz`` form of legacy per-page DI JSON files.
+
+Explicit migration for data dirs written before compact DI storage: every
+``page_NNNN_di.json`` without a compact copy gets one, and the legacy files
+are kept. Reads work without this step; it only saves re-parsing the full
+payloads. With ``--pack`` the converted pages are folded into each
+document's pack.
+
+Usage: python scripts/compact_di_pages.py [--data-dir data] [--pack]
+"""
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core.config import settings
+from ingestion.di_store import convert_legacy_pages, pack_document
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=settings.data_dir)
+    parser.add_argument("--pack", action="store_true")
+    args = parser.parse_args()
+    total = 0
+    for name in sorted(os.listdir(args.data_dir)):
+        doc_dir = os.path.join(args.data_dir, name)
+        if not os.path.isdir(doc_dir):
+            continue
+        converted = convert_legacy_pages(doc_dir)
+        if converted and args.pack:
+            pack_document(doc_dir)
+        if converted:
+            print(f"{name}: {converted} pages")
+        total += converted
+    print(f"Converted {total} legacy DI pages")
+
+
+if __name__ == "__main__":
+    main()
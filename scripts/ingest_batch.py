@@ -0,0 +1,78 @@
+"""Ingest and chunk a directory or manifest of PDFs with one shared embedder.
+
+Documents are deduplicated by sha256 before any work starts; worker
+processes triage, run DI and canonicalize while the parent embeds and
+persists. Prints one line per document and the aggregate throughput, and
+writes the full JSON report. Exits non-zero if any document failed.
+
+Usage: python scripts/ingest_batch.py SOURCE [--workers 2]
+           [--report ingest_report.json] [--force-reprocess]
+           [--macro-max-tokens 8192] [--macro-overlap-tokens 256]
+           [--child-target-tokens 256]
+
+SOURCE is a directory (searched recursively for *.pdf) or a manifest file
+with one path per line (relative to the manifest, optional tab-separated
+filename, ``#`` comments).
+"""
+
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core.config import settings
+from ingestion.batch_ingest import (
+    STATUS_FAILED,
+    DocumentReport,
+    discover_documents,
+    ingest_batch,
+)
+
+
+def print_document(document: DocumentReport) -> None:
+    detail = document.error or document.duplicate_of or ""
+    print(
+        f"{document.status:<16} {document.filename:<40} pages={document.pages:<5} "
+        f"di={document.di_pages:<4} chunks={document.chunks:<6} "
+        f"embed={document.embed_seconds:.1f}s total={document.seconds:.1f}s {detail}".rstrip(),
+        flush=True,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source")
+    parser.add_argument("--workers", type=int, default=settings.batch_ingest_workers)
+    parser.add_argument("--report", default="ingest_report.json")
+    parser.add_argument("--force-reprocess", action="store_true")
+    parser.add_argument("--macro-max-tokens", type=int, default=8192)
+    parser.add_argument("--macro-overlap-tokens", type=int, default=256)
+    parser.add_argument("--child-target-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    items = discover_documents(args.source)
+    report = ingest_batch(
+        items,
+        workers=args.workers,
+        chunk_options=dict(
+            macro_max_tokens=args.macro_max_tokens,
+            macro_overlap_tokens=args.macro_overlap_tokens,
+            child_target_tokens=args.child_target_tokens,
+        ),
+        force_reprocess=args.force_reprocess,
+        on_document=print_document,
+    )
+    aggregate = report.aggregate()
+    print(json.dumps(aggregate, indent=2))
+    with open(args.report, "w", encoding="utf-8") as handle:
+        json.dump(report.to_dict(), handle, indent=2)
+    print(f"Report written to {args.report}")
+    return 1 if aggregate[STATUS_FAILED] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+-- Per-document, per-stage ingest progress so an interrupted ingest resumes
+-- instead of starting over. Pages 1..pages_done are complete for the stage;
+-- state holds what the stage needs to continue (e.g. heading stack).
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    doc_id UUID NOT NULL REFERENCES documents(doc_id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    pages_done INT NOT NULL,
+    state JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (doc_id, stage),
+    CONSTRAINT ingest_checkpoints_stage_check
+        CHECK (stage IN ('triage', 'di', 'canonicalize', 'persist'))
+);
@@ -0,0 +1,5 @@
+-- Page-level content hash so a revised filing (new sha256, new doc_id) can
+-- reuse the triage, DI output and chunk embeddings of unchanged pages.
+ALTER TABLE pages ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS pages_content_hash_idx ON pages (content_hash);
@@ -1,9 +1,16 @@
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from psycopg2.extras import Json
 from pgvector.psycopg2 import register_vector
 
-from core.contracts import ChunkRecord, DocumentFact, DocumentRecord, PageRecord, TriageMetrics
+from core.contracts import (
+    ChunkRecord,
+    DocumentFact,
+    DocumentRecord,
+    IngestCheckpoint,
+    PageRecord,
+    TriageMetrics,
+)
 
 
 def insert_document(conn, document: DocumentRecord) -> None:
@@ -69,6 +76,7 @@ def insert_pages(conn, pages: Iterable[PageRecord]) -> None:
             page.triage_decision,
             page.reason_codes,
             page.di_json_path,
+            page.content_hash,
         )
         for page in pages
     ]
@@ -83,14 +91,16 @@ def insert_pages(conn, pages: Iterable[PageRecord]) -> None:
                 triage_metrics,
                 triage_decision,
                 reason_codes,
-                di_json_path
+                di_json_path,
+                content_hash
             )
-            VALUES (%s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
             ON CONFLICT (doc_id, page_number) DO UPDATE
             SET triage_metrics = EXCLUDED.triage_metrics,
                 triage_decision = EXCLUDED.triage_decision,
                 reason_codes = EXCLUDED.reason_codes,
-                di_json_path = EXCLUDED.di_json_path
+                di_json_path = EXCLUDED.di_json_path,
+                content_hash = EXCLUDED.content_hash
             """,
             rows,
         )
@@ -101,7 +111,7 @@ def fetch_pages(conn, doc_id: str) -> List[PageRecord]:
         cursor.execute(
             """
             SELECT doc_id, page_number, triage_metrics, triage_decision,
-                   reason_codes, di_json_path
+                   reason_codes, di_json_path, content_hash
             FROM pages
             WHERE doc_id = %s
             ORDER BY page_number
@@ -109,26 +119,47 @@ def fetch_pages(conn, doc_id: str) -> List[PageRecord]:
             (doc_id,),
         )
         rows = cursor.fetchall()
-    pages: List[PageRecord] = []
-    for row in rows:
-        metrics_dict = row[2] or {}
-        metrics = TriageMetrics(
-            text_length=int(metrics_dict.get("text_length", 0)),
-            text_density=float(metrics_dict.get("text_density", 0.0)),
-            image_coverage_ratio=float(metrics_dict.get("image_coverage_ratio", 0.0)),
-            layout_complexity_score=float(metrics_dict.get("layout_complexity_score", 0.0)),
-        )
-        pages.append(
-            PageRecord(
-                doc_id=str(row[0]),
-                page_number=int(row[1]),
-                triage_metrics=metrics,
-                triage_decision=row[3],
-                reason_codes=list(row[4] or []),
-                di_json_path=row[5],
-            )
+    return [_page_from_row(row) for row in rows]
+
+
+def fetch_pages_by_content_hash(
+    conn, content_hashes: List[str], exclude_doc_id: str
+) -> List[PageRecord]:
+    """Pages of other documents with one of the hashes, newest document first."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT p.doc_id, p.page_number, p.triage_metrics, p.triage_decision,
+                   p.reason_codes, p.di_json_path, p.content_hash
+            FROM pages p
+            JOIN documents d ON d.doc_id = p.doc_id
+            WHERE p.content_hash = ANY(%s) AND p.doc_id <> %s
+            ORDER BY d.created_at DESC, p.page_number
+            """,
+            (list(content_hashes), exclude_doc_id),
         )
-    return pages
+        rows = cursor.fetchall()
+    return [_page_from_row(row) for row in rows]
+
+
+def _page_from_row(row) -> PageRecord:
+    metrics_dict = row[2] or {}
+    metrics = TriageMetrics(
+        text_length=int(metrics_dict.get("text_length", 0)),
+        text_density=float(metrics_dict.get("text_density", 0.0)),
+        image_coverage_ratio=float(metrics_dict.get("image_coverage_ratio", 0.0)),
+        layout_complexity_score=float(metrics_dict.get("layout_complexity_score", 0.0)),
+        image_coverage_method=str(metrics_dict.get("image_coverage_method", "raster")),
+    )
+    return PageRecord(
+        doc_id=str(row[0]),
+        page_number=int(row[1]),
+        triage_metrics=metrics,
+        triage_decision=row[3],
+        reason_codes=list(row[4] or []),
+        di_json_path=row[5],
+        content_hash=row[6],
+    )
 
 
 def count_chunks(conn, doc_id: str) -> int:
@@ -266,3 +297,101 @@ def fetch_document_fact(conn, doc_id: str, fact_name: str) -> Optional[DocumentF
         polygons=list(row[7] or []),
         evidence_excerpt=row[8],
     )
+
+
+_CHUNK_COLUMNS = """chunk_id, doc_id, page_numbers, macro_id, child_id, chunk_type,
+                   text_content, char_start, char_end, polygons, source_type,
+                   embedding_model, embedding_dim, heading_path, section_id"""
+
+
+def fetch_chunks_before(conn, doc_id: str, macro_id: int) -> List[ChunkRecord]:
+    """Chunks with a lower macro_id, without embeddings (input for document facts)."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT {_CHUNK_COLUMNS}
+            FROM chunks
+            WHERE doc_id = %s AND macro_id < %s
+            ORDER BY macro_id, child_id
+            """,
+            (doc_id, macro_id),
+        )
+        rows = cursor.fetchall()
+    return [_chunk_from_row(row, embedding=[]) for row in rows]
+
+
+def fetch_page_chunks(conn, doc_id: str, page_numbers: List[int]) -> List[ChunkRecord]:
+    """Chunks (with embeddings) that start on one of ``page_numbers``."""
+    register_vector(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT {_CHUNK_COLUMNS}, embedding
+            FROM chunks
+            WHERE doc_id = %s AND page_numbers[1] = ANY(%s)
+            ORDER BY macro_id, child_id
+            """,
+            (doc_id, list(page_numbers)),
+        )
+        rows = cursor.fetchall()
+    return [_chunk_from_row(row, embedding=row[15]) for row in rows]
+
+
+def _chunk_from_row(row, embedding) -> ChunkRecord:
+    return ChunkRecord(
+        chunk_id=str(row[0]),
+        doc_id=str(row[1]),
+        page_numbers=list(row[2] or []),
+        macro_id=int(row[3]),
+        child_id=int(row[4]),
+        chunk_type=row[5],
+        text_content=row[6],
+        char_start=int(row[7]),
+        char_end=int(row[8]),
+        polygons=list(row[9] or []),
+        source_type=row[10],
+        embedding_model=row[11],
+        embedding_dim=int(row[12]),
+        embedding=embedding,
+        heading_path=row[13],
+        section_id=row[14],
+    )
+
+
+def fetch_ingest_checkpoints(conn, doc_id: str) -> Dict[str, IngestCheckpoint]:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT doc_id, stage, pages_done, state
+            FROM ingest_checkpoints
+            WHERE doc_id = %s
+            """,
+            (doc_id,),
+        )
+        rows = cursor.fetchall()
+    return {
+        row[1]: IngestCheckpoint(
+            doc_id=str(row[0]), stage=row[1], pages_done=int(row[2]), state=row[3] or {}
+        )
+        for row in rows
+    }
+
+
+def upsert_ingest_checkpoint(conn, checkpoint: IngestCheckpoint) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO ingest_checkpoints (doc_id, stage, pages_done, state)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (doc_id, stage) DO UPDATE
+            SET pages_done = EXCLUDED.pages_done,
+                state = EXCLUDED.state,
+                updated_at = now()
+            """,
+            (checkpoint.doc_id, checkpoint.stage, checkpoint.pages_done, Json(checkpoint.state)),
+        )
+
+
+def delete_ingest_checkpoints(conn, doc_id: str) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM ingest_checkpoints WHERE doc_id = %s", (doc_id,))
@@ -16,6 +16,7 @@ CREATE TABLE IF NOT EXISTS pages (
     triage_decision TEXT NOT NULL,
     reason_codes TEXT[] NOT NULL,
     di_json_path TEXT,
+    content_hash TEXT,
     created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
     PRIMARY KEY (doc_id, page_number),
     CONSTRAINT pages_triage_decision_check
@@ -58,6 +59,17 @@ CREATE TABLE IF NOT EXISTS document_facts (
     PRIMARY KEY (doc_id, fact_name)
 );
 
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    doc_id UUID NOT NULL REFERENCES documents(doc_id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    pages_done INT NOT NULL,
+    state JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (doc_id, stage),
+    CONSTRAINT ingest_checkpoints_stage_check
+        CHECK (stage IN ('triage', 'di', 'canonicalize', 'persist'))
+);
+
 ALTER TABLE chunks ADD COLUMN IF NOT EXISTS heading_path TEXT NOT NULL DEFAULT '';
 ALTER TABLE chunks ADD COLUMN IF NOT EXISTS section_id TEXT NOT NULL DEFAULT '';
 ALTER TABLE chunks ADD COLUMN IF NOT EXISTS chunk_type TEXT NOT NULL DEFAULT 'narrative';
@@ -78,4 +90,5 @@ CREATE INDEX IF NOT EXISTS chunks_embedding_hnsw_idx
 
 CREATE INDEX IF NOT EXISTS chunks_doc_id_idx ON chunks (doc_id);
 CREATE INDEX IF NOT EXISTS pages_doc_id_idx ON pages (doc_id);
+CREATE INDEX IF NOT EXISTS pages_content_hash_idx ON pages (content_hash);
 CREATE INDEX IF NOT EXISTS document_facts_doc_id_idx ON document_facts (doc_id);
@@ -26,6 +26,7 @@ REQUIRED_SCHEMA: Dict[str, List[str]] = {
         "triage_decision",
         "reason_codes",
         "di_json_path",
+        "content_hash",
         "created_at",
     ],
     "documents": [
@@ -47,6 +48,13 @@ REQUIRED_SCHEMA: Dict[str, List[str]] = {
         "evidence_excerpt",
         "created_at",
     ],
+    "ingest_checkpoints": [
+        "doc_id",
+        "stage",
+        "pages_done",
+        "state",
+        "updated_at",
+    ],
 }
 
 
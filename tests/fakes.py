@@ -0,0 +1,232 @@
+"""Test doubles shared by the embedding and ingestion tests.
+
+``WordEmbedder`` stands in for ModernBERTEmbedder: one token per whitespace
+word, and token outputs built from the token ids so that chunk embeddings can
+be compared exactly. ``canonical_page`` builds a one-span native page. ``FakeRepo`` replaces the storage.repo calls that
+ingest_pipeline makes with in-memory tables; ``install_in_worker`` does the
+same inside spawned worker processes, which do not see the parent's patches.
+"""
+
+import zlib
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+from core.config import settings
+from core.contracts import CanonicalPage, CanonicalSpan
+from embedding import model_registry
+from embedding.modernbert import TokenizedText
+from ingestion import ingest_pipeline
+
+
+def canonical_page(page_number, text):
+    span = CanonicalSpan(
+        text=text,
+        char_start=0,
+        char_end=len(text),
+        polygons=[{"page_number": page_number, "polygon": []}],
+        source_type="native",
+        page_number=page_number,
+        heading_path="doc/S",
+        section_id="S",
+        is_table=False,
+    )
+    return CanonicalPage(doc_id="doc-1", page_number=page_number, text=text, spans=[span])
+
+
+class WordTokenized:
+    def __init__(self, input_ids, offsets):
+        self.input_ids = input_ids.unsqueeze(0)
+        self.attention_mask = torch.ones_like(self.input_ids)
+        self.offsets = list(offsets)
+
+
+def word_offsets(text):
+    offsets, cursor = [], 0
+    for word in text.split():
+        start = text.index(word, cursor)
+        cursor = start + len(word)
+        offsets.append((start, cursor))
+    return offsets
+
+
+class WordEmbedder:
+    """Token ids are word hashes, so every instance and process embeds a word the same way.
+
+    Each token output is ``[id, running sum of ids, 1]`` in ``dtype``.
+    """
+
+    backend = "torch"
+
+    def __init__(self, dtype=torch.float32):
+        self.dtype = dtype
+        self.encoded = 0
+        self.batch_widths = []
+
+    def token_id(self, word):
+        return zlib.crc32(word.encode()) % 50000 + 1
+
+    def tokenize_text(self, text):
+        offsets = word_offsets(text)
+        ids = [self.token_id(text[start:end]) for start, end in offsets]
+        return TokenizedText(torch.tensor(ids, dtype=torch.long), offsets)
+
+    def tokenize(self, text):
+        tokens = self.tokenize_text(text)
+        return WordTokenized(tokens.input_ids, tokens.offsets)
+
+    def chunk_from_ids(self, input_ids, offsets):
+        return WordTokenized(input_ids, offsets)
+
+    def encode(self, tokenized):
+        ids = tokenized.input_ids[0].to(self.dtype).unsqueeze(-1)
+        return torch.cat([ids, ids.cumsum(0), torch.ones_like(ids)], -1)
+
+    def encode_batch(self, batch):
+        self.encoded += len(batch)
+        self.batch_widths.append([int(tokenized.input_ids.shape[-1]) for tokenized in batch])
+        return [self.encode(tokenized) for tokenized in batch]
+
+
+class VocabEmbedder(WordEmbedder):
+    """Small ids in first-seen order, kept per instance."""
+
+    def __init__(self, dtype=torch.float32):
+        super().__init__(dtype)
+        self.vocab = {}
+
+    def token_id(self, word):
+        return self.vocab.setdefault(word, len(self.vocab) + 1)
+
+
+class Evicted(Exception):
+    """Raised by FakeRepo.insert_chunks on the call numbered ``fail_on_insert``."""
+
+
+class FakeRepo:
+    """Documents, pages, chunks and checkpoints of several documents, oldest first.
+
+    Writes become visible when the connection commits; a connection closed
+    without a commit rolls them back. Chunks are keyed by (macro_id, child_id)
+    per document, like ON CONFLICT (doc_id, macro_id, child_id) DO NOTHING.
+    """
+
+    def __init__(self, embedder=None):
+        self.documents, self.pages, self.chunks, self.checkpoints = {}, {}, {}, {}
+        self.facts = []
+        self.embedder = embedder or WordEmbedder()
+        self.model_loads = 0
+        self.insert_calls = 0
+        self.fail_on_insert = None
+
+    @property
+    def encoded(self):
+        return self.embedder.encoded
+
+    @contextmanager
+    def connection(self):
+        pending = []
+
+        def commit():
+            for apply in pending:
+                apply()
+            pending.clear()
+
+        yield SimpleNamespace(commit=commit, pending=pending)
+
+    def get_embedding_model(self, **_):
+        self.model_loads += 1
+        return self.embedder
+
+    def doc_pages(self, doc_id):
+        return [page for _, page in sorted(self.pages.get(doc_id, {}).items())]
+
+    def doc_chunks(self, doc_id):
+        return [chunk for _, chunk in sorted(self.chunks.get(doc_id, {}).items())]
+
+    def patch(self, monkeypatch):
+        repo = ingest_pipeline.repo
+        later = lambda conn, apply: conn.pending.append(apply)
+        per_doc = lambda table, doc_id: table.setdefault(doc_id, {})
+        monkeypatch.setattr(
+            repo, "fetch_document_by_sha", lambda conn, sha: self.documents.get(sha)
+        )
+        monkeypatch.setattr(
+            repo, "insert_document",
+            lambda conn, doc: later(conn, lambda: self.documents.setdefault(doc.sha256, doc)),
+        )
+        monkeypatch.setattr(repo, "insert_pages", self._insert_pages)
+        monkeypatch.setattr(repo, "fetch_pages", lambda conn, doc_id: self.doc_pages(doc_id))
+        monkeypatch.setattr(repo, "fetch_pages_by_content_hash", self._pages_by_hash)
+        monkeypatch.setattr(
+            repo, "count_chunks", lambda conn, doc_id: len(self.chunks.get(doc_id, {}))
+        )
+        monkeypatch.setattr(repo, "insert_chunks", self._insert_chunks)
+        monkeypatch.setattr(
+            repo, "fetch_page_chunks",
+            lambda conn, doc_id, pages: [
+                chunk for chunk in self.doc_chunks(doc_id) if chunk.page_numbers[0] in pages
+            ],
+        )
+        monkeypatch.setattr(
+            repo, "fetch_ingest_checkpoints",
+            lambda conn, doc_id: dict(self.checkpoints.get(doc_id, {})),
+        )
+        monkeypatch.setattr(
+            repo, "upsert_ingest_checkpoint",
+            lambda conn, cp: later(
+                conn, lambda: per_doc(self.checkpoints, cp.doc_id).__setitem__(cp.stage, cp)
+            ),
+        )
+        monkeypatch.setattr(
+            repo, "delete_ingest_checkpoints",
+            lambda conn, doc_id: later(conn, lambda: self.checkpoints.pop(doc_id, None)),
+        )
+        monkeypatch.setattr(
+            repo, "upsert_document_facts",
+            lambda conn, facts: later(conn, lambda: self.facts.extend(facts)),
+        )
+        monkeypatch.setattr(ingest_pipeline, "get_connection", self.connection)
+        monkeypatch.setattr(ingest_pipeline, "check_schema_contract", lambda: None)
+        monkeypatch.setattr(model_registry, "get_embedding_model", self.get_embedding_model)
+
+    def _insert_pages(self, conn, pages):
+        rows = list(pages)
+        conn.pending.append(
+            lambda: [
+                self.pages.setdefault(p.doc_id, {}).__setitem__(p.page_number, p) for p in rows
+            ]
+        )
+
+    def _insert_chunks(self, conn, batch):
+        self.insert_calls += 1
+        if self.insert_calls == self.fail_on_insert:
+            raise Evicted("pod evicted")
+        rows = list(batch)
+        conn.pending.append(
+            lambda: [
+                self.chunks.setdefault(c.doc_id, {}).setdefault((c.macro_id, c.child_id), c)
+                for c in rows
+            ]
+        )
+
+    def _pages_by_hash(self, conn, hashes, exclude_doc_id):
+        return [
+            page
+            for doc_id in reversed(list(self.pages))
+            if doc_id != exclude_doc_id
+            for page in self.doc_pages(doc_id)
+            if page.content_hash in hashes
+        ]
+
+
+def install_in_worker(overrides):
+    """Process pool initializer: apply the parent's settings and a FakeRepo of the worker's own.
+
+    Rows the worker writes stay in its own FakeRepo.
+    """
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    FakeRepo().patch(pytest.MonkeyPatch())
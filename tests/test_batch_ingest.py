@@ -0,0 +1,173 @@
+import json
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from types import SimpleNamespace
+
+import fitz
+import pytest
+
+from core.config import settings
+from core.contracts import CanonicalPage, CanonicalSpan
+from fakes import FakeRepo, install_in_worker
+from ingestion import batch_ingest
+from ingestion.batch_ingest import (
+    SPOOL_SUFFIX,
+    STATUS_ALREADY_CHUNKED,
+    STATUS_DUPLICATE,
+    STATUS_FAILED,
+    STATUS_INGESTED,
+    discover_documents,
+    ingest_batch,
+)
+
+OPTIONS = dict(macro_max_tokens=48, macro_overlap_tokens=8, child_target_tokens=12)
+
+
+def _write_pdf(path, title, pages=3):
+    pdf = fitz.open()
+    for number in range(1, pages + 1):
+        page = pdf.new_page()
+        page.insert_text((72, 60), f"{title} PART {number}", fontsize=18)
+        for line in range(6):
+            page.insert_text((72, 100 + line * 14), f"{title} page {number} line {line}")
+    pdf.save(str(path))
+    pdf.close()
+
+
+@pytest.fixture
+def batch_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path / "data"))
+    monkeypatch.setattr(settings, "disable_di", True)
+    monkeypatch.setattr(settings, "enable_document_facts", False)
+    monkeypatch.setattr(settings, "pipelined_ingest", False)
+    store = FakeRepo()
+    store.patch(monkeypatch)
+    filings = tmp_path / "filings"
+    (filings / "q2").mkdir(parents=True)
+    _write_pdf(filings / "alpha.pdf", "ALPHA")
+    _write_pdf(filings / "q2" / "beta.pdf", "BETA", pages=2)
+    shutil.copy(filings / "alpha.pdf", filings / "q2" / "alpha_copy.pdf")
+    return SimpleNamespace(store=store, filings=filings, tmp_path=tmp_path)
+
+
+def test_directory_batch_dedupes_and_reports_throughput(batch_env):
+    items = discover_documents(str(batch_env.filings))
+    assert [item.filename for item in items] == ["alpha.pdf", "alpha_copy.pdf", "beta.pdf"]
+
+    seen = []
+    report = ingest_batch(items, workers=0, chunk_options=OPTIONS, on_document=seen.append)
+
+    by_name = {doc.filename: doc for doc in report.documents}
+    assert seen == report.documents
+    assert by_name["alpha_copy.pdf"].status == STATUS_DUPLICATE
+    assert by_name["alpha_copy.pdf"].duplicate_of == items[0].path
+    assert by_name["alpha.pdf"].status == by_name["beta.pdf"].status == STATUS_INGESTED
+    assert (by_name["alpha.pdf"].pages, by_name["beta.pdf"].pages) == (3, 2)
+    assert len(batch_env.store.documents) == 2
+    assert by_name["alpha.pdf"].chunks == len(batch_env.store.chunks[by_name["alpha.pdf"].doc_id])
+    assert batch_env.store.model_loads >= 1
+
+    payload = json.loads(json.dumps(report.to_dict()))
+    aggregate = payload["aggregate"]
+    assert aggregate["documents"] == 3
+    assert (aggregate[STATUS_INGESTED], aggregate[STATUS_DUPLICATE]) == (2, 1)
+    assert aggregate["pages"] == 5
+    assert aggregate["chunks"] == sum(len(chunks) for chunks in batch_env.store.chunks.values())
+    assert aggregate["pages_per_second"] > 0 and aggregate["chunks_per_second"] > 0
+    for document in payload["documents"]:
+        assert {"di_pages", "embed_seconds", "pages_per_second", "chunks_per_second"} <= set(document)
+
+
+def test_manifest_batch_skips_chunked_documents_and_isolates_failures(batch_env):
+    filings = batch_env.filings
+    ingest_batch(discover_documents(str(filings)), workers=0, chunk_options=OPTIONS)
+    manifest = batch_env.tmp_path / "manifest.txt"
+    manifest.write_text(
+        "# quarterly filings\n"
+        "filings/alpha.pdf\tAlpha 2026 Q2.pdf\n"
+        "\n"
+        "filings/missing.pdf\n"
+    )
+
+    items = discover_documents(str(manifest))
+    assert [item.filename for item in items] == ["Alpha 2026 Q2.pdf", "missing.pdf"]
+    report = ingest_batch(items, workers=0, chunk_options=OPTIONS)
+
+    statuses = {doc.filename: doc.status for doc in report.documents}
+    assert statuses == {"Alpha 2026 Q2.pdf": STATUS_ALREADY_CHUNKED, "missing.pdf": STATUS_FAILED}
+    assert "missing.pdf" in report.documents[0].error
+    assert report.aggregate()["chunks"] == 0
+
+
+def test_failure_in_one_document_does_not_stop_the_batch(batch_env, monkeypatch):
+    real_prepare = batch_ingest._prepare_document
+
+    def flaky_prepare(item, chunk_options, force_reprocess):
+        if item.filename == "alpha.pdf":
+            raise RuntimeError("DI outage")
+        return real_prepare(item, chunk_options, force_reprocess)
+
+    monkeypatch.setattr(batch_ingest, "_prepare_document", flaky_prepare)
+    report = ingest_batch(discover_documents(str(batch_env.filings)), workers=0, chunk_options=OPTIONS)
+
+    statuses = {doc.filename: (doc.status, doc.error) for doc in report.documents}
+    assert statuses["alpha.pdf"] == (STATUS_FAILED, "RuntimeError: DI outage")
+    assert statuses["beta.pdf"][0] == STATUS_INGESTED
+
+
+def test_worker_processes_match_the_in_process_batch(batch_env, monkeypatch):
+    items = discover_documents(str(batch_env.filings))
+    serial = ingest_batch(items, workers=0, chunk_options=OPTIONS)
+
+    store = FakeRepo()
+    store.patch(monkeypatch)
+    data_dir = batch_env.tmp_path / "workers"
+    monkeypatch.setattr(settings, "data_dir", str(data_dir))
+    overrides = {
+        name: getattr(settings, name)
+        for name in ("data_dir", "disable_di", "enable_document_facts", "pipelined_ingest")
+    }
+    monkeypatch.setattr(
+        batch_ingest, "ProcessPoolExecutor",
+        partial(ProcessPoolExecutor, initializer=install_in_worker, initargs=(overrides,)),
+    )
+    parallel = ingest_batch(items, workers=1, chunk_options=OPTIONS)
+
+    def outcome(report):
+        return [
+            (d.filename, d.status, d.doc_id, d.pages, d.di_pages, d.chunks)
+            for d in report.documents
+        ]
+
+    def signature(repo, doc_id):
+        return [
+            (c.macro_id, c.child_id, c.heading_path, c.text_content, c.char_start,
+             c.polygons, c.embedding.tolist())
+            for c in repo.doc_chunks(doc_id)
+        ]
+
+    assert outcome(parallel) == outcome(serial)
+    ingested = [d.doc_id for d in serial.documents if d.status == STATUS_INGESTED]
+    assert len(ingested) == 2
+    for doc_id in ingested:
+        assert signature(store, doc_id) == signature(batch_env.store, doc_id)
+    assert not list(data_dir.rglob("*" + SPOOL_SUFFIX))
+
+
+def test_spooled_pages_read_back_unchanged(batch_env):
+    text = "Net income — 1,205\n[TABLE] doc/S"
+    spans = [
+        CanonicalSpan(
+            text=line, char_start=start, char_end=start + len(line),
+            polygons=[{"page_number": 2, "polygon": [{"x": 72.1000001, "y": 1 / 3}]}],
+            source_type="di", page_number=2, heading_path="doc/S", section_id="S",
+            is_table=line.startswith("[TABLE]"),
+        )
+        for start, line in ((0, text[:18]), (19, text[19:]))
+    ]
+    pages = [CanonicalPage("doc", 2, text, spans), CanonicalPage("doc", 3, "", [])]
+
+    path = batch_ingest._spool_pages("doc", iter(pages))
+    assert path.endswith(SPOOL_SUFFIX)
+    assert list(batch_ingest._iter_spooled_pages(path)) == pages
@@ -0,0 +1,251 @@
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fitz
+import pytest
+from azure.core.exceptions import HttpResponseError
+
+from ingestion.di_cache import DICache
+from ingestion.di_client import DIClient
+from ingestion.di_scheduler import DIScheduler
+from ingestion.di_store import has_di_page, load_di_page
+
+
+class _FakeDI:
+    """Minimal prebuilt-layout endpoint: POST starts an operation, GET polls it."""
+
+    def __init__(self, fail_operations=0, reject_pdf=False, reject_all=False):
+        self.fail_operations = fail_operations
+        self.reject_pdf = reject_pdf
+        self.reject_all = reject_all
+        self.uploads = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+        self.operations = {}
+
+    def start(self, body):
+        with self.lock:
+            self.uploads.append(body[:4])
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            operation_id = uuid.uuid4().hex
+            failed = self.fail_operations > 0
+            self.fail_operations -= int(failed)
+            pages = len(re.findall(rb"/Type\s*/Page\b", body)) or 1
+            self.operations[operation_id] = ("failed" if failed else "succeeded", pages)
+        return operation_id
+
+    def finish(self, operation_id):
+        with self.lock:
+            self.running -= 1
+            return self.operations.pop(operation_id)
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self._rejected(body):
+                self._send(400, {"error": {"code": "InvalidContentLength", "message": "too large"}})
+                return
+            operation_id = fake.start(body)
+            port = self.server.server_port
+            self.send_response(202)
+            self.send_header(
+                "Operation-Location",
+                f"http://127.0.0.1:{port}/documentintelligence/documentModels/"
+                f"prebuilt-layout/analyzeResults/{operation_id}?api-version=2024-11-30",
+            )
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            status, pages = fake.finish(self.path.split("?")[0].rsplit("/", 1)[-1])
+            result = {
+                "pages": [
+                    {"pageNumber": number, "lines": [{"content": f"local {number}"}]}
+                    for number in range(1, pages + 1)
+                ]
+            }
+            self._send(
+                200,
+                {
+                    "status": status,
+                    "error": {"code": "InternalServerError", "message": "transient"},
+                    "analyzeResult": result,
+                },
+            )
+
+        def _rejected(self, body):
+            return fake.reject_all or (fake.reject_pdf and body.startswith(b"%PDF"))
+
+        def _send(self, code, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+@pytest.fixture
+def fake_di(monkeypatch):
+    servers = []
+
+    def serve(**options):
+        fake = _FakeDI(**options)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(fake))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setenv(
+            "AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT", f"http://127.0.0.1:{server.server_port}"
+        )
+        monkeypatch.setenv("AZURE_DOCUMENT_INTELLIGENCE_KEY", "test-key")
+        return fake
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+
+
+def _pdf(pages):
+    pdf = fitz.open()
+    for index in range(pages):
+        pdf.new_page().insert_text((72, 72), f"Scanned page {index + 1}")
+    return pdf
+
+
+def _run(tmp_path, pages, submit=None, pdf=None, **options):
+    pdf = pdf or _pdf(pages)
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    progress = []
+    submit = range(pages) if submit is None else submit
+    paths = {index: str(tmp_path / f"page_{index + 1:04d}_di.json") for index in submit}
+    with DIScheduler(
+        pdf,
+        client_factory=DIClient,
+        backoff_seconds=0.0,
+        progress_cb=lambda *event: progress.append(event),
+        **options,
+    ) as scheduler:
+        for index, path in paths.items():
+            scheduler.submit(index, path)
+        scheduler.wait()
+    return paths, progress
+
+
+def test_pages_run_concurrently_within_in_flight_limit(tmp_path, fake_di):
+    fake = fake_di()
+    paths, progress = _run(tmp_path, 6, max_in_flight=3)
+    for index, path in paths.items():
+        assert load_di_page(path)["pages"][0]["pageNumber"] == index + 1
+    assert 1 < fake.max_running <= 3
+    assert progress[-1] == ("di_done", 6, 6)
+
+
+def test_contiguous_pages_are_batched_and_renumbered(tmp_path, fake_di):
+    fake = fake_di()
+    paths, progress = _run(
+        tmp_path, 7, submit=[0, 1, 2, 4, 5, 6], max_in_flight=2, batch_pages=2
+    )
+    assert len(fake.uploads) == 4  # [1, 2] [3] [5, 6] [7]
+    for index, path in paths.items():
+        assert [page["pageNumber"] for page in load_di_page(path)["pages"]] == [index + 1]
+    for index, local in [(4, 1), (5, 2), (6, 1)]:
+        assert load_di_page(paths[index])["pages"][0]["lines"][0]["content"] == f"local {local}"
+    assert progress[-1] == ("di_done", 6, 6)
+
+
+def test_oversized_batch_is_resent_page_by_page(tmp_path, fake_di):
+    fake = fake_di(reject_pdf=True)
+    paths, _ = _run(tmp_path, 2, max_in_flight=2, batch_pages=2)
+    assert fake.uploads == [b"\x89PNG", b"\x89PNG"]
+    assert all(has_di_page(path) for path in paths.values())
+
+
+def test_page_by_page_resends_stay_within_in_flight_limit(tmp_path, fake_di, monkeypatch):
+    fake = fake_di(reject_pdf=True)
+    started = []
+    real_start = DIScheduler._start
+
+    def start(scheduler, job):
+        started.append(len(scheduler._pending))
+        real_start(scheduler, job)
+
+    monkeypatch.setattr(DIScheduler, "_start", start)
+    paths, progress = _run(tmp_path, 4, max_in_flight=2, batch_pages=4)
+    assert fake.uploads == [b"\x89PNG"] * 4
+    assert len(started) == 9  # one PDF batch, four PDF pages, four PNG renders
+    assert max(started) < 2
+    assert all(has_di_page(path) for path in paths.values())
+    assert progress[-1] == ("di_done", 4, 4)
+
+
+def test_cache_serves_same_page_from_another_document(tmp_path, fake_di):
+    fake = fake_di()
+    cache = DICache(str(tmp_path / "cache"), 10 * 1024 * 1024)
+    source = _pdf(1)
+    _run(tmp_path / "a", 1, pdf=source, max_in_flight=1, cache=cache)
+    restated = fitz.open()
+    restated.new_page().insert_text((72, 72), "Restated cover")
+    restated.insert_pdf(source)
+    paths, progress = _run(tmp_path / "b", 2, pdf=restated, max_in_flight=1, cache=cache)
+    assert len(fake.uploads) == 2  # source page once, restated cover once
+    assert load_di_page(paths[1])["pages"][0]["pageNumber"] == 2
+    assert cache.stats().hits == 1
+    assert ("di_cache", 1, 2) in progress
+
+
+def test_failed_operation_is_retried(tmp_path, fake_di):
+    fake = fake_di(fail_operations=1)
+    _run(tmp_path, 1, max_in_flight=2)
+    assert len(fake.uploads) == 2
+    assert has_di_page(str(tmp_path / "page_0001_di.json"))
+
+
+def test_oversized_pdf_falls_back_to_png(tmp_path, fake_di):
+    fake = fake_di(reject_pdf=True)
+    _run(tmp_path, 2, max_in_flight=2)
+    assert fake.uploads == [b"\x89PNG", b"\x89PNG"]
+    assert has_di_page(str(tmp_path / "page_0002_di.json"))
+
+
+def test_exhausted_fallback_raises(tmp_path, fake_di):
+    fake_di(reject_all=True)
+    with pytest.raises(RuntimeError, match="fallback image sizes"):
+        _run(tmp_path, 1, max_in_flight=1)
+
+
+def test_failure_after_retries_propagates(tmp_path, fake_di):
+    fake = fake_di(fail_operations=5)
+    with pytest.raises(HttpResponseError):
+        _run(tmp_path, 1, max_in_flight=1, max_retries=0)
+    assert len(fake.uploads) == 1
+    assert not has_di_page(str(tmp_path / "page_0001_di.json"))
+
+
+def test_wait_for_hands_on_one_page_before_the_rest(tmp_path, fake_di):
+    fake_di()
+    pdf = _pdf(4)
+    path = lambda index: str(tmp_path / f"page_{index + 1:04d}_di.json")
+    with DIScheduler(pdf, max_in_flight=2, batch_pages=2, backoff_seconds=0.0) as scheduler:
+        for index in range(3):
+            scheduler.submit(index, path(index))
+        assert not scheduler.is_done(2)
+        assert scheduler.is_done(3)
+        scheduler.wait_for(2)
+        assert scheduler.is_done(2)
+        assert load_di_page(path(2))["pages"][0]["pageNumber"] == 3
+        scheduler.wait()
+    assert all(scheduler.is_done(index) for index in range(3))
+    assert all(has_di_page(path(index)) for index in range(3))
@@ -0,0 +1,59 @@
+from ingestion.canonicalize import _extract_tables_from_di
+from ingestion.di_split import split_di_result
+
+
+def _cell(row, col, content, page):
+    return {
+        "rowIndex": row,
+        "columnIndex": col,
+        "content": content,
+        "boundingRegions": [{"pageNumber": page, "polygon": [0, 0, 1, 0, 1, 1, 0, 1]}],
+    }
+
+
+def _result():
+    return {
+        "modelId": "prebuilt-layout",
+        "pages": [
+            {"pageNumber": 1, "lines": [{"content": "first"}]},
+            {"pageNumber": 2, "lines": [{"content": "second"}]},
+        ],
+        "paragraphs": [
+            {"content": "p1", "boundingRegions": [{"pageNumber": 1, "polygon": []}]},
+            {"content": "p2", "boundingRegions": [{"pageNumber": 2, "polygon": []}]},
+        ],
+        "tables": [
+            {
+                "rowCount": 3,
+                "columnCount": 1,
+                "boundingRegions": [
+                    {"pageNumber": 1, "polygon": [0, 5, 4, 5, 4, 9, 0, 9]},
+                    {"pageNumber": 2, "polygon": [0, 0, 4, 0, 4, 2, 0, 2]},
+                ],
+                "cells": [
+                    _cell(0, 0, "Header", 1),
+                    _cell(1, 0, "Row on 1", 1),
+                    _cell(2, 0, "Row on 2", 2),
+                ],
+            }
+        ],
+    }
+
+
+def test_split_renumbers_pages_and_regions():
+    payloads = split_di_result(_result(), [7, 8])
+    assert sorted(payloads) == [7, 8]
+    assert payloads[8]["modelId"] == "prebuilt-layout"
+    assert payloads[7]["pages"] == [{"pageNumber": 7, "lines": [{"content": "first"}]}]
+    assert [p["content"] for p in payloads[8]["paragraphs"]] == ["p2"]
+    assert payloads[8]["paragraphs"][0]["boundingRegions"][0]["pageNumber"] == 8
+
+
+def test_cross_page_table_is_cut_by_cell():
+    payloads = split_di_result(_result(), [7, 8])
+    first = _extract_tables_from_di(payloads[7], 7)
+    second = _extract_tables_from_di(payloads[8], 8)
+    assert len(first) == 1 and len(second) == 1
+    assert "Row on 1" in first[0].markdown and "Row on 2" not in first[0].markdown
+    assert second[0].markdown.startswith("| Row on 2 |")
+    assert second[0].bbox == (0.0, 0.0, 4.0, 2.0)
@@ -0,0 +1,80 @@
+import json
+import os
+
+from ingestion.canonicalize import _canonicalize_from_di
+from ingestion.di_store import (
+    PACK_INDEX_NAME,
+    compact_di_payload,
+    convert_legacy_pages,
+    has_di_page,
+    load_di_page,
+    pack_document,
+    write_di_page,
+)
+
+
+def _payload(page_number):
+    return {
+        "modelId": "prebuilt-layout",
+        "content": f"Revenue {page_number}",
+        "pages": [
+            {
+                "pageNumber": page_number,
+                "words": [{"content": "Revenue", "polygon": [0, 0, 1, 0, 1, 1, 0, 1]}],
+                "lines": [
+                    {
+                        "content": f"Revenue {page_number}",
+                        "polygon": [0, 0, 5, 0, 5, 1, 0, 1],
+                        "spans": [{"offset": 0, "length": 9}],
+                    }
+                ],
+            }
+        ],
+        "tables": [
+            {
+                "rowCount": 1,
+                "columnCount": 1,
+                "boundingRegions": [
+                    {"pageNumber": page_number, "polygon": [0, 2, 4, 2, 4, 3, 0, 3]}
+                ],
+                "cells": [
+                    {"rowIndex": 0, "columnIndex": 0, "content": "Total", "kind": "content"}
+                ],
+            }
+        ],
+    }
+
+
+def _canonical(path, page_number):
+    return _canonicalize_from_di("doc", page_number, path, [], "root")
+
+
+def test_legacy_json_is_read_without_touching_it(tmp_path):
+    path = str(tmp_path / "page_0003_di.json")
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(_payload(3), handle, indent=2)
+    assert load_di_page(path) == compact_di_payload(_payload(3))
+    assert os.listdir(tmp_path) == ["page_0003_di.json"]
+    assert has_di_page(path)
+    assert _canonical(path, 3).text.startswith("Revenue 3")
+
+    assert convert_legacy_pages(str(tmp_path)) == 1
+    assert sorted(os.listdir(tmp_path)) == ["page_0003_di.json", "page_0003_di.json.gz"]
+    assert "words" not in load_di_page(path)["pages"][0]
+    assert convert_legacy_pages(str(tmp_path)) == 0
+
+
+def test_pack_serves_pages_and_accepts_later_pages(tmp_path):
+    paths = {number: str(tmp_path / f"page_{number:04d}_di.json") for number in (1, 2, 3)}
+    for number in (1, 2):
+        write_di_page(paths[number], _payload(number))
+    expected = _canonical(paths[2], 2)
+    assert pack_document(str(tmp_path)) == 2
+    assert sorted(os.listdir(tmp_path)) == ["di_pages.1.pack", PACK_INDEX_NAME]
+    assert _canonical(paths[2], 2) == expected
+
+    write_di_page(paths[3], _payload(3))
+    assert pack_document(str(tmp_path)) == 1
+    assert sorted(os.listdir(tmp_path)) == ["di_pages.2.pack", PACK_INDEX_NAME]
+    assert [load_di_page(paths[n])["pages"][0]["pageNumber"] for n in (1, 2, 3)] == [1, 2, 3]
+    assert not has_di_page(str(tmp_path / "page_0004_di.json"))
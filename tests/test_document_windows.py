@@ -0,0 +1,93 @@
+from core.contracts import CanonicalPage, CanonicalSpan
+from embedding import late_chunking
+from fakes import WordEmbedder
+
+
+def _page(page_number, lines):
+    spans = []
+    cursor = 0
+    for line in lines:
+        spans.append(
+            CanonicalSpan(
+                text=line,
+                char_start=cursor,
+                char_end=cursor + len(line),
+                polygons=[{"page_number": page_number, "polygon": [{"x": 0, "y": 0}]}],
+                source_type="native",
+                page_number=page_number,
+                heading_path=f"doc/P{page_number}",
+                section_id=f"P{page_number}",
+                is_table=False,
+            )
+        )
+        cursor += len(line) + 1
+    return CanonicalPage(
+        doc_id="doc-1", page_number=page_number, text="\n".join(lines), spans=spans
+    )
+
+
+def _pages():
+    return [
+        _page(1, ["one two three", "four five"]),
+        _page(2, ["six seven eight", "nine ten"]),
+        _page(3, ["eleven twelve"]),
+    ]
+
+
+def test_document_windows_reduce_model_inputs(monkeypatch):
+    from embedding import model_registry
+
+    embedder = WordEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+
+    late_chunking.late_chunk_embeddings(_pages(), document_windows=False)
+    per_page = embedder.encoded
+    embedder.encoded = 0
+    late_chunking.late_chunk_embeddings(_pages(), document_windows=True)
+    assert per_page == 3
+    assert embedder.encoded == 1
+
+
+def test_document_window_children_map_back_to_pages(monkeypatch):
+    from embedding import model_registry
+
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: WordEmbedder())
+    pages = _pages()
+    chunks = late_chunking.late_chunk_embeddings(
+        pages, child_target_tokens=4, document_windows=True
+    )
+    by_page = {page.page_number: page for page in pages}
+
+    crossing = [c for c in chunks if len(c.page_numbers) > 1]
+    assert crossing
+    assert crossing[0].page_numbers == [1, 2]
+    assert {p["page_number"] for p in crossing[0].polygons} == {1, 2}
+
+    for chunk in chunks:
+        first_page = by_page[chunk.page_numbers[0]]
+        first_line = chunk.text_content.split("\n")[0]
+        assert first_page.text[chunk.char_start:].startswith(first_line)
+        assert chunk.char_end - chunk.char_start == len(chunk.text_content)
+        assert chunk.heading_path == f"doc/P{chunk.page_numbers[0]}"
+
+
+def test_document_windows_overlap_across_pages(monkeypatch):
+    from embedding import model_registry
+
+    embedder = WordEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+    pages = [
+        _page(1, ["one two three", "four"]),
+        _page(2, ["five six", "seven"]),
+        _page(3, ["eight nine ten", "eleven twelve"]),
+    ]
+    chunks = late_chunking.late_chunk_embeddings(
+        pages,
+        macro_max_tokens=6,
+        macro_overlap_tokens=2,
+        child_target_tokens=6,
+        document_windows=True,
+    )
+    assert embedder.encoded == 3
+    assert any(c.page_numbers == [1, 2] for c in chunks)
+    assert any(c.page_numbers == [2, 3] for c in chunks)
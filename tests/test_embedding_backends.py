@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+import torch
+
+from core.config import settings
+from embedding import model_registry
+from embedding.equivalence import check_equivalence, cosine_similarities
+
+
+class VectorEmbedder:
+    def __init__(self, backend, noise=0.0):
+        self.backend = backend
+        self.noise = noise
+
+    def embed_text(self, text):
+        rng = np.random.default_rng(len(text))
+        base = rng.normal(size=8)
+        return (base + self.noise * rng.normal(size=8)).tolist()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    model_registry._reset_for_testing()
+    monkeypatch.setattr(model_registry, "_load_torch_embedder", lambda _: VectorEmbedder("torch"))
+    yield monkeypatch
+    model_registry._reset_for_testing()
+
+
+def test_cosine_similarities_are_per_row():
+    cosines = cosine_similarities([[1.0, 0.0], [0.0, 2.0]], [[2.0, 0.0], [1.0, 0.0]])
+    np.testing.assert_allclose(cosines, [1.0, 0.0])
+
+
+def test_equivalent_backend_is_used(registry):
+    registry.setattr(settings, "embedding_backend", "onnx")
+    registry.setattr(
+        model_registry, "_load_onnx_embedder", lambda *_, **__: VectorEmbedder("onnx", 0.001)
+    )
+    assert model_registry.get_embedding_model().backend == "onnx"
+
+
+def test_divergent_backend_is_refused(registry):
+    registry.setattr(settings, "embedding_backend", "onnx-int8")
+    registry.setattr(
+        model_registry, "_load_onnx_embedder", lambda *_, **__: VectorEmbedder("onnx-int8", 5.0)
+    )
+    assert model_registry.get_embedding_model().backend == "torch"
+
+
+def test_unknown_backend_raises(registry):
+    registry.setattr(settings, "embedding_backend", "tensorrt")
+    with pytest.raises(RuntimeError):
+        model_registry.get_embedding_model()
+
+
+def test_equivalence_report_thresholds():
+    report = check_equivalence(
+        VectorEmbedder("torch"), VectorEmbedder("onnx", 0.0), threshold=0.999, candidate_name="onnx"
+    )
+    assert report.passed
+    assert report.min_cosine == pytest.approx(1.0)
+
+
+def test_onnx_export_matches_torch_forward(tmp_path, monkeypatch):
+    ort = pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from transformers import ModernBertConfig, ModernBertModel
+
+    from embedding import onnx_backend
+
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path))
+    config = ModernBertConfig(
+        vocab_size=64,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        pad_token_id=0,
+        attn_implementation="eager",
+    )
+    model = ModernBertModel(config).eval()
+    path = onnx_backend.onnx_model_path()
+    onnx_backend.export_onnx_model(path, model=model)
+
+    embedder = onnx_backend.OnnxModernBERTEmbedder.__new__(onnx_backend.OnnxModernBERTEmbedder)
+    embedder.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    input_ids = torch.randint(1, 64, (2, 23))
+    attention_mask = torch.ones_like(input_ids)
+    attention_mask[1, 11:] = 0
+    hidden = embedder._forward(input_ids, attention_mask)
+    with torch.no_grad():
+        expected = model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+    torch.testing.assert_close(hidden[0], expected[0], rtol=1e-4, atol=1e-4)
+    torch.testing.assert_close(hidden[1, :11], expected[1, :11], rtol=1e-4, atol=1e-4)
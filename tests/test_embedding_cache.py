@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+
+from core.content_cache import ContentAddressedCache
+from embedding import late_chunking, model_registry
+from embedding.embedding_cache import EmbeddingCache
+from fakes import VocabEmbedder, canonical_page
+
+
+class FractionalEmbedder(VocabEmbedder):
+    """Token outputs that are not exact in float16."""
+
+    def encode(self, tokenized):
+        return super().encode(tokenized) / 7.0
+
+
+def _pages():
+    return [
+        canonical_page(1, " ".join(f"a{i}" for i in range(30))),
+        canonical_page(2, " ".join(f"b{i}" for i in range(12))),
+    ]
+
+
+def _embed(embedder, cache, child_target_tokens=5):
+    return late_chunking.late_chunk_embeddings(
+        _pages(), macro_max_tokens=16, macro_overlap_tokens=4,
+        child_target_tokens=child_target_tokens, embedding_cache=cache,
+    )
+
+
+def test_reingest_hits_cache_and_skips_model(monkeypatch, tmp_path):
+    embedder = FractionalEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+    cache = EmbeddingCache(str(tmp_path), max_bytes=10_000_000)
+
+    first = _embed(embedder, cache)
+    encoded_once = embedder.encoded
+    assert cache.stats().hits == 0
+
+    second = _embed(embedder, cache)
+    assert embedder.encoded == encoded_once
+    assert cache.stats().hits == encoded_once
+    for before, after in zip(first, second):
+        assert after.text_content == before.text_content
+        np.testing.assert_allclose(after.embedding, before.embedding, rtol=1e-3)
+
+
+def test_child_target_change_reuses_token_outputs(monkeypatch, tmp_path):
+    embedder = FractionalEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+    cache = EmbeddingCache(str(tmp_path), max_bytes=10_000_000)
+
+    _embed(embedder, cache, child_target_tokens=5)
+    encoded_once = embedder.encoded
+    chunks = _embed(embedder, cache, child_target_tokens=3)
+    assert embedder.encoded == encoded_once
+    assert max(len(c.text_content.split()) for c in chunks) == 3
+
+
+def test_content_cache_evicts_least_recently_used(tmp_path):
+    store = ContentAddressedCache(str(tmp_path), max_bytes=250)
+    for index, key in enumerate(["aa01", "bb02", "cc03"]):
+        store.write(key, b"x" * 100)
+        os.utime(store.path_for(key), (index, index))
+    assert store.read("aa01") is None
+    assert store.read("bb02") == b"x" * 100
+    stats = store.stats()
+    assert (stats.writes, stats.evictions, stats.hits, stats.misses) == (3, 1, 1, 1)
+    assert store.size_bytes() <= 250
+
+
+def test_registry_cache_disabled_by_default(monkeypatch, tmp_path):
+    from core.config import settings
+
+    model_registry._reset_for_testing()
+    assert model_registry.get_embedding_cache() is None
+    monkeypatch.setattr(settings, "enable_embedding_cache", True)
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path))
+    try:
+        assert model_registry.get_embedding_cache() is model_registry.get_embedding_cache()
+    finally:
+        model_registry._reset_for_testing()
@@ -0,0 +1,80 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from embedding import late_chunking, model_registry, worker_pool
+from fakes import VocabEmbedder, canonical_page
+
+
+class OutOfOrderPool:
+    """Stands in for EmbeddingWorkerPool; later batches finish first."""
+
+    workers = 3
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self.batches = 0
+
+    def map_batches(self, payloads):
+        payloads = list(payloads)
+        self.batches += len(payloads)
+
+        def run(indexed):
+            index, payload = indexed
+            time.sleep(0.01 * (len(payloads) - index))
+            return late_chunking.encode_pooled_batch(self.embedder, payload)
+
+        with ThreadPoolExecutor(max_workers=len(payloads) or 1) as executor:
+            return list(executor.map(run, enumerate(payloads)))
+
+
+def _page(page_number, words):
+    return canonical_page(page_number, " ".join(f"p{page_number}w{i}" for i in range(words)))
+
+
+def _signature(chunks):
+    return [(c.macro_id, c.child_id, c.text_content, c.embedding.tolist()) for c in chunks]
+
+
+def _embed(pages):
+    return late_chunking.late_chunk_embeddings(
+        pages, macro_max_tokens=8, macro_overlap_tokens=2, child_target_tokens=3,
+        batch_token_budget=20,
+    )
+
+
+def test_worker_pool_results_keep_macro_and_child_order(monkeypatch):
+    embedder = VocabEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+    pages = [_page(number, 9 + 2 * number) for number in range(1, 6)]
+    expected = _embed(pages)
+
+    pool = OutOfOrderPool(embedder)
+    monkeypatch.setattr(model_registry, "get_embedding_pool", lambda **_: pool)
+    assert _signature(_embed(pages)) == _signature(expected)
+    assert pool.batches > 1
+
+    streamed = late_chunking.iter_late_chunk_embeddings(
+        pages, macro_max_tokens=8, macro_overlap_tokens=2, child_target_tokens=3,
+        batch_token_budget=20,
+    )
+    assert _signature(list(streamed)) == _signature(expected)
+
+
+def test_worker_threads_and_registry_default(monkeypatch):
+    monkeypatch.setattr(worker_pool.os, "cpu_count", lambda: 32)
+    assert worker_pool.default_threads_per_worker(4) == 8
+    assert worker_pool.default_threads_per_worker(64) == 1
+
+    previous = torch.get_num_threads()
+    try:
+        worker_pool._init_worker(2, 512)
+        assert torch.get_num_threads() == 2
+        assert worker_pool._WORKER_MAX_LENGTH == 512
+    finally:
+        torch.set_num_threads(previous)
+        worker_pool._WORKER_MAX_LENGTH = 8192
+
+    model_registry._reset_for_testing()
+    assert model_registry.get_embedding_pool() is None
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+import fitz
+import pytest
+import torch
+
+from core.config import settings
+from core.contracts import PageRecord, TriageMetrics
+from fakes import FakeRepo, WordEmbedder
+from ingestion import ingest_pipeline
+from ingestion.di_store import load_di_page, write_di_page
+from ingestion.page_reuse import PriorVersion, page_content_hashes
+
+OPTIONS = dict(macro_max_tokens=48, macro_overlap_tokens=8, child_target_tokens=12)
+
+
+def _filing(path, revised_page=None, pages=6):
+    pdf = fitz.open()
+    for number in range(1, pages + 1):
+        page = pdf.new_page()
+        if number % 3 == 1:
+            page.insert_text((72, 60), f"PART {number}", fontsize=18)
+        amount = "1,250" if number == revised_page else "1,205"
+        for line in range(10):
+            page.insert_text((72, 100 + line * 14), f"Page {number} line {line} net income {amount}")
+    pdf.save(str(path))
+    pdf.close()
+
+
+def _store():
+    return FakeRepo(WordEmbedder(dtype=torch.float64))
+
+
+def _signature(store, doc_id):
+    return [
+        (key, chunk.page_numbers, chunk.heading_path, chunk.text_content,
+         chunk.char_start, chunk.char_end, [float(x) for x in chunk.embedding])
+        for key, chunk in sorted(store.chunks[doc_id].items())
+    ]
+
+
+@pytest.fixture
+def filings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path / "data"))
+    monkeypatch.setattr(settings, "disable_di", True)
+    monkeypatch.setattr(settings, "enable_document_facts", False)
+    monkeypatch.setattr(settings, "embed_batch_token_budget", 40)
+    monkeypatch.setattr(settings, "incremental_reingest", True)
+    original, restated = tmp_path / "annual.pdf", tmp_path / "annual_restated.pdf"
+    _filing(original)
+    _filing(restated, revised_page=4)
+    return SimpleNamespace(original=str(original), restated=str(restated))
+
+
+def _ingest(store, monkeypatch, pdf_path, **options):
+    store.patch(monkeypatch)
+    events = {}
+    doc_id = ingest_pipeline.ingest_and_chunk(
+        pdf_path, progress_cb=lambda stage, done, total: events.__setitem__(stage, done),
+        **dict(OPTIONS, **options),
+    )
+    return doc_id, events
+
+
+def test_unchanged_pages_hash_the_same_across_regenerated_files(filings):
+    original = page_content_hashes(fitz.open(filings.original))
+    restated = page_content_hashes(fitz.open(filings.restated))
+    assert [a == b for a, b in zip(original, restated)] == [True, True, True, False, True, True]
+
+
+def test_restated_filing_reuses_unchanged_pages_and_matches_a_full_ingest(filings, monkeypatch):
+    clean = _store()
+    clean_id, _ = _ingest(clean, monkeypatch, filings.restated)
+
+    store = _store()
+    original_id, _ = _ingest(store, monkeypatch, filings.original)
+    encoded_before = store.encoded
+    restated_id, events = _ingest(store, monkeypatch, filings.restated)
+
+    assert restated_id == clean_id != original_id
+    assert _signature(store, restated_id) == _signature(clean, clean_id)
+    assert events["reused_triage"] == 5
+    assert events["reused_embeddings"] == 5
+    assert store.encoded - encoded_before < clean.encoded
+    hashes = [page.content_hash for page in store.doc_pages(restated_id)]
+    assert all(hashes) and hashes[0] == store.pages[original_id][1].content_hash
+
+
+def test_page_hashes_are_read_once_per_ingest(filings, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(
+        ingest_pipeline, "page_content_hashes",
+        lambda pdf: hashed.append(pdf.name) or page_content_hashes(pdf),
+    )
+    store = _store()
+    _ingest(store, monkeypatch, filings.original)
+    _, events = _ingest(store, monkeypatch, filings.restated)
+    assert hashed == [filings.original, filings.restated]
+    assert events["reused_triage"] == 5
+
+
+def test_different_chunking_reuses_triage_but_not_embeddings(filings, monkeypatch):
+    store = _store()
+    _ingest(store, monkeypatch, filings.original)
+    _, events = _ingest(store, monkeypatch, filings.restated, child_target_tokens=20)
+    assert events["reused_triage"] == 5
+    assert events["reused_embeddings"] == 0
+
+
+def test_prior_di_payload_is_copied_and_renumbered(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path))
+    prior_path = str(tmp_path / "page_0002_di.json")
+    write_di_page(
+        prior_path,
+        {
+            "pages": [{"pageNumber": 2, "lines": [{"content": "Net income", "polygon": [1, 2]}]}],
+            "tables": [],
+        },
+    )
+    metrics = TriageMetrics(10, 0.1, 0.9, 0.2)
+    prior_page = PageRecord("old", 2, metrics, "di_required", ["high_image_coverage"], prior_path)
+    prior = PriorVersion(doc_id="old", matches={5: prior_page})
+
+    assert prior.copy_di(5, str(tmp_path / "page_0005_di.json"))
+    assert not prior.copy_di(6, str(tmp_path / "page_0006_di.json"))
+    copied = load_di_page(str(tmp_path / "page_0005_di.json"))
+    assert copied["pages"][0]["pageNumber"] == 5
+    assert prior.stats.di_pages == 1
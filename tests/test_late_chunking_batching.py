@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+
+import torch
+from transformers import ModernBertConfig, ModernBertModel
+
+from core.contracts import CanonicalPage, CanonicalSpan
+from embedding import late_chunking
+from embedding.modernbert import ModernBERTEmbedder, TokenizedText
+from fakes import VocabEmbedder, word_offsets
+
+
+def _page(page_number, text, table_text=None):
+    spans = []
+    cursor = 0
+    for line in text.split("\n"):
+        spans.append(
+            CanonicalSpan(
+                text=line,
+                char_start=cursor,
+                char_end=cursor + len(line),
+                polygons=[{"page_number": page_number, "polygon": []}],
+                source_type="native",
+                page_number=page_number,
+                heading_path="doc/S",
+                section_id="S",
+                is_table=False,
+            )
+        )
+        cursor += len(line) + 1
+    if table_text:
+        spans.append(
+            CanonicalSpan(
+                text=table_text,
+                char_start=cursor,
+                char_end=cursor + len(table_text),
+                polygons=[{"page_number": page_number, "polygon": []}],
+                source_type="native",
+                page_number=page_number,
+                heading_path="doc/S",
+                section_id="S",
+                is_table=True,
+            )
+        )
+        text = text + "\n" + table_text
+    return CanonicalPage(doc_id="doc-1", page_number=page_number, text=text, spans=spans)
+
+
+def _pages():
+    return [
+        _page(1, "alpha beta gamma\ndelta epsilon", table_text="[TABLE] doc/S\n| a | b |"),
+        _page(2, " ".join(f"w{i}" for i in range(40))),
+        _page(3, "short page"),
+    ]
+
+
+def _signature(chunks):
+    return [
+        (
+            c.page_numbers,
+            c.macro_id,
+            c.child_id,
+            c.chunk_type,
+            c.text_content,
+            c.char_start,
+            c.char_end,
+            c.polygons,
+            c.embedding.tolist(),
+        )
+        for c in chunks
+    ]
+
+
+def test_batched_encoding_matches_single_item_batches(monkeypatch):
+    from embedding import model_registry
+
+    embedder = VocabEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+
+    unbatched = late_chunking.late_chunk_embeddings(
+        _pages(), macro_max_tokens=16, macro_overlap_tokens=4, child_target_tokens=5,
+        batch_token_budget=1,
+    )
+    assert all(len(widths) == 1 for widths in embedder.batch_widths)
+
+    embedder.batch_widths.clear()
+    batched = late_chunking.late_chunk_embeddings(
+        _pages(), macro_max_tokens=16, macro_overlap_tokens=4, child_target_tokens=5,
+        batch_token_budget=64,
+    )
+    assert any(len(widths) > 1 for widths in embedder.batch_widths)
+    assert _signature(batched) == _signature(unbatched)
+
+
+def test_batches_respect_token_budget(monkeypatch):
+    from embedding import model_registry
+
+    embedder = VocabEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+
+    late_chunking.late_chunk_embeddings(
+        _pages(), macro_max_tokens=16, macro_overlap_tokens=4, child_target_tokens=5,
+        batch_token_budget=40,
+    )
+    for widths in embedder.batch_widths:
+        assert len(set(widths)) == 1
+        assert len(widths) == 1 or widths[0] * len(widths) <= 40
+
+
+def test_progress_reports_all_macros(monkeypatch):
+    from embedding import model_registry
+
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: VocabEmbedder())
+    events = []
+    late_chunking.late_chunk_embeddings(
+        _pages(), macro_max_tokens=16, macro_overlap_tokens=4, child_target_tokens=5,
+        progress_cb=lambda stage, done, total: events.append((stage, done, total)),
+    )
+    assert events
+    assert events[-1][1] == events[-1][2]
+
+
+class TinyModernBERT(ModernBERTEmbedder):
+    """The real embedder over a small random-init ModernBERT and a word tokenizer."""
+
+    def __init__(self):
+        torch.manual_seed(0)
+        config = ModernBertConfig(
+            vocab_size=64, hidden_size=32, intermediate_size=48, num_hidden_layers=2,
+            num_attention_heads=2, max_position_embeddings=128, local_attention=8,
+            global_attn_every_n_layers=2, pad_token_id=0, attn_implementation="sdpa",
+        )
+        self.device = torch.device("cpu")
+        self.max_length = 128
+        self.tokenizer = SimpleNamespace(cls_token_id=1, sep_token_id=2, pad_token_id=0)
+        self.model = ModernBertModel(config).eval()
+
+    def tokenize_text(self, text):
+        offsets = word_offsets(text)
+        ids = [3 + sum(map(ord, text[start:end])) % 61 for start, end in offsets]
+        return TokenizedText(torch.tensor(ids, dtype=torch.long), offsets)
+
+
+def test_real_model_batches_are_bit_identical_to_single_passes(monkeypatch):
+    from embedding import model_registry
+
+    embedder = TinyModernBERT()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+    chunks = [
+        embedder.chunk_from_ids(torch.arange(3, 3 + length), [(0, 1)] * length)
+        for length in (9, 14, 9, 5, 14)
+    ]
+    singles = [embedder.encode(chunk) for chunk in chunks]
+    batched = embedder.encode_batch(chunks)
+    assert all(torch.equal(a, b) for a, b in zip(batched, singles))
+
+    options = dict(macro_max_tokens=16, macro_overlap_tokens=4, child_target_tokens=5)
+    unbatched = late_chunking.late_chunk_embeddings(_pages(), batch_token_budget=1, **options)
+    pooled = late_chunking.late_chunk_embeddings(_pages(), batch_token_budget=256, **options)
+    assert _signature(pooled) == _signature(unbatched)
@@ -1,42 +1,12 @@
-import torch
-
 from core.contracts import CanonicalPage, CanonicalSpan
 from embedding import late_chunking
-
-
-class DummyTokenized:
-    def __init__(self, offsets):
-        self.offsets = offsets
-        self.attention_mask = torch.ones(1, len(offsets), dtype=torch.long)
-        self.input_ids = torch.ones(1, len(offsets), dtype=torch.long)
-
-
-class DummyEmbedder:
-    def __init__(self, max_length=8192):
-        self.max_length = max_length
-
-    def tokenize_full(self, text):
-        parts = text.split()
-        offsets = []
-        cursor = 0
-        for part in parts:
-            start = text.index(part, cursor)
-            end = start + len(part)
-            offsets.append((start, end))
-            cursor = end
-        return offsets
-
-    def tokenize(self, text):
-        return DummyTokenized(self.tokenize_full(text))
-
-    def encode(self, tokenized):
-        return torch.ones(len(tokenized.offsets), 3)
+from fakes import WordEmbedder
 
 
 def test_chunk_lineage_fields_present(monkeypatch):
     from embedding import model_registry
 
-    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: DummyEmbedder())
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: WordEmbedder())
 
     span = CanonicalSpan(
         text="Hello world",
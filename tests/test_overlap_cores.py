@@ -0,0 +1,62 @@
+import itertools
+
+import torch
+
+from embedding import late_chunking, model_registry
+from embedding.modernbert import TokenizedText
+from fakes import VocabEmbedder, WordTokenized, canonical_page
+
+
+class TruncatingEmbedder(VocabEmbedder):
+    """Word tokenizer whose chunk_from_ids truncates like ModernBERTEmbedder."""
+
+    def __init__(self, max_length):
+        super().__init__()
+        self.max_length = max_length
+
+    def chunk_from_ids(self, input_ids, offsets):
+        content = self.max_length - 2
+        ids = torch.cat([torch.tensor([0]), input_ids[:content], torch.tensor([0])])
+        return WordTokenized(ids, [(0, 0), *list(offsets)[:content], (0, 0)])
+
+
+def _page(words):
+    return canonical_page(1, "  ".join(f"w{i}" for i in range(words)))
+
+
+def _coverage(page, chunks):
+    counts = [0] * len(page.text)
+    for chunk in chunks:
+        for offset in range(chunk.char_start, chunk.char_end):
+            counts[offset] += 1
+    return counts
+
+
+def test_every_character_is_emitted_exactly_once(monkeypatch):
+    for words, window, overlap, child in itertools.product(
+        [1, 7, 40, 97], [4, 8, 16], [0, 1, 3, 7], [1, 3, 5]
+    ):
+        embedder = TruncatingEmbedder(max_length=window)
+        monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+        page = _page(words)
+        chunks = late_chunking.late_chunk_embeddings(
+            [page],
+            macro_max_tokens=window,
+            macro_overlap_tokens=overlap,
+            child_target_tokens=child,
+        )
+        counts = _coverage(page, chunks)
+        for offset, char in enumerate(page.text):
+            allowed = {0, 1} if char == " " else {1}
+            assert counts[offset] in allowed, (words, window, overlap, child, offset)
+        assert len({c.text_content for c in chunks}) == len(chunks)
+
+
+def test_overlap_stays_as_encoder_context():
+    tokens = TokenizedText(
+        torch.arange(10), [(i * 3, i * 3 + 2) for i in range(10)]
+    )
+    windows = late_chunking._build_macro_chunks(tokens, 29, 6, 2)
+    assert [(w.token_start, w.token_end) for w in windows] == [(0, 6), (4, 10)]
+    assert (windows[0].core_start, windows[0].core_end) == (0, 14)
+    assert (windows[1].core_start, windows[1].core_end) == (15, 29)
@@ -0,0 +1,82 @@
+import fitz
+
+from core.config import settings
+from core.contracts import PageRecord, TriageMetrics
+from ingestion import page_extraction
+from ingestion.canonicalize import canonicalize_document
+from ingestion.page_extraction import extraction_path, group_lines, load_extraction
+from ingestion.pdf_analysis import analyze_page
+from ingestion.triage_pool import iter_page_triage
+
+
+def _write_pdf(path):
+    pdf = fitz.open()
+    page = pdf.new_page()
+    page.insert_text((72, 60), "MANAGEMENT DISCUSSION")
+    for line in range(30):
+        page.insert_text((72, 90 + line * 16), f"Line {line} revenue net income")
+    page = pdf.new_page()
+    page.insert_text((72, 72), "Short")
+    pdf.save(str(path))
+    pdf.close()
+
+
+def _page_records(count):
+    metrics = TriageMetrics(0, 0.0, 0.0, 0.0)
+    return [
+        PageRecord(
+            doc_id="doc",
+            page_number=number,
+            triage_metrics=metrics,
+            triage_decision="native_only",
+            reason_codes=[],
+            di_json_path=None,
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+def test_triage_writes_artifacts_used_by_canonicalization(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "doc.pdf"
+    _write_pdf(pdf_path)
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path / "fresh"))
+    expected = canonicalize_document("doc", str(pdf_path), _page_records(2))
+
+    artifact_dir = tmp_path / "data" / "doc"
+    artifact_dir.mkdir(parents=True)
+    triaged = list(iter_page_triage(str(pdf_path), 2, workers=0, artifact_dir=str(artifact_dir)))
+    pdf = fitz.open(str(pdf_path))
+    assert [triage for _, triage in triaged] == [analyze_page(page) for page in pdf]
+    pdf.close()
+    first = load_extraction(extraction_path(str(artifact_dir), 1))
+    second = load_extraction(extraction_path(str(artifact_dir), 2))
+    assert first.tables == [] and len(first.lines) == 31
+    assert second.tables is None  # low_text page goes to DI
+
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path / "data"))
+    monkeypatch.setattr(page_extraction.fitz.Page, "find_tables", _fail_find_tables)
+    assert canonicalize_document("doc", str(pdf_path), _page_records(1)) == expected[:1]
+
+
+def _fail_find_tables(*_args, **_kwargs):
+    raise AssertionError("tables re-detected despite artifact")
+
+
+def test_load_extraction_rejects_missing_and_outdated(tmp_path):
+    path = str(tmp_path / "page_0001_extract.json")
+    assert load_extraction(path) is None
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write('{"version": 0}')
+    assert load_extraction(path) is None
+
+
+def test_group_lines_orders_lines_by_key_and_words_by_x0():
+    words = [
+        (50.0, 0.0, 60.0, 5.0, "b", 1, 0, 1),
+        (10.0, 0.0, 20.0, 5.0, "a", 1, 0, 0),
+        (10.0, 9.0, 20.0, 14.0, "z", 0, 2, 0),
+        (10.0, 9.0, 20.0, 14.0, "z2", 0, 2, 1),
+        (30.0, 20.0, 40.0, 25.0, "c", 1, 0, 2),
+    ]
+    assert group_lines(words) == [[2, 3], [1, 4, 0]]
+    assert group_lines([]) == []
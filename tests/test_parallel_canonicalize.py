@@ -0,0 +1,93 @@
+import fitz
+
+from core.config import settings
+from core.contracts import PageRecord, TriageMetrics
+from ingestion.canonicalize import canonicalize_document, iter_canonical_pages
+from ingestion.di_store import write_di_page
+
+DI_PAGES = {3, 7}
+
+
+def _write_pdf(path, pages):
+    pdf = fitz.open()
+    for number in range(1, pages + 1):
+        page = pdf.new_page()
+        if number % 4 == 1:
+            page.insert_text((72, 60), f"PART {number}", fontsize=16)
+        if number % 2 == 0:
+            page.insert_text((72, 80), f"Note {number} Revenue")
+        for line in range(12):
+            page.insert_text((72, 110 + line * 14), f"Page {number} line {line} net income")
+        if number == 5:
+            for row in range(4):
+                for col in range(3):
+                    rect = fitz.Rect(72 + col * 120, 320 + row * 24, 192 + col * 120, 344 + row * 24)
+                    page.draw_rect(rect, color=(0, 0, 0))
+                    page.insert_text((rect.x0 + 4, rect.y1 - 8), f"r{row}c{col}")
+    pdf.save(str(path))
+    pdf.close()
+
+
+def _di_payload(number):
+    return {
+        "pages": [
+            {
+                "pageNumber": number,
+                "lines": [
+                    {"content": "SCANNED SCHEDULE", "polygon": [1, 1, 4, 1, 4, 1.2, 1, 1.2]},
+                    {"content": f"Scanned line {number}", "polygon": [1, 2, 4, 2, 4, 2.2, 1, 2.2]},
+                    {"content": "inside table", "polygon": [1, 5, 2, 5, 2, 5.2, 1, 5.2]},
+                ],
+            }
+        ],
+        "tables": [
+            {
+                "boundingRegions": [{"pageNumber": number, "polygon": [0, 4, 6, 4, 6, 6, 0, 6]}],
+                "cells": [
+                    {"rowIndex": 0, "columnIndex": 0, "content": "Item"},
+                    {"rowIndex": 1, "columnIndex": 0, "content": f"{number * 100}"},
+                ],
+            }
+        ],
+    }
+
+
+def _page_records(tmp_path, pages):
+    metrics = TriageMetrics(0, 0.0, 0.0, 0.0)
+    records = []
+    for number in range(1, pages + 1):
+        di_json_path = None
+        if number in DI_PAGES:
+            di_json_path = str(tmp_path / f"page_{number:04d}_di.json")
+            write_di_page(di_json_path, _di_payload(number))
+        decision = "di_required" if di_json_path else "native_only"
+        records.append(PageRecord("doc", number, metrics, decision, [], di_json_path))
+    return records
+
+
+def test_parallel_canonicalization_matches_serial(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / "report.pdf")
+    _write_pdf(pdf_path, 9)
+    records = _page_records(tmp_path, 9)
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path / "data"))
+
+    monkeypatch.setattr(settings, "canonicalize_workers", 0)
+    serial = canonicalize_document("doc", pdf_path, records)
+    monkeypatch.setattr(settings, "canonicalize_workers", 2)
+    progress = []
+    parallel = canonicalize_document(
+        "doc", pdf_path, records, progress_cb=lambda *event: progress.append(event)
+    )
+
+    assert parallel == serial
+    assert [page.page_number for page in parallel] == list(range(1, 10))
+    assert any(span.is_table for span in serial[4].spans)
+    assert serial[2].spans[1].heading_path == "report/SCANNED SCHEDULE"
+    assert progress == [("canonicalize", index, 9) for index in range(1, 10)]
+
+    heading_stack = ["PART 5"]
+    resumed = iter_canonical_pages(
+        "doc", pdf_path, iter(records[5:]), total_pages=4, heading_stack=heading_stack
+    )
+    assert list(resumed) == serial[5:]
+    assert heading_stack == ["PART 9"]
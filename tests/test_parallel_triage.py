@@ -0,0 +1,43 @@
+import fitz
+
+from ingestion.triage_pool import _page_ranges, iter_page_triage
+
+
+def _write_pdf(path, pages):
+    pdf = fitz.open()
+    for index in range(pages):
+        page = pdf.new_page()
+        if index % 3:
+            for line in range(40):
+                page.insert_text((72, 72 + line * 16), f"Page {index} line {line} revenue net income")
+        if index % 4 == 0:
+            page.draw_rect(fitz.Rect(50, 50, 500, 600), color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+    pdf.save(str(path))
+    pdf.close()
+
+
+def test_parallel_triage_matches_serial_in_page_order(tmp_path):
+    pdf_path = tmp_path / "doc.pdf"
+    _write_pdf(pdf_path, 11)
+    serial = list(iter_page_triage(str(pdf_path), 11, workers=0))
+    progress = []
+    parallel = list(
+        iter_page_triage(
+            str(pdf_path), 11, workers=2,
+            progress_cb=lambda stage, done, total: progress.append((stage, done, total)),
+        )
+    )
+    assert [index for index, _ in parallel] == list(range(11))
+    assert parallel == serial
+    assert {decision.decision for _, decision in serial} == {"di_required", "native_only"}
+    done = [count for _, count, _ in progress]
+    assert done == sorted(done) and done[-1] == 11
+    assert all(stage == "triage" and total == 11 for stage, _, total in progress)
+
+
+def test_page_ranges_cover_every_page_once():
+    for pages, workers in [(1, 4), (11, 2), (400, 8), (1000, 3)]:
+        ranges = _page_ranges(pages, workers)
+        covered = [page for start, end in ranges for page in range(start, end)]
+        assert covered == list(range(pages))
+        assert max(end - start for start, end in ranges) <= 16
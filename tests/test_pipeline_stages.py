@@ -0,0 +1,157 @@
+import threading
+import time
+
+import fitz
+import pytest
+
+from fakes import FakeRepo, VocabEmbedder
+from ingestion.pipeline_stages import StagedPipeline
+
+
+def test_stages_preserve_order_and_report_stats():
+    seen_by_stage = []
+
+    def source():
+        yield from range(20)
+
+    def stateful(stream):
+        # Order-dependent state, like the canonicalization heading stack.
+        running = 0
+        for item in stream:
+            seen_by_stage.append(item)
+            running += item
+            yield running
+
+    with StagedPipeline(queue_size=2) as pipeline:
+        numbers = pipeline.stage("source", source)
+        totals = pipeline.stage("running_total", stateful, numbers)
+        result = pipeline.sink("collect", list, totals)
+
+    assert seen_by_stage == list(range(20))
+    assert result == [sum(range(n + 1)) for n in range(20)]
+    assert [stats.name for stats in pipeline.stats] == ["source", "running_total", "collect"]
+    assert [stats.items for stats in pipeline.stats[:2]] == [20, 20]
+    for stats in pipeline.stats:
+        assert 0.0 <= stats.utilization(pipeline.wall_seconds) <= 1.0
+
+
+def test_bounded_queues_hold_back_a_fast_stage():
+    produced = []
+
+    def source():
+        for item in range(50):
+            produced.append(item)
+            yield item
+
+    def slow_sink(stream):
+        lead = []
+        for item in stream:
+            time.sleep(0.002)
+            lead.append(len(produced) - item)
+        return max(lead)
+
+    with StagedPipeline(queue_size=3) as pipeline:
+        max_lead = pipeline.sink("sink", slow_sink, pipeline.stage("source", source))
+
+    # queue_size items queued, one being put, one being consumed.
+    assert max_lead <= 3 + 2
+    assert pipeline.stats[0].output_wait_seconds > 0
+
+
+def test_stage_failure_is_raised_by_the_sink_and_threads_stop():
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield from range(1000)
+        finally:
+            closed.set()
+
+    def failing(stream):
+        for item in stream:
+            if item == 5:
+                raise ValueError("bad page")
+            yield item
+
+    with pytest.raises(ValueError, match="bad page"):
+        with StagedPipeline(queue_size=2) as pipeline:
+            pipeline.sink("sink", list, pipeline.stage("fail", failing, pipeline.stage("source", source)))
+
+    assert closed.is_set()
+    assert not any(thread.is_alive() for thread in pipeline._threads)
+
+
+def test_progress_from_stage_threads_is_delivered_on_the_calling_thread():
+    caller = threading.get_ident()
+    delivered = []
+
+    def record(stage, current, total):
+        delivered.append((threading.get_ident(), stage, current, total))
+
+    with StagedPipeline(queue_size=2, progress_cb=record) as pipeline:
+        relay = pipeline.progress_cb
+
+        def source():
+            for item in range(5):
+                relay("source", item + 1, 5)
+                yield item
+
+        pipeline.sink("sink", list, pipeline.stage("source", source))
+
+    assert [event[1:] for event in delivered] == [("source", n, 5) for n in range(1, 6)]
+    assert {event[0] for event in delivered} == {caller}
+
+
+def _report_pdf(path):
+    pdf = fitz.open()
+    for number in range(1, 7):
+        page = pdf.new_page()
+        page.insert_text((72, 60), f"SECTION {number}", fontsize=18)
+        for line in range(12):
+            page.insert_text((72, 100 + line * 14), f"Page {number} line {line} revenue grew")
+    pdf.save(str(path))
+    pdf.close()
+
+
+def test_pipelined_ingest_matches_sequential(tmp_path, monkeypatch):
+    from core.config import settings
+    from ingestion import ingest_pipeline
+
+    pdf_path = tmp_path / "report.pdf"
+    _report_pdf(pdf_path)
+    store = FakeRepo(VocabEmbedder())
+    store.patch(monkeypatch)
+    monkeypatch.setattr(settings, "data_dir", str(tmp_path / "data"))
+    monkeypatch.setattr(settings, "disable_di", True)
+    monkeypatch.setattr(settings, "enable_document_facts", False)
+    monkeypatch.setattr(settings, "pipeline_queue_pages", 2)
+    options = dict(macro_max_tokens=64, macro_overlap_tokens=8, child_target_tokens=16)
+
+    monkeypatch.setattr(settings, "pipelined_ingest", False)
+    doc_id = ingest_pipeline.ingest_and_chunk(str(pdf_path), force_reprocess=True, **options)
+    sequential = store.doc_chunks(doc_id)
+    store.chunks.clear()
+    store.embedder = VocabEmbedder()
+
+    events = []
+    monkeypatch.setattr(settings, "pipelined_ingest", True)
+    assert ingest_pipeline.ingest_and_chunk(
+        str(pdf_path),
+        progress_cb=lambda *event: events.append(event),
+        force_reprocess=True,
+        **options,
+    ) == doc_id
+
+    def signature(chunks):
+        return [
+            (c.page_numbers, c.macro_id, c.child_id, c.heading_path, c.text_content,
+             c.embedding.tolist())
+            for c in chunks
+        ]
+
+    assert sequential and signature(store.doc_chunks(doc_id)) == signature(sequential)
+    utilization = {stage for stage, _, _ in events if stage.startswith("utilization_")}
+    assert utilization == {
+        "utilization_triage_di", "utilization_canonicalize", "utilization_embed",
+        "utilization_persist",
+    }
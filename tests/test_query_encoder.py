@@ -0,0 +1,68 @@
+import pytest
+
+from embedding import model_registry
+from embedding.query_encoder import QueryEncoder, normalize_query
+
+
+class CountingQueryEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text, max_length):
+        self.calls.append((text, max_length))
+        return [float(len(text)), float(max_length)]
+
+
+def _encoder(capacity=2):
+    embedder = CountingQueryEmbedder()
+    return QueryEncoder(lambda: embedder, max_length=64, capacity=capacity), embedder
+
+
+def test_repeated_query_hits_cache():
+    encoder, embedder = _encoder()
+    first = encoder.embed("What is  net income?")
+    second = encoder.embed(" What is net income? ")
+    assert first == second
+    assert embedder.calls == [("What is net income?", 64)]
+    stats = encoder.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+    assert stats.saved_seconds >= 0.0
+
+
+def test_lru_evicts_least_recently_used():
+    encoder, embedder = _encoder(capacity=2)
+    encoder.embed("a")
+    encoder.embed("b")
+    encoder.embed("a")
+    encoder.embed("c")
+    assert len(encoder) == 2
+    encoder.embed("a")
+    encoder.embed("b")
+    assert [text for text, _ in embedder.calls] == ["a", "b", "c", "b"]
+
+
+def test_stats_delta_per_request():
+    encoder, _ = _encoder()
+    encoder.embed("q1")
+    before = encoder.stats()
+    encoder.embed("q1")
+    encoder.embed("q1")
+    delta = encoder.stats().since(before)
+    assert (delta.hits, delta.misses) == (2, 0)
+
+
+def test_normalize_query_collapses_whitespace():
+    assert normalize_query("  CET1\n ratio\t2024 ") == "CET1 ratio 2024"
+
+
+def test_registry_query_encoder_does_not_load_model(monkeypatch):
+    model_registry._reset_for_testing()
+    monkeypatch.setattr(
+        model_registry, "get_embedding_model", lambda **_: pytest.fail("model loaded")
+    )
+    try:
+        encoder = model_registry.get_query_encoder()
+        assert encoder is model_registry.get_query_encoder()
+        assert encoder.stats().misses == 0
+    finally:
+        model_registry._reset_for_testing()
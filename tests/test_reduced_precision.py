@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import ModernBertConfig, ModernBertModel, PreTrainedTokenizerFast
+
+from core.config import settings
+from embedding import model_registry
+from embedding.equivalence import cosine_similarities
+from embedding.late_chunking import _pool_segments
+from embedding.modernbert import ModernBERTEmbedder
+
+WORDS = "net income ratio capital tier liquidity credit loss note table revenue bank".split()
+
+
+def _tiny_embedder():
+    vocab = {"[PAD]": 0, "[UNK]": 1, "[CLS]": 2, "[SEP]": 3}
+    for word in WORDS:
+        vocab.setdefault(word, len(vocab))
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    torch.manual_seed(0)
+    config = ModernBertConfig(
+        vocab_size=len(vocab),
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        pad_token_id=0,
+        attn_implementation="eager",
+    )
+    embedder = ModernBERTEmbedder.__new__(ModernBERTEmbedder)
+    embedder.device = torch.device("cpu")
+    embedder.max_length = 64
+    embedder.model = ModernBertModel(config).eval()
+    embedder.tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, cls_token="[CLS]", sep_token="[SEP]",
+        pad_token="[PAD]", unk_token="[UNK]",
+    )
+    return embedder
+
+
+def test_bf16_forward_keeps_reduced_hidden_and_fp32_pooling():
+    reference = _tiny_embedder()
+    reduced = reference.with_precision("bf16")
+    assert reduced.model is reference.model
+    assert reference.precision == "fp32"
+
+    text = " ".join(WORDS * 3)
+    tokenized = reference.tokenize(text)
+    hidden = reduced.encode(tokenized)
+    assert hidden.dtype == torch.bfloat16
+
+    segments = [(0, 1, list(range(1, 12))), (1, 2, list(range(12, 30)))]
+    pooled = _pool_segments(hidden, segments)
+    expected = _pool_segments(reference.encode(tokenized), segments)
+    assert pooled.dtype == np.float32
+    assert cosine_similarities(expected, pooled).min() > 0.99
+    assert isinstance(reduced.embed_text(text)[0], float)
+
+
+class PrecisionEmbedder:
+    backend = "torch"
+
+    def __init__(self, precision="fp32", noise=0.0):
+        self.precision = precision
+        self.noise = noise
+
+    def with_precision(self, precision):
+        return PrecisionEmbedder(precision, self.noise)
+
+    def embed_text(self, text):
+        rng = np.random.default_rng(len(text))
+        base = rng.normal(size=8)
+        if self.precision == "fp32":
+            return base.tolist()
+        return (base + self.noise * rng.normal(size=8)).tolist()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    model_registry._reset_for_testing()
+    monkeypatch.setattr(settings, "embedding_backend", "torch")
+    monkeypatch.setattr(settings, "embedding_precision", "bf16")
+    monkeypatch.setattr("embedding.modernbert.reduced_precision_supported", lambda _: True)
+    yield monkeypatch
+    model_registry._reset_for_testing()
+
+
+def test_equivalent_precision_is_used(registry):
+    registry.setattr(model_registry, "_load_torch_embedder", lambda _: PrecisionEmbedder(noise=0.001))
+    assert model_registry.get_embedding_model().precision == "bf16"
+
+
+def test_divergent_precision_falls_back_to_fp32(registry):
+    registry.setattr(model_registry, "_load_torch_embedder", lambda _: PrecisionEmbedder(noise=5.0))
+    assert model_registry.get_embedding_model().precision == "fp32"
+
+
+def test_unsupported_cpu_keeps_fp32(registry):
+    registry.setattr("embedding.modernbert.reduced_precision_supported", lambda _: False)
+    registry.setattr(model_registry, "_load_torch_embedder", lambda _: PrecisionEmbedder())
+    assert model_registry.get_embedding_model().precision == "fp32"
+
+
+def test_unknown_precision_raises(registry):
+    registry.setattr(settings, "embedding_precision", "int4")
+    registry.setattr(model_registry, "_load_torch_embedder", lambda _: PrecisionEmbedder())
+    with pytest.raises(RuntimeError):
+        model_registry.get_embedding_model()
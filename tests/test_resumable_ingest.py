@@ -0,0 +1,102 @@
+import fitz
+import pytest
+import torch
+
+from core.config import settings
+from fakes import Evicted, FakeRepo, WordEmbedder
+from ingestion import ingest_pipeline
+from ingestion.checkpoints import STAGE_CANONICALIZE, STAGE_DI, STAGE_PERSIST, STAGE_TRIAGE
+
+OPTIONS = dict(macro_max_tokens=48, macro_overlap_tokens=8, child_target_tokens=12)
+
+
+def _report_pdf(path, pages=8):
+    pdf = fitz.open()
+    for number in range(1, pages + 1):
+        page = pdf.new_page()
+        if number % 3 == 1:
+            page.insert_text((72, 60), f"PART {number}", fontsize=18)
+        for line in range(10):
+            page.insert_text((72, 100 + line * 14), f"Page {number} line {line} net income rose")
+    pdf.save(str(path))
+    pdf.close()
+
+
+def _store():
+    return FakeRepo(WordEmbedder(dtype=torch.float64))
+
+
+def _checkpoints(store):
+    (checkpoints,) = store.checkpoints.values()
+    return checkpoints
+
+
+def _signature(store):
+    (chunks,) = store.chunks.values()
+    return [
+        (key, chunk.page_numbers, chunk.heading_path, chunk.section_id, chunk.text_content,
+         chunk.char_start, chunk.char_end, list(chunk.embedding))
+        for key, chunk in sorted(chunks.items())
+    ]
+
+
+@pytest.fixture
+def ingest_env(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "annual.pdf"
+    _report_pdf(pdf_path)
+    monkeypatch.setattr(settings, "disable_di", True)
+    monkeypatch.setattr(settings, "enable_document_facts", False)
+    monkeypatch.setattr(settings, "embed_batch_token_budget", 40)
+    monkeypatch.setattr(settings, "chunk_insert_batch_size", 3)
+    monkeypatch.setattr(settings, "pipeline_queue_pages", 2)
+
+    def run(name, fail_on_insert=None, store=None):
+        store = store or _store()
+        store.patch(monkeypatch)
+        store.fail_on_insert = fail_on_insert
+        store.insert_calls = 0
+        monkeypatch.setattr(settings, "data_dir", str(tmp_path / name))
+        ingest_pipeline.ingest_and_chunk(str(pdf_path), **OPTIONS)
+        return store
+
+    return run
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_killed_ingest_resumes_to_the_clean_result(ingest_env, monkeypatch, pipelined):
+    monkeypatch.setattr(settings, "pipelined_ingest", pipelined)
+    clean = ingest_env("clean")
+
+    store = _store()
+    with pytest.raises(Evicted):
+        ingest_env("resumed", fail_on_insert=4, store=store)
+    assert 0 < _checkpoints(store)[STAGE_PERSIST].pages_done < 8
+    if not pipelined:
+        # Sequential ingest finishes triage and DI before chunking starts.
+        assert _checkpoints(store)[STAGE_TRIAGE].pages_done == 8
+        assert _checkpoints(store)[STAGE_DI].pages_done == 8
+    encoded_before = store.encoded
+
+    ingest_env("resumed", store=store)
+
+    assert _signature(store) == _signature(clean)
+    assert {stage: cp.pages_done for stage, cp in _checkpoints(store).items()} == {
+        STAGE_TRIAGE: 8, STAGE_DI: 8, STAGE_CANONICALIZE: 8, STAGE_PERSIST: 8,
+    }
+    assert store.encoded - encoded_before < clean.encoded
+
+
+def test_completed_ingest_is_not_redone_but_partial_chunks_are(ingest_env, monkeypatch):
+    monkeypatch.setattr(settings, "pipelined_ingest", False)
+    store = _store()
+    with pytest.raises(Evicted):
+        ingest_env("doc", fail_on_insert=2, store=store)
+    assert store.chunks, "the first batch was committed"
+    partial = len(_signature(store))
+
+    ingest_env("doc", store=store)
+    assert len(_signature(store)) > partial
+
+    encoded = store.encoded
+    ingest_env("doc", store=store)
+    assert store.encoded == encoded
@@ -0,0 +1,30 @@
+import numpy as np
+import torch
+
+from embedding.late_chunking import _pool_segments
+
+
+def test_segment_pooling_matches_per_span_mean():
+    torch.manual_seed(0)
+    token_embeddings = torch.randn(12, 5)
+    segments = [(0, 4, [1, 2, 3]), (5, 9, [4, 5, 6, 7]), (10, 12, [8, 9, 10])]
+    pooled = _pool_segments(token_embeddings, segments)
+    expected = np.stack(
+        [token_embeddings[indices].mean(dim=0).numpy() for _, _, indices in segments]
+    )
+    assert pooled.dtype == np.float32
+    assert pooled.flags["C_CONTIGUOUS"]
+    assert pooled.shape == (3, 5)
+    np.testing.assert_allclose(pooled, expected, rtol=1e-6, atol=1e-6)
+
+
+def test_segment_pooling_accumulates_reduced_precision_in_float32():
+    token_embeddings = torch.full((4, 2), 0.1, dtype=torch.bfloat16)
+    pooled = _pool_segments(token_embeddings, [(0, 1, [0, 1, 2, 3])])
+    assert pooled.dtype == np.float32
+    np.testing.assert_allclose(pooled, token_embeddings[:1].float().numpy())
+
+
+def test_segment_pooling_handles_empty_segments():
+    pooled = _pool_segments(torch.ones(3, 4), [])
+    assert pooled.shape == (0, 4)
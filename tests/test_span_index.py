@@ -0,0 +1,68 @@
+import random
+
+from core.contracts import CanonicalSpan
+from embedding.span_index import SpanIndex
+
+
+def _span(start, end, page_number=1, heading="doc/S"):
+    return CanonicalSpan(
+        text="x" * (end - start),
+        char_start=start,
+        char_end=end,
+        polygons=[{"page_number": page_number, "polygon": [{"x": start, "y": end}]}],
+        source_type="di" if start % 2 else "native",
+        page_number=page_number,
+        heading_path=f"{heading}/{start}",
+        section_id=str(start),
+        is_table=False,
+    )
+
+
+def _linear_overlapping(spans, char_start, char_end):
+    return [
+        span
+        for span in sorted(spans, key=lambda s: s.char_start)
+        if not (span.char_end <= char_start or span.char_start >= char_end)
+    ]
+
+
+def test_disjoint_page_spans_match_linear_scan():
+    spans = []
+    cursor = 0
+    for index in range(500):
+        length = 5 + index % 17
+        spans.append(_span(cursor, cursor + length, page_number=1 + index // 100))
+        cursor += length + 1
+    index = SpanIndex(spans)
+    rng = random.Random(7)
+    for _ in range(300):
+        start = rng.randrange(0, cursor)
+        end = start + rng.randrange(1, 400)
+        assert index.overlapping(start, end) == _linear_overlapping(spans, start, end)
+
+
+def test_overlapping_and_empty_spans_match_linear_scan():
+    rng = random.Random(11)
+    spans = []
+    for _ in range(200):
+        start = rng.randrange(0, 1000)
+        spans.append(_span(start, start + rng.randrange(0, 120)))
+    index = SpanIndex(spans)
+    for _ in range(300):
+        start = rng.randrange(0, 1100)
+        end = start + rng.randrange(1, 200)
+        assert index.overlapping(start, end) == _linear_overlapping(spans, start, end)
+
+
+def test_lineage_collects_pages_polygons_and_first_heading():
+    spans = [_span(0, 10, page_number=1), _span(11, 20, page_number=2), _span(21, 30, page_number=2)]
+    polygons, pages, source_type, heading_path, section_id = SpanIndex(spans).lineage(5, 25)
+    assert pages == [1, 2]
+    assert len(polygons) == 3
+    assert source_type == "di"
+    assert heading_path == "doc/S/0"
+    assert section_id == "0"
+
+
+def test_lineage_without_overlap_uses_defaults():
+    assert SpanIndex([_span(0, 10)]).lineage(50, 60) == ([], [], "native", "", "")
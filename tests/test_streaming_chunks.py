@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+from embedding import late_chunking, model_registry
+from fakes import VocabEmbedder, canonical_page
+
+
+def _page(page_number, words):
+    return canonical_page(page_number, " ".join(f"p{page_number}w{i}" for i in range(words)))
+
+
+def _signature(chunks):
+    return [
+        (c.page_numbers, c.macro_id, c.child_id, c.text_content, c.embedding.tolist())
+        for c in chunks
+    ]
+
+
+def test_streamed_chunks_match_list_and_pull_pages_lazily(monkeypatch):
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: VocabEmbedder())
+    pages = [_page(number, 10 + number) for number in range(1, 7)]
+    expected = late_chunking.late_chunk_embeddings(
+        pages, macro_max_tokens=8, macro_overlap_tokens=2, child_target_tokens=3
+    )
+
+    pulled = []
+
+    def page_stream():
+        for page in pages:
+            pulled.append(page.page_number)
+            yield page
+
+    stream = late_chunking.iter_late_chunk_embeddings(
+        page_stream(), macro_max_tokens=8, macro_overlap_tokens=2,
+        child_target_tokens=3, batch_token_budget=20,
+    )
+    first = next(stream)
+    assert len(pulled) < len(pages)
+    assert _signature([first, *stream]) == _signature(expected)
+
+
+def test_store_chunks_commits_bounded_batches(monkeypatch):
+    from core.config import settings
+    from ingestion import ingest_pipeline
+
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: VocabEmbedder())
+    chunks = late_chunking.late_chunk_embeddings(
+        [_page(1, 12)], macro_max_tokens=8, macro_overlap_tokens=2, child_target_tokens=3
+    )
+    events = []
+    fact_inputs = []
+
+    class FakeConn:
+        def commit(self):
+            events.append("commit")
+
+    @contextmanager
+    def fake_connection():
+        yield FakeConn()
+
+    monkeypatch.setattr(ingest_pipeline, "get_connection", fake_connection)
+    monkeypatch.setattr(
+        ingest_pipeline.repo, "insert_chunks", lambda conn, batch: events.append(len(batch))
+    )
+    monkeypatch.setattr(ingest_pipeline.repo, "upsert_document_facts", lambda conn, facts: None)
+    monkeypatch.setattr(
+        ingest_pipeline, "extract_document_facts",
+        lambda doc_id, batch: fact_inputs.extend(batch) or [],
+    )
+    monkeypatch.setattr(settings, "chunk_insert_batch_size", 2)
+    monkeypatch.setattr(settings, "enable_document_facts", True)
+
+    ingest_pipeline._store_chunks("doc-1", iter(chunks))
+
+    inserts = [event for event in events if event != "commit"]
+    assert sum(inserts) == len(chunks)
+    assert max(inserts) <= 2
+    assert events.count("commit") == len(inserts) + 1
+    assert [c.text_content for c in fact_inputs] == [c.text_content for c in chunks]
+    assert all(len(c.embedding) == 0 for c in fact_inputs)
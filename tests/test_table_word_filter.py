@@ -0,0 +1,43 @@
+from ingestion.canonicalize import (
+    TableBlock,
+    _di_line_entries,
+    _native_line_entries,
+    _polygon_from_bbox,
+)
+from ingestion.page_extraction import PageExtraction, group_lines
+
+
+def _table(x0, y0, x1, y1):
+    polygon = _polygon_from_bbox(x0, y0, x1, y1)
+    return TableBlock(markdown="", polygon=polygon, bbox=(x0, y0, x1, y1))
+
+
+def test_native_words_touching_a_table_are_dropped_per_word():
+    words = [
+        (60.0, 10.0, 90.0, 20.0, "Revenue", 0, 0, 1),
+        (10.0, 10.0, 50.0, 20.0, "Total", 0, 0, 0),
+        (100.0, 10.0, 140.0, 20.0, "1,205", 0, 0, 2),  # touches the table edge
+        (10.0, 40.0, 50.0, 50.0, "inside", 1, 0, 0),
+        (10.0, 60.0, 50.0, 70.0, "Notes", 2, 0, 0),
+    ]
+    tables = [_table(100.0, 0.0, 200.0, 30.0), _table(0.0, 35.0, 200.0, 55.0)]
+    extraction = PageExtraction(1, words, group_lines(words), [])
+
+    entries = _native_line_entries(extraction, tables)
+
+    assert entries == [
+        ("Total Revenue", _polygon_from_bbox(10.0, 10.0, 90.0, 20.0)),
+        ("Notes", _polygon_from_bbox(10.0, 60.0, 50.0, 70.0)),
+    ]
+    assert _native_line_entries(extraction, [])[0][0] == "Total Revenue 1,205"
+
+
+def test_di_lines_without_polygon_are_kept():
+    lines = [
+        {"content": "Header", "polygon": [0, 0, 2, 0, 2, 1, 0, 1]},
+        {"content": "In table", "polygon": [0, 3, 2, 3, 2, 4, 0, 4]},
+        {"content": "No geometry"},
+    ]
+    entries = _di_line_entries(lines, [_table(0.0, 2.5, 5.0, 6.0)])
+    assert [text for text, _ in entries] == ["Header", "No geometry"]
+    assert entries[1][1] == []
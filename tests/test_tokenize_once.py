@@ -0,0 +1,114 @@
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import PreTrainedTokenizerFast
+
+from core.contracts import CanonicalPage, CanonicalSpan
+from embedding import late_chunking
+from embedding.modernbert import ModernBERTEmbedder
+
+WORDS = "alpha beta gamma delta epsilon zeta eta theta [TABLE] doc | a b ---".split()
+
+
+def _tokenizer():
+    vocab = {"[PAD]": 0, "[UNK]": 1, "[CLS]": 2, "[SEP]": 3}
+    for word in WORDS:
+        vocab.setdefault(word, len(vocab))
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+        pad_token="[PAD]",
+        unk_token="[UNK]",
+    )
+
+
+class SpyEmbedder(ModernBERTEmbedder):
+    def __init__(self, max_length=8192):
+        self.device = torch.device("cpu")
+        self.max_length = max_length
+        self.tokenizer = _tokenizer()
+        self.calls = {"tokenize": 0, "tokenize_text": 0}
+
+    def tokenize(self, text):
+        self.calls["tokenize"] += 1
+        return super().tokenize(text)
+
+    def tokenize_text(self, text):
+        self.calls["tokenize_text"] += 1
+        return super().tokenize_text(text)
+
+    def encode_batch(self, batch):
+        return [item.input_ids[0].float().unsqueeze(-1).repeat(1, 3) for item in batch]
+
+
+def test_sliced_window_matches_retokenized_text():
+    embedder = SpyEmbedder(max_length=16)
+    text = "alpha beta  gamma\ndelta epsilon zeta"
+    tokens = embedder.tokenize_text(text)
+    char_start, char_end = tokens.offsets[1][0], tokens.offsets[4][1]
+    sliced = embedder.chunk_from_ids(
+        tokens.input_ids[1:5],
+        [(s - char_start, e - char_start) for s, e in tokens.offsets[1:5]],
+    )
+    direct = embedder.tokenize(text[char_start:char_end])
+    assert torch.equal(sliced.input_ids, direct.input_ids)
+    assert torch.equal(sliced.attention_mask, direct.attention_mask)
+    assert sliced.offsets == direct.offsets
+
+
+def test_sliced_window_truncates_like_tokenize():
+    embedder = SpyEmbedder(max_length=4)
+    text = "alpha beta gamma delta"
+    tokens = embedder.tokenize_text(text)
+    sliced = embedder.chunk_from_ids(tokens.input_ids, tokens.offsets)
+    direct = embedder.tokenize(text)
+    assert torch.equal(sliced.input_ids, direct.input_ids)
+    assert sliced.offsets == direct.offsets
+
+
+def _page(page_number, lines, table=None):
+    spans = []
+    cursor = 0
+    for line, is_table in [(line, False) for line in lines] + ([(table, True)] if table else []):
+        spans.append(
+            CanonicalSpan(
+                text=line,
+                char_start=cursor,
+                char_end=cursor + len(line),
+                polygons=[{"page_number": page_number, "polygon": []}],
+                source_type="native",
+                page_number=page_number,
+                heading_path="doc/S",
+                section_id="S",
+                is_table=is_table,
+            )
+        )
+        cursor += len(line) + 1
+    text = "\n".join(span.text for span in spans)
+    return CanonicalPage(doc_id="doc-1", page_number=page_number, text=text, spans=spans)
+
+
+def test_each_page_is_tokenized_once(monkeypatch):
+    from embedding import model_registry
+
+    embedder = SpyEmbedder()
+    monkeypatch.setattr(model_registry, "get_embedding_model", lambda **_: embedder)
+    pages = [
+        _page(1, ["alpha beta gamma", "delta"], table="[TABLE] doc\n| a | b |\n| --- |"),
+        _page(2, ["epsilon zeta eta theta"]),
+    ]
+    chunks = late_chunking.late_chunk_embeddings(
+        pages, macro_max_tokens=4, macro_overlap_tokens=1, child_target_tokens=2
+    )
+    assert embedder.calls == {"tokenize": 0, "tokenize_text": 2}
+    table = next(c for c in chunks if c.chunk_type == "table")
+    assert table.text_content.startswith("[TABLE]")
+    assert [c.text_content for c in chunks if c.page_numbers == [2]] == [
+        "epsilon zeta",
+        "eta theta",
+    ]
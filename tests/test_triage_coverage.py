@@ -0,0 +1,80 @@
+import fitz
+
+from ingestion.pdf_analysis import HIGH_IMAGE_COVERAGE_THRESHOLD, analyze_page
+
+
+def _text_page(pdf):
+    page = pdf.new_page()
+    for line in range(40):
+        page.insert_text((72, 72 + line * 16), f"Line {line} revenue net income and expenses")
+    return page
+
+
+def test_metadata_coverage_matches_raster_decision_on_text_page():
+    pdf = fitz.open()
+    page = _text_page(pdf)
+    page.draw_line((72, 60), (500, 60), color=(0, 0, 0))
+    raster = analyze_page(page, coverage_mode="raster")
+    metadata = analyze_page(page, coverage_mode="metadata")
+    assert raster.metrics.image_coverage_method == "raster"
+    assert metadata.metrics.image_coverage_method == "metadata"
+    assert metadata.decision == raster.decision
+    assert abs(metadata.metrics.image_coverage_ratio - raster.metrics.image_coverage_ratio) < 0.05
+
+
+def test_metadata_coverage_falls_back_to_raster_for_large_fill():
+    pdf = fitz.open()
+    page = _text_page(pdf)
+    page.draw_rect(fitz.Rect(50, 50, 500, 600), color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+    decision = analyze_page(page, coverage_mode="metadata")
+    assert decision.metrics.image_coverage_method == "raster"
+    assert decision.metrics.image_coverage_ratio > HIGH_IMAGE_COVERAGE_THRESHOLD
+    assert "high_image_coverage" in decision.reason_codes
+
+
+def test_metadata_coverage_falls_back_to_raster_for_images():
+    pdf = fitz.open()
+    page = _text_page(pdf)
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+    pixmap.clear_with(255)
+    page.insert_image(fitz.Rect(400, 700, 420, 720), pixmap=pixmap)
+    decision = analyze_page(page, coverage_mode="metadata")
+    assert decision.metrics.image_coverage_method == "raster"
+
+
+def test_default_coverage_mode_is_raster():
+    pdf = fitz.open()
+    decision = analyze_page(_text_page(pdf))
+    assert decision.metrics.image_coverage_method == "raster"
+
+
+def test_metadata_coverage_falls_back_to_raster_for_forms_and_annotations():
+    source = fitz.open()
+    source.new_page().draw_rect(fitz.Rect(0, 0, 50, 50), fill=(0.5, 0.5, 0.5))
+    pdf = fitz.open()
+    page = _text_page(pdf)
+    page.show_pdf_page(fitz.Rect(400, 700, 420, 720), source, 0)
+    assert analyze_page(page, coverage_mode="metadata").metrics.image_coverage_method == "raster"
+
+    page = _text_page(pdf)
+    link = {"kind": fitz.LINK_URI, "from": fitz.Rect(72, 60, 200, 72), "uri": "https://x"}
+    page.insert_link(link)
+    assert analyze_page(page, coverage_mode="metadata").metrics.image_coverage_method == "metadata"
+    annot = page.add_rect_annot(fitz.Rect(400, 700, 420, 720))
+    annot.set_colors(fill=(0.2, 0.2, 0.2))
+    annot.update()
+    assert analyze_page(page, coverage_mode="metadata").metrics.image_coverage_method == "raster"
+
+
+def test_metadata_coverage_falls_back_to_raster_for_small_dense_text():
+    # Word boxes cover ~0.31 of the page, but 2pt glyphs darken whole 2.5pt
+    # raster pixels, so the raster ratio crosses the threshold.
+    pdf = fitz.open()
+    page = pdf.new_page()
+    for line in range(104):
+        page.insert_text((4, 10 + line * 8), "Revenue net income 1,205 " * 40, fontsize=2)
+    raster = analyze_page(page, coverage_mode="raster")
+    metadata = analyze_page(page, coverage_mode="metadata")
+    assert raster.metrics.image_coverage_ratio > HIGH_IMAGE_COVERAGE_THRESHOLD
+    assert metadata.metrics.image_coverage_method == "raster"
+    assert metadata.decision == raster.decision == "di_required"